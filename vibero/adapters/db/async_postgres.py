@@ -0,0 +1,463 @@
+import time
+from typing import (
+    AsyncIterator,
+    Sequence,
+    Optional,
+    Type,
+    Any,
+    Awaitable,
+    Callable,
+)
+from dotenv import load_dotenv
+import os
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from typing_extensions import override
+from vibero.adapters.db.models import FallbackModel, Base
+from vibero.adapters.db.replicas import (
+    ReadRouter,
+    ReplicaSelection,
+    replica_urls_from_env,
+)
+from vibero.adapters.db.pool import (
+    PoolConfig,
+    engine_options,
+    pool_status,
+    register_pool_metrics,
+)
+from vibero.adapters.db.sql_query import (
+    affected_count,
+    apply_update,
+    batch_inserts,
+    delete_documents,
+    documents_from_result,
+    documents_from_rows,
+    insert_statements,
+    new_document,
+    select_documents,
+    select_one,
+    update_documents,
+)
+from vibero.core.persistence.common import FieldName, Sort, Where
+from vibero.core.health import DatabaseHealth, DatabaseHealthCheck
+from vibero.core.loggers import Logger
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.persistence.document_database import (
+    DEFAULT_CHUNK_SIZE,
+    BaseDocument,
+    BulkWriteResult,
+    DeleteMany,
+    DeleteManyResult,
+    DeleteOne,
+    DocumentDatabase,
+    DocumentCollection,
+    InsertManyResult,
+    TDocument,
+    InsertResult,
+    UpdateMany,
+    UpdateManyResult,
+    UpdateOne,
+    UpdateResult,
+    DeleteResult,
+    WriteOperation,
+)
+
+_SYNC_POSTGRES_DRIVERS = ("postgresql", "postgresql+psycopg2")
+
+
+def to_async_database_url(database_url: str) -> str:
+    """Rewrites a sync Postgres URL (as used by PostgresDB) to use the asyncpg driver."""
+    url = make_url(database_url)
+    if url.drivername in _SYNC_POSTGRES_DRIVERS:
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+# === Database access layer ===
+class AsyncPostgresDB(DocumentDatabase, DatabaseHealthCheck):
+    def __init__(
+        self,
+        logger: Logger,
+        database_url: Optional[str] = None,
+        pool_config: Optional[PoolConfig] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        replica_urls: Optional[Sequence[str]] = None,
+        replica_selection: ReplicaSelection = "round_robin",
+        read_your_writes_window: float = 2.0,
+        consistency_key: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        load_dotenv()  # loads variables from .env into environment
+
+        DATABASE_URL = database_url or os.getenv("DATABASE_URL")
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL is not set in the environment.")
+
+        self._pool_config = pool_config
+        self._metrics = metrics
+
+        self.engine: AsyncEngine = self._create_engine(DATABASE_URL, "primary")
+        self._pool_names = {self.engine: "primary"}
+
+        replicas = [
+            self._create_engine(url, f"replica-{i}")
+            for i, url in enumerate(
+                replica_urls if replica_urls is not None else replica_urls_from_env()
+            )
+        ]
+        for i, replica in enumerate(replicas):
+            self._pool_names[replica] = f"replica-{i}"
+
+        self.read_router = ReadRouter(
+            self.engine,
+            replicas,
+            replica_selection,
+            read_your_writes_window,
+            consistency_key,
+        )
+
+        # Documents are returned detached from their session, so their loaded
+        # attributes must survive the commit instead of being expired.
+        self._session_makers = {
+            engine: async_sessionmaker(bind=engine, expire_on_commit=False)
+            for engine in self._pool_names
+        }
+        self.SessionLocal = self._session_makers[self.engine]
+        self._logger = logger
+        self._collections: dict[str, AsyncPostgresTableCollection[Any]] = {}
+
+    def _create_engine(self, database_url: str, pool_name: str) -> AsyncEngine:
+        # Without a pool_config, the driver's default pool is used as-is
+        engine = create_async_engine(
+            to_async_database_url(database_url),
+            **(
+                engine_options(
+                    self._pool_config, AsyncAdaptedQueuePool, pool_name, self._metrics
+                )
+                if self._pool_config
+                else {}
+            ),
+        )
+        if self._metrics:
+            register_pool_metrics(self._metrics, pool_name, lambda: engine.pool)
+        return engine
+
+    async def init_db(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def close(self) -> None:
+        for engine in self._pool_names:
+            await engine.dispose()
+
+    def get_session(self) -> AsyncSession:
+        """A session on the primary, for writes (see record_write())."""
+        return self.SessionLocal()
+
+    def get_read_session(self) -> AsyncSession:
+        """A session on a replica, or on the primary if there are none or the
+        current writer wrote recently."""
+        return self._session_makers[self.read_router.for_read()]()
+
+    def record_write(self) -> None:
+        self.read_router.record_write()
+
+    @override
+    async def check_health(self) -> DatabaseHealth:
+        t_start = time.perf_counter()
+        error: Optional[str] = None
+
+        for engine, pool_name in self._pool_names.items():
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except Exception as exc:
+                error = f"{pool_name}: {type(exc).__name__}: {exc}"
+                break
+
+        return DatabaseHealth(
+            healthy=error is None,
+            latency=time.perf_counter() - t_start if error is None else None,
+            pools={
+                pool_name: pool_status(engine.pool)
+                for engine, pool_name in self._pool_names.items()
+            },
+            error=error,
+        )
+
+    @override
+    async def create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        orm_model=None,
+    ) -> DocumentCollection[TDocument]:
+        """Creates the model's table, unless it already exists."""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                (orm_model or FallbackModel).__table__.create, checkfirst=True
+            )
+        return await self.get_collection(name, schema, orm_model=orm_model)
+
+    @override
+    async def get_or_create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        orm_model=None,
+    ) -> DocumentCollection[TDocument]:
+        return await self.get_collection(name, schema, document_loader, orm_model)
+
+    @override
+    async def get_collection(
+        self,
+        name: str,
+        schema: Type[TDocument],
+        document_loader=None,
+        orm_model=None,
+    ) -> DocumentCollection[TDocument]:
+        if name not in self._collections:
+            if orm_model is None:
+                self._logger.warning(
+                    f"No ORM model found for collection '{name}', using fallback."
+                )
+            self._collections[name] = AsyncPostgresTableCollection(
+                schema=schema,
+                db=self,
+                logger=self._logger,
+                orm_model=orm_model or FallbackModel,
+            )
+        return self._collections[name]
+
+    @override
+    async def delete_collection(self, name: str) -> None:
+        """Drops the collection's table, along with all of its documents."""
+        if (collection := self._collections.pop(name, None)) is None:
+            raise ValueError(f'Collection "{name}" does not exist')
+
+        async with self.engine.begin() as conn:
+            await conn.run_sync(collection.orm_model.__table__.drop, checkfirst=True)
+
+
+# === Collection wrapper ===
+class AsyncPostgresTableCollection(DocumentCollection[TDocument]):
+    def __init__(
+        self,
+        schema: Type[TDocument],
+        orm_model: type[Any],
+        db: AsyncPostgresDB,
+        logger: Logger,
+    ):
+        self.db = db
+        self.schema = schema
+        self.orm_model = orm_model
+        self._logger = logger
+
+    async def _insert_chunks(
+        self,
+        session: AsyncSession,
+        documents: Sequence[TDocument],
+        chunk_size: int,
+    ) -> None:
+        for statement, rows in insert_statements(self.orm_model, documents, chunk_size):
+            await session.execute(statement, rows)
+
+    async def _update_all(
+        self,
+        session: AsyncSession,
+        filters: Where,
+        params: TDocument,
+    ) -> int:
+        statement = update_documents(self.orm_model, filters, params)
+        return affected_count(await session.execute(statement))
+
+    async def _delete_all(self, session: AsyncSession, filters: Where) -> int:
+        statement = delete_documents(self.orm_model, filters)
+        return affected_count(await session.execute(statement))
+
+    async def _first(self, session: AsyncSession, filters: Where) -> Any:
+        result = await session.execute(select_one(self.orm_model, filters))
+        return result.scalars().first()
+
+    @override
+    async def find(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[TDocument]:
+        statement = select_documents(
+            self.orm_model, filters, sort, limit, cursor, projection
+        )
+        async with self.db.get_read_session() as session:
+            return documents_from_result(await session.execute(statement), projection)
+
+    @override
+    async def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        statement = select_documents(
+            self.orm_model, filters, sort=sort, projection=projection
+        )
+
+        async with self.db.get_read_session() as session:
+            # Streams through a server-side cursor, one batch of rows at a time
+            result = await session.stream(statement)
+            async for rows in result.partitions(batch_size):
+                for document in documents_from_rows(rows, projection):
+                    yield document
+
+    @override
+    async def find_one(self, filters: Where) -> Optional[TDocument]:
+        async with self.db.get_read_session() as session:
+            return await self._first(session, filters)
+
+    @override
+    async def insert_one(self, document: TDocument) -> InsertResult:
+        async with self.db.get_session() as session:
+            orm_obj = self.orm_model(**document.__dict__)
+            session.add(orm_obj)
+            await session.commit()
+            self.db.record_write()
+            return InsertResult(acknowledged=True)
+
+    @override
+    async def update_one(
+        self,
+        filters: Where,
+        params: dict,
+        upsert: bool = False,
+    ) -> UpdateResult[TDocument]:
+        async with self.db.get_session() as session:
+            obj = await self._first(session, filters)
+
+            if obj:
+                apply_update(obj, params)
+                await session.commit()
+                self.db.record_write()
+
+                # Detach so it's safe to return
+                await session.refresh(obj)
+                session.expunge(obj)
+
+                return UpdateResult(True, 1, 1, obj)
+
+            elif upsert:
+                new_obj = new_document(self.orm_model, params)
+                session.add(new_obj)
+                await session.commit()
+                self.db.record_write()
+
+                await session.refresh(new_obj)
+                session.expunge(new_obj)
+
+                return UpdateResult(True, 0, 1, new_obj)
+
+            else:
+                return UpdateResult(False, 0, 0, None)
+
+    @override
+    async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
+        async with self.db.get_session() as session:
+            obj = await self._first(session, filters)
+            if obj:
+                await session.delete(obj)
+                await session.commit()
+                self.db.record_write()
+                return DeleteResult(True, 1, obj)
+            return DeleteResult(True, 0, None)
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        async with self.db.get_session() as session:
+            await self._insert_chunks(session, documents, chunk_size)
+            await session.commit()
+
+        if documents:
+            self.db.record_write()
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    @override
+    async def update_many(self, filters: Where, params: dict) -> UpdateManyResult:
+        async with self.db.get_session() as session:
+            count = await self._update_all(session, filters, params)
+            await session.commit()
+
+        self.db.record_write()
+        return UpdateManyResult(
+            acknowledged=True, matched_count=count, modified_count=count
+        )
+
+    @override
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        async with self.db.get_session() as session:
+            count = await self._delete_all(session, filters)
+            await session.commit()
+
+        self.db.record_write()
+        return DeleteManyResult(acknowledged=True, deleted_count=count)
+
+    @override
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        inserted = matched = modified = upserted = deleted = 0
+
+        async with self.db.get_session() as session:
+            for operation in batch_inserts(operations):
+                if isinstance(operation, list):
+                    await self._insert_chunks(session, operation, chunk_size)
+                    inserted += len(operation)
+                elif isinstance(operation, UpdateOne):
+                    if obj := await self._first(session, operation.filters):
+                        apply_update(obj, operation.params)
+                        matched += 1
+                        modified += 1
+                    elif operation.upsert:
+                        session.add(new_document(self.orm_model, operation.params))
+                        upserted += 1
+                elif isinstance(operation, UpdateMany):
+                    count = await self._update_all(
+                        session, operation.filters, operation.params
+                    )
+                    matched += count
+                    modified += count
+                elif isinstance(operation, DeleteOne):
+                    if obj := await self._first(session, operation.filters):
+                        await session.delete(obj)
+                        deleted += 1
+                elif isinstance(operation, DeleteMany):
+                    deleted += await self._delete_all(session, operation.filters)
+
+            await session.commit()
+
+        if operations:
+            self.db.record_write()
+
+        return BulkWriteResult(
+            acknowledged=True,
+            inserted_count=inserted,
+            matched_count=matched,
+            modified_count=modified,
+            upserted_count=upserted,
+            deleted_count=deleted,
+        )
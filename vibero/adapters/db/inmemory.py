@@ -1,33 +1,73 @@
 from __future__ import annotations
-from typing import Awaitable, Callable, Optional, Sequence, cast
+import asyncio
+import bisect
+from collections import defaultdict
+import dataclasses
+import math
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    cast,
+)
 from typing_extensions import override, get_type_hints
 from vibero.core.users import User, UserId, UserStore, UserUpdateParams
 from vibero.core.persistence.common import ObjectId
-from vibero.core.common import generate_id
+from vibero.core.common import default_user_role, generate_id
+from vibero.core.password_hasher import PasswordHasher
 from datetime import datetime
 from typing import Sequence
 
 from vibero.core.persistence.common import (
-    matches_filters,
+    FieldName,
+    Sort,
+    compile_filters,
+    document_fields,
+    keyset_filter,
+    keyset_sort,
+    projection_with_sort_keys,
     Where,
     ObjectId,
     ensure_is_total,
 )
+from vibero.core.health import DatabaseHealth, DatabaseHealthCheck
 from vibero.core.persistence.document_database import (
+    DEFAULT_CHUNK_SIZE,
     BaseDocument,
+    BulkWriteResult,
+    DeleteMany,
+    DeleteManyResult,
+    DeleteOne,
     DeleteResult,
     DocumentCollection,
     DocumentDatabase,
+    InsertManyResult,
+    InsertOne,
     InsertResult,
     TDocument,
+    UpdateMany,
+    UpdateManyResult,
+    UpdateOne,
     UpdateResult,
+    WriteOperation,
 )
 
 
-class InMemoryDocumentDatabase(DocumentDatabase):
+class InMemoryDocumentDatabase(DocumentDatabase, DatabaseHealthCheck):
     def __init__(self) -> None:
         self._collections: dict[str, InMemoryDocumentCollection[BaseDocument]] = {}
 
+    @override
+    async def check_health(self) -> DatabaseHealth:
+        return DatabaseHealth(healthy=True, latency=0.0, pools={})
+
     @override
     async def create_collection(
         self,
@@ -46,6 +86,7 @@ class InMemoryDocumentDatabase(DocumentDatabase):
         name: str,
         schema: type[TDocument],
         document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        orm_model: Any = None,  # Postgres-only; documents are kept as-is in memory
     ) -> InMemoryDocumentCollection[TDocument]:
         if name in self._collections:
             return cast(InMemoryDocumentCollection[TDocument], self._collections[name])
@@ -57,6 +98,7 @@ class InMemoryDocumentDatabase(DocumentDatabase):
         name: str,
         schema: type[TDocument],
         document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        orm_model: Any = None,  # Postgres-only; documents are kept as-is in memory
     ) -> InMemoryDocumentCollection[TDocument]:
         if collection := self._collections.get(name):
             return cast(InMemoryDocumentCollection[TDocument], collection)
@@ -71,34 +113,306 @@ class InMemoryDocumentDatabase(DocumentDatabase):
             raise ValueError(f'Collection "{name}" does not exist')
 
 
+IndexKind = Literal["hash", "sorted"]
+
+_RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+
+def _apply_update(document: TDocument, params: Mapping[str, Any]) -> TDocument:
+    if dataclasses.is_dataclass(document):
+        return cast(TDocument, dataclasses.replace(document, **params))
+    return cast(TDocument, {**document, **params})
+
+
+class _HashIndex:
+    """Serves $eq and $in lookups on a single field."""
+
+    def __init__(self) -> None:
+        self._slots: dict[Any, set[int]] = defaultdict(set)
+
+    def add(self, value: Any, slot: int) -> None:
+        self._slots[value].add(slot)
+
+    def remove(self, value: Any, slot: int) -> None:
+        slots = self._slots[value]
+        slots.discard(slot)
+        if not slots:
+            del self._slots[value]
+
+    def lookup(self, field_filter: Mapping[str, Any]) -> Optional[set[int]]:
+        if "$eq" in field_filter:
+            return set(self._slots.get(field_filter["$eq"], ()))
+        if "$in" in field_filter:
+            return set().union(*(self._slots.get(v, ()) for v in field_filter["$in"]))
+        return None
+
+
+class _SortedIndex:
+    """Serves $eq, $in and range ($gt/$gte/$lt/$lte) lookups on a single field.
+
+    Entries are (value, slot) pairs kept in sorted order, so a range maps to a
+    contiguous slice found by bisection. None values are not indexed, as they are
+    not ordered with respect to other values.
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[Any, int]] = []
+
+    def add(self, value: Any, slot: int) -> None:
+        if value is not None:
+            bisect.insort(self._entries, (value, slot))
+
+    def remove(self, value: Any, slot: int) -> None:
+        if value is not None:
+            del self._entries[bisect.bisect_left(self._entries, (value, slot))]
+
+    def lookup(self, field_filter: Mapping[str, Any]) -> Optional[set[int]]:
+        if "$eq" in field_filter:
+            value = field_filter["$eq"]
+            return None if value is None else self._range(value, True, value, True)
+        if "$in" in field_filter:
+            values = field_filter["$in"]
+            if None in values:
+                return None
+            return set().union(*(self._range(v, True, v, True) for v in values))
+        if not any(op in field_filter for op in _RANGE_OPERATORS):
+            return None
+
+        low, low_inclusive = field_filter.get("$gte"), True
+        if "$gt" in field_filter:
+            low, low_inclusive = field_filter["$gt"], False
+
+        high, high_inclusive = field_filter.get("$lte"), True
+        if "$lt" in field_filter:
+            high, high_inclusive = field_filter["$lt"], False
+
+        return self._range(low, low_inclusive, high, high_inclusive)
+
+    def _range(
+        self,
+        low: Any,
+        low_inclusive: bool,
+        high: Any,
+        high_inclusive: bool,
+    ) -> set[int]:
+        # (value,) sorts before, and (value, inf) after, every (value, slot) entry
+        start, end = 0, len(self._entries)
+
+        if low is not None:
+            if low_inclusive:
+                start = bisect.bisect_left(self._entries, (low,))
+            else:
+                start = bisect.bisect_right(self._entries, (low, math.inf))
+
+        if high is not None:
+            if high_inclusive:
+                end = bisect.bisect_right(self._entries, (high, math.inf))
+            else:
+                end = bisect.bisect_left(self._entries, (high,))
+
+        return {slot for _, slot in self._entries[start:end]}
+
+
+def _sort_documents(documents: list[TDocument], sort: Optional[Sort]) -> None:
+    # Stable sorts, applied from the least to the most significant key
+    for field_name, direction in reversed(keyset_sort(sort)):
+        documents.sort(
+            key=lambda d: document_fields(d)[field_name],
+            reverse=direction == "desc",
+        )
+
+
+def _project(
+    document: TDocument,
+    projection: Sequence[FieldName],
+    sort: Optional[Sort],
+) -> TDocument:
+    fields = document_fields(document)
+    return cast(
+        TDocument,
+        {
+            f: fields[f]
+            for f in projection_with_sort_keys(projection, sort)
+            if f in fields
+        },
+    )
+
+
 class InMemoryDocumentCollection(DocumentCollection[TDocument]):
     def __init__(
         self,
         name: str,
         schema: type[TDocument],
         data: Optional[Sequence[TDocument]] = None,
+        indexes: Optional[Mapping[str, IndexKind]] = None,
     ) -> None:
         self._name = name
         self._schema = schema
-        self._documents = list(data) if data else []
+
+        # Documents are keyed by an ever-increasing slot number, so that iterating
+        # over slots in ascending order preserves insertion order.
+        self._documents: dict[int, TDocument] = {}
+        self._next_slot = 0
+        self._indexes: dict[str, _HashIndex | _SortedIndex] = {}
+
+        for field_name, kind in (indexes or {}).items():
+            self.create_index(field_name, kind)
+
+        for document in data or []:
+            self._store(document)
+
+    def create_index(self, field_name: str, kind: IndexKind = "hash") -> None:
+        """Declares a secondary index on a field. Hash indexes serve $eq and $in,
+        sorted indexes additionally serve $gt, $gte, $lt and $lte."""
+        index = _HashIndex() if kind == "hash" else _SortedIndex()
+
+        for slot, document in self._documents.items():
+            if field_name in (fields := document_fields(document)):
+                index.add(fields[field_name], slot)
+
+        self._indexes[field_name] = index
+
+    def _store(self, document: TDocument, slot: Optional[int] = None) -> None:
+        if slot is None:
+            slot = self._next_slot
+            self._next_slot += 1
+
+        self._documents[slot] = document
+        self._index(document, slot)
+
+    def _unstore(self, slot: int) -> TDocument:
+        document = self._documents.pop(slot)
+        self._unindex(document, slot)
+        return document
+
+    def _replace(self, slot: int, document: TDocument) -> None:
+        # Assigned in place, so that the document keeps its position in scans
+        self._unindex(self._documents[slot], slot)
+        self._documents[slot] = document
+        self._index(document, slot)
+
+    def _index(self, document: TDocument, slot: int) -> None:
+        fields = document_fields(document)
+        for field_name, index in self._indexes.items():
+            if field_name in fields:
+                index.add(fields[field_name], slot)
+
+    def _unindex(self, document: TDocument, slot: int) -> None:
+        fields = document_fields(document)
+        for field_name, index in self._indexes.items():
+            if field_name in fields:
+                index.remove(fields[field_name], slot)
+
+    def _restore(self, documents: dict[int, TDocument], next_slot: int) -> None:
+        self._documents, self._next_slot = documents, next_slot
+
+        for field_name, index in list(self._indexes.items()):
+            self.create_index(
+                field_name, "hash" if isinstance(index, _HashIndex) else "sorted"
+            )
+
+    def _candidate_slots(self, filters: Where) -> Iterable[int]:
+        best: Optional[set[int]] = None
+
+        for field_name, field_filter in self._conjunctive_field_filters(filters):
+            if (index := self._indexes.get(field_name)) is None:
+                continue
+
+            try:
+                slots = index.lookup(field_filter)
+            except TypeError:  # unhashable or unorderable operand
+                continue
+
+            if slots is not None and (best is None or len(slots) < len(best)):
+                best = slots
+
+        if best is None:
+            return list(self._documents)
+
+        return sorted(best)
+
+    def _conjunctive_field_filters(
+        self,
+        filters: Where,
+    ) -> Iterator[tuple[str, Mapping[str, Any]]]:
+        """Yields the field filters that every matching document must satisfy,
+        i.e. those at the top level or nested only under $and."""
+        for key, value in filters.items():
+            if key == "$and":
+                for sub_filter in cast(list[Where], value):
+                    yield from self._conjunctive_field_filters(sub_filter)
+            elif key != "$or":
+                yield key, value if isinstance(value, Mapping) else {"$eq": value}
+
+    def _matching_slots(self, filters: Where) -> Iterator[int]:
+        predicate = compile_filters(filters)
+
+        for slot in self._candidate_slots(filters):
+            # Slots may be vacated while a lazy consumer (find_iter) is suspended
+            document = self._documents.get(slot)
+            if document is not None and predicate(document_fields(document)):
+                yield slot
 
     @override
-    async def find(self, filters: Where) -> Sequence[TDocument]:
-        return [
-            doc for doc in self._documents if matches_filters(filters, doc.__dict__)
-        ]
+    async def find(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[TDocument]:
+        if cursor:
+            filters = {"$and": [filters, keyset_filter(cursor, sort)]}
+
+        documents = [self._documents[slot] for slot in self._matching_slots(filters)]
+
+        if sort or limit is not None or cursor:
+            _sort_documents(documents, sort)
+
+        if limit is not None:
+            documents = documents[:limit]
+
+        if projection is not None:
+            return [_project(d, projection, sort) for d in documents]
+
+        return documents
+
+    @override
+    async def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        documents: Iterable[TDocument]
+
+        if sort:
+            # Ordering requires all matches up front, though only as references
+            documents = [self._documents[s] for s in self._matching_slots(filters)]
+            _sort_documents(documents, sort)
+        else:
+            documents = (self._documents[s] for s in self._matching_slots(filters))
+
+        for i, document in enumerate(documents):
+            if i and i % batch_size == 0:
+                await asyncio.sleep(0)  # let other requests run between batches
+
+            yield (
+                document if projection is None else _project(document, projection, sort)
+            )
 
     @override
     async def find_one(self, filters: Where) -> Optional[TDocument]:
-        for doc in self._documents:
-            if matches_filters(filters, doc.__dict__):
-                return doc
+        for slot in self._matching_slots(filters):
+            return self._documents[slot]
         return None
 
     @override
     async def insert_one(self, document: TDocument) -> InsertResult:
-        ensure_is_total(document.__dict__, self._schema)
-        self._documents.append(document)
+        ensure_is_total(document_fields(document), self._schema)
+        self._store(document)
         return InsertResult(acknowledged=True)
 
     @override
@@ -108,16 +422,15 @@ class InMemoryDocumentCollection(DocumentCollection[TDocument]):
         params: TDocument,
         upsert: bool = False,
     ) -> UpdateResult[TDocument]:
-        for i, doc in enumerate(self._documents):
-            if matches_filters(filters, doc.__dict__):
-                updated = cast(TDocument, {**self._documents[i], **params})
-                self._documents[i] = updated
-                return UpdateResult(
-                    acknowledged=True,
-                    matched_count=1,
-                    modified_count=1,
-                    updated_document=updated,
-                )
+        for slot in self._matching_slots(filters):
+            updated = _apply_update(self._documents[slot], params)
+            self._replace(slot, updated)
+            return UpdateResult(
+                acknowledged=True,
+                matched_count=1,
+                modified_count=1,
+                updated_document=updated,
+            )
 
         if upsert:
             await self.insert_one(params)
@@ -137,14 +450,13 @@ class InMemoryDocumentCollection(DocumentCollection[TDocument]):
 
     @override
     async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
-        for i, doc in enumerate(self._documents):
-            if matches_filters(filters, doc.__dict__):
-                removed = self._documents.pop(i)
-                return DeleteResult(
-                    acknowledged=True,
-                    deleted_count=1,
-                    deleted_document=removed,
-                )
+        for slot in self._matching_slots(filters):
+            removed = self._unstore(slot)
+            return DeleteResult(
+                acknowledged=True,
+                deleted_count=1,
+                deleted_document=removed,
+            )
 
         return DeleteResult(
             acknowledged=True,
@@ -152,10 +464,109 @@ class InMemoryDocumentCollection(DocumentCollection[TDocument]):
             deleted_document=None,
         )
 
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        # Validated up front, so that a bad document leaves the collection as-is
+        for document in documents:
+            ensure_is_total(document_fields(document), self._schema)
+
+        for document in documents:
+            self._store(document)
+
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    @override
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+    ) -> UpdateManyResult:
+        slots = list(self._matching_slots(filters))
+
+        for slot in slots:
+            updated = _apply_update(self._documents[slot], params)
+            self._replace(slot, updated)
+
+        return UpdateManyResult(
+            acknowledged=True,
+            matched_count=len(slots),
+            modified_count=len(slots),
+        )
+
+    @override
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        slots = list(self._matching_slots(filters))
+
+        for slot in slots:
+            self._unstore(slot)
+
+        return DeleteManyResult(acknowledged=True, deleted_count=len(slots))
+
+    @override
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        # Applied to the live documents, and rolled back if any operation fails
+        # (e.g. an upsert of partial params), so that none of them take effect
+        documents, next_slot = dict(self._documents), self._next_slot
+        try:
+            return await self._bulk_write(operations)
+        except BaseException:
+            self._restore(documents, next_slot)
+            raise
+
+    async def _bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+    ) -> BulkWriteResult:
+        inserted = matched = modified = upserted = deleted = 0
+
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                inserted += (
+                    await self.insert_many([operation.document])
+                ).inserted_count
+            elif isinstance(operation, UpdateOne):
+                result = await self.update_one(
+                    operation.filters, operation.params, operation.upsert
+                )
+                matched += result.matched_count
+                modified += result.modified_count
+                # An upsert reports no match, yet returns the inserted document
+                upserted += int(
+                    not result.matched_count and result.updated_document is not None
+                )
+            elif isinstance(operation, UpdateMany):
+                many_result = await self.update_many(
+                    operation.filters, operation.params
+                )
+                matched += many_result.matched_count
+                modified += many_result.modified_count
+            elif isinstance(operation, DeleteOne):
+                deleted += (await self.delete_one(operation.filters)).deleted_count
+            elif isinstance(operation, DeleteMany):
+                deleted += (await self.delete_many(operation.filters)).deleted_count
+
+        return BulkWriteResult(
+            acknowledged=True,
+            inserted_count=inserted,
+            matched_count=matched,
+            modified_count=modified,
+            upserted_count=upserted,
+            deleted_count=deleted,
+        )
+
 
 class InMemoryUserStore(UserStore):
-    def __init__(self) -> None:
+    def __init__(self, password_hasher: PasswordHasher) -> None:
         self._db = InMemoryDocumentDatabase()
+        self._password_hasher = password_hasher
         self._users: InMemoryDocumentCollection[User] = None  # will init lazily
 
     async def _ensure_collection(self) -> None:
@@ -165,21 +576,46 @@ class InMemoryUserStore(UserStore):
                 schema=User,
                 document_loader=lambda doc: doc,  # Not used in memory
             )
+            self._users.create_index("id", "hash")
+            self._users.create_index("username", "hash")
 
-    async def create_user(self, username: str, email: str) -> User:
+    async def create_user(self, username: str, email: str, password: str) -> User:
         await self._ensure_collection()
         user = User(
             id=UserId(generate_id()),
             username=username,
             email=email,
+            hashed_password=await self._password_hasher.hash(password),
             created_at=datetime.utcnow(),
+            role=default_user_role(),
         )
         await self._users.insert_one(user)
         return user
 
-    async def list_users(self) -> Sequence[User]:
+    async def list_users(
+        self,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[User]:
         await self._ensure_collection()
-        return await self._users.find({})
+        return await self._users.find(
+            {},
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            projection=projection,
+        )
+
+    async def iter_users(
+        self,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[User]:
+        await self._ensure_collection()
+        async for user in self._users.find_iter({}, sort=sort, projection=projection):
+            yield user
 
     async def read_user(self, user_id: UserId) -> User:
         await self._ensure_collection()
@@ -188,6 +624,13 @@ class InMemoryUserStore(UserStore):
             raise ValueError(f"User with ID {user_id} not found")
         return user
 
+    async def get_by_username(self, username: str) -> User:
+        await self._ensure_collection()
+        user = await self._users.find_one({"username": {"$eq": username}})
+        if not user:
+            raise ValueError(f"User with username '{username}' not found")
+        return user
+
     async def update_user(self, user_id: UserId, params: UserUpdateParams) -> User:
         await self._ensure_collection()
         updated = await self._users.update_one({"id": {"$eq": user_id}}, params)
@@ -22,11 +22,13 @@ class GameModel(Base):
 
     id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False)
-    username = Column(String, nullable=False)  # Optional: denormalized for convenience
+    username = Column(
+        String, nullable=False, index=True
+    )  # Optional: denormalized for convenience
     title = Column(String, nullable=False)
     image = Column(String, nullable=False)
-    price = Column(Float, nullable=False)
-    discount = Column(Float, default=0.0)
+    price = Column(Float, nullable=False, index=True)
+    discount = Column(Float, default=0.0, index=True)
     created_at = Column(DateTime, nullable=False)
 
 
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+import os
+import time
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.pool import Pool, QueuePool
+
+from vibero.core.health import PoolStatus
+from vibero.core.metrics import Histogram, MetricsRegistry
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Sizing of a SQLAlchemy QueuePool.
+
+    At most pool_size connections are kept open, and up to max_overflow more are
+    opened under load. A checkout waits up to pool_timeout seconds for a
+    connection, connections older than pool_recycle seconds are replaced
+    (-1 to never recycle), and pool_pre_ping tests each connection on checkout.
+    """
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        load_dotenv()  # like DATABASE_URL, may be set in .env
+
+        defaults = cls()
+        return cls(
+            pool_size=int(os.getenv("DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.pool_timeout)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", defaults.pool_recycle)),
+            pool_pre_ping=os.getenv(
+                "DB_POOL_PRE_PING", str(defaults.pool_pre_ping)
+            ).lower()
+            in ("1", "true", "yes"),
+        )
+
+
+def timed_pool_class(
+    base: type[QueuePool],
+    checkout_wait: Optional[Callable[[float], None]],
+) -> type[QueuePool]:
+    """A subclass of the given pool class that reports how long each checkout
+    waited for a connection (including opening a new one).
+
+    SQLAlchemy has no event for the start of a checkout, hence the subclass.
+    It survives engine.dispose(), which recreates the pool from its class."""
+
+    class TimedPool(base):  # type: ignore[valid-type,misc]
+        def _do_get(self) -> Any:
+            t_start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                if checkout_wait:
+                    checkout_wait(time.perf_counter() - t_start)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def engine_options(
+    config: PoolConfig,
+    base: type[QueuePool],
+    pool_name: str,
+    metrics: Optional[MetricsRegistry],
+) -> dict[str, Any]:
+    """Keyword arguments for create_engine() / create_async_engine()."""
+    checkout_wait: Optional[Histogram] = (
+        metrics.histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent waiting for a database connection",
+            ["pool"],
+        )
+        if metrics
+        else None
+    )
+
+    return {
+        "poolclass": timed_pool_class(
+            base,
+            (
+                (lambda d: checkout_wait.observe(d, pool=pool_name))
+                if checkout_wait
+                else None
+            ),
+        ),
+        "pool_size": config.pool_size,
+        "max_overflow": config.max_overflow,
+        "pool_timeout": config.pool_timeout,
+        "pool_recycle": config.pool_recycle,
+        "pool_pre_ping": config.pool_pre_ping,
+    }
+
+
+def pool_status(pool: Pool) -> PoolStatus:
+    if not isinstance(pool, QueuePool):
+        # e.g. the single-connection pools used for in-memory SQLite
+        return PoolStatus(size=0, max_overflow=0, checked_out=0, idle=0, overflow=0)
+
+    return PoolStatus(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        # Counts up from -size as connections are opened
+        overflow=max(pool.overflow(), 0),
+    )
+
+
+def register_pool_metrics(
+    metrics: MetricsRegistry,
+    pool_name: str,
+    get_pool: Callable[[], Pool],
+) -> None:
+    """Exposes the pool's state as gauges, read whenever metrics are scraped.
+
+    Takes a getter rather than the pool, which engine.dispose() replaces."""
+    connections = metrics.gauge(
+        "db_pool_connections",
+        "Database connections by pool and state",
+        ["pool", "state"],
+    )
+    connections.set_function(
+        lambda: pool_status(get_pool()).checked_out,
+        pool=pool_name,
+        state="checked_out",
+    )
+    connections.set_function(
+        lambda: pool_status(get_pool()).idle, pool=pool_name, state="idle"
+    )
+    connections.set_function(
+        lambda: pool_status(get_pool()).overflow, pool=pool_name, state="overflow"
+    )
+
+    metrics.gauge(
+        "db_pool_utilization",
+        "Share of the pool's capacity checked out",
+        ["pool"],
+    ).set_function(lambda: pool_status(get_pool()).utilization, pool=pool_name)
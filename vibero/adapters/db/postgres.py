@@ -1,11 +1,45 @@
-from typing import Sequence, Optional, Type, Any, Awaitable, Callable
+import asyncio
+import time
+from typing import AsyncIterator, Sequence, Optional, Type, Any, Awaitable, Callable
 from dotenv import load_dotenv
 import os
 from sqlalchemy.orm import Session
 from vibero.adapters.db.models import FallbackModel, Base
-from vibero.core.persistence.common import Where
+from vibero.adapters.db.replicas import ReadRouter, ReplicaSelection, replica_urls_from_env
+from vibero.adapters.db.pool import (
+    PoolConfig,
+    engine_options,
+    pool_status,
+    register_pool_metrics,
+)
+from vibero.adapters.db.sql_query import (
+    affected_count,
+    apply_update,
+    batch_inserts,
+    delete_documents,
+    documents_from_result,
+    documents_from_rows,
+    insert_statements,
+    new_document,
+    select_documents,
+    select_one,
+    update_documents,
+)
+from vibero.core.persistence.common import FieldName, Sort, Where
+from vibero.core.health import DatabaseHealth, DatabaseHealthCheck
 from vibero.core.loggers import Logger
+from vibero.core.metrics import MetricsRegistry
 from vibero.core.persistence.document_database import (
+    DEFAULT_CHUNK_SIZE,
+    BulkWriteResult,
+    DeleteMany,
+    DeleteManyResult,
+    DeleteOne,
+    InsertManyResult,
+    UpdateMany,
+    UpdateManyResult,
+    UpdateOne,
+    WriteOperation,
     BaseDocument,
     DocumentDatabase,
     DocumentCollection,
@@ -18,26 +52,96 @@ from vibero.core.persistence.document_database import (
 
 
 # === Database access layer ===
-class PostgresDB:
-    def __init__(self, logger: Logger):
-        from sqlalchemy import create_engine
+class PostgresDB(DatabaseHealthCheck):
+    def __init__(
+        self,
+        logger: Logger,
+        pool_config: Optional[PoolConfig] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        replica_urls: Optional[Sequence[str]] = None,
+        replica_selection: ReplicaSelection = "round_robin",
+        read_your_writes_window: float = 2.0,
+        consistency_key: Optional[Callable[[], Optional[str]]] = None,
+    ):
         from sqlalchemy.orm import sessionmaker
         load_dotenv() # loads variables from .env into environment
 
         DATABASE_URL = os.getenv("DATABASE_URL")
         if not DATABASE_URL:
             raise RuntimeError("DATABASE_URL is not set in the environment.")
-        
-        self.engine = create_engine(DATABASE_URL)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+
+        self._pool_config = pool_config
+        self._metrics = metrics
+
+        self.engine = self._create_engine(DATABASE_URL, "primary")
+        self._pool_names = {self.engine: "primary"}
+
+        replicas = [
+            self._create_engine(url, f"replica-{i}")
+            for i, url in enumerate(replica_urls if replica_urls is not None else replica_urls_from_env())
+        ]
+        for i, replica in enumerate(replicas):
+            self._pool_names[replica] = f"replica-{i}"
+
+        self.read_router = ReadRouter(self.engine, replicas, replica_selection, read_your_writes_window, consistency_key)
+
+        self._session_makers = {engine: sessionmaker(bind=engine) for engine in self._pool_names}
+        self.SessionLocal = self._session_makers[self.engine]
         self._logger = logger
         self._collections: dict[str, PostgresTableCollection[Any]] = {}
+
+    def _create_engine(self, database_url: str, pool_name: str):
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import QueuePool
+
+        # Without a pool_config, the driver's default pool is used as-is
+        engine = create_engine(
+            database_url,
+            **(engine_options(self._pool_config, QueuePool, pool_name, self._metrics) if self._pool_config else {}),
+        )
+        if self._metrics:
+            register_pool_metrics(self._metrics, pool_name, lambda: engine.pool)
+        return engine
     
     def init_db(self):
         Base.metadata.create_all(self.engine)
 
     def get_session(self) -> Session:
+        """A session on the primary, for writes (see record_write())."""
         return self.SessionLocal()
+
+    def get_read_session(self) -> Session:
+        """A session on a replica, or on the primary if there are none or the
+        current writer wrote recently."""
+        return self._session_makers[self.read_router.for_read()]()
+
+    def record_write(self) -> None:
+        self.read_router.record_write()
+
+    def _ping(self) -> None:
+        from sqlalchemy import text
+
+        for engine, pool_name in self._pool_names.items():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception as exc:
+                raise RuntimeError(f"{pool_name}: {type(exc).__name__}: {exc}") from exc
+
+    async def check_health(self) -> DatabaseHealth:
+        t_start = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            await asyncio.to_thread(self._ping)
+        except RuntimeError as exc:
+            error = str(exc)
+
+        return DatabaseHealth(
+            healthy=error is None,
+            latency=time.perf_counter() - t_start if error is None else None,
+            pools={pool_name: pool_status(engine.pool) for engine, pool_name in self._pool_names.items()},
+            error=error,
+        )
     
     async def create_collection(
         self,
@@ -116,19 +220,60 @@ class PostgresTableCollection(DocumentCollection[TDocument]):
         self.orm_model = orm_model  # ✅ Add this line
         self._logger = logger
 
-    async def find(self, filters: Where) -> Sequence[TDocument]:
-        with self.db.get_session() as session:
-            return session.query(self.orm_model).filter_by(**filters).all()
+    def _insert_chunks(self, session: Session, documents: Sequence[TDocument], chunk_size: int) -> None:
+        for statement, rows in insert_statements(self.orm_model, documents, chunk_size):
+            session.execute(statement, rows)
+
+    def _update_all(self, session: Session, filters: Where, params: TDocument) -> int:
+        return affected_count(session.execute(update_documents(self.orm_model, filters, params)))
+
+    def _delete_all(self, session: Session, filters: Where) -> int:
+        return affected_count(session.execute(delete_documents(self.orm_model, filters)))
+
+    def _first(self, session: Session, filters: Where) -> Any:
+        return session.execute(select_one(self.orm_model, filters)).scalars().first()
+
+    async def find(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[TDocument]:
+        statement = select_documents(
+            self.orm_model, filters, sort, limit, cursor, projection
+        )
+        with self.db.get_read_session() as session:
+            return documents_from_result(session.execute(statement), projection)
+
+    async def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        statement = select_documents(
+            self.orm_model, filters, sort=sort, projection=projection
+        ).execution_options(yield_per=batch_size)
+
+        with self.db.get_read_session() as session:
+            for rows in session.execute(statement).partitions():
+                for document in documents_from_rows(rows, projection):
+                    yield document
+                await asyncio.sleep(0)  # let other requests run between batches
 
     async def find_one(self, filters: Where) -> Optional[TDocument]:
-        with self.db.get_session() as session:
-            return session.query(self.orm_model).filter_by(**filters).first() 
+        with self.db.get_read_session() as session:
+            return self._first(session, filters)
 
     async def insert_one(self, document: TDocument) -> InsertResult:
         with self.db.get_session() as session:
             orm_obj = self.orm_model(**document.__dict__)
             session.add(orm_obj)
             session.commit()
+            self.db.record_write()
             return InsertResult(acknowledged=True)
 
     async def update_one(
@@ -138,13 +283,12 @@ class PostgresTableCollection(DocumentCollection[TDocument]):
     upsert: bool = False,
 ) -> UpdateResult[TDocument]:
      with self.db.get_session() as session:
-        obj = session.query(self.orm_model).filter_by(**filters).first()
+        obj = self._first(session, filters)
         
         if obj:
-            for k, v in params.items():
-                if hasattr(obj, k):
-                    setattr(obj, k, v)
+            apply_update(obj, params)
             session.commit()
+            self.db.record_write()
 
             # Detach so it's safe to return
             session.refresh(obj)
@@ -153,9 +297,10 @@ class PostgresTableCollection(DocumentCollection[TDocument]):
             return UpdateResult(True, 1, 1, obj)
 
         elif upsert:
-            new_obj = self.orm_model(**params)
+            new_obj = new_document(self.orm_model, params)
             session.add(new_obj)
             session.commit()
+            self.db.record_write()
 
             session.refresh(new_obj)
             session.expunge(new_obj)
@@ -167,9 +312,86 @@ class PostgresTableCollection(DocumentCollection[TDocument]):
 
     async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
         with self.db.get_session() as session:
-            obj = session.query(self.orm_model).filter_by(**filters).first() 
+            obj = self._first(session, filters)
             if obj:
                 session.delete(obj)
                 session.commit()
+                self.db.record_write()
                 return DeleteResult(True, 1, obj)
             return DeleteResult(True, 0, None)
+
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        with self.db.get_session() as session:
+            self._insert_chunks(session, documents, chunk_size)
+            session.commit()
+
+        if documents:
+            self.db.record_write()
+        return InsertManyResult(acknowledged=True, inserted_count=len(documents))
+
+    async def update_many(self, filters: Where, params: dict) -> UpdateManyResult:
+        with self.db.get_session() as session:
+            count = self._update_all(session, filters, params)
+            session.commit()
+
+        self.db.record_write()
+        return UpdateManyResult(acknowledged=True, matched_count=count, modified_count=count)
+
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        with self.db.get_session() as session:
+            count = self._delete_all(session, filters)
+            session.commit()
+
+        self.db.record_write()
+        return DeleteManyResult(acknowledged=True, deleted_count=count)
+
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        inserted = matched = modified = upserted = deleted = 0
+
+        with self.db.get_session() as session:
+            for operation in batch_inserts(operations):
+                if isinstance(operation, list):
+                    self._insert_chunks(session, operation, chunk_size)
+                    inserted += len(operation)
+                elif isinstance(operation, UpdateOne):
+                    obj = self._first(session, operation.filters)
+                    if obj:
+                        apply_update(obj, operation.params)
+                        matched += 1
+                        modified += 1
+                    elif operation.upsert:
+                        session.add(new_document(self.orm_model, operation.params))
+                        upserted += 1
+                elif isinstance(operation, UpdateMany):
+                    count = self._update_all(session, operation.filters, operation.params)
+                    matched += count
+                    modified += count
+                elif isinstance(operation, DeleteOne):
+                    obj = self._first(session, operation.filters)
+                    if obj:
+                        session.delete(obj)
+                        deleted += 1
+                elif isinstance(operation, DeleteMany):
+                    deleted += self._delete_all(session, operation.filters)
+
+            session.commit()
+
+        if operations:
+            self.db.record_write()
+
+        return BulkWriteResult(
+            acknowledged=True,
+            inserted_count=inserted,
+            matched_count=matched,
+            modified_count=modified,
+            upserted_count=upserted,
+            deleted_count=deleted,
+        )
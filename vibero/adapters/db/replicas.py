@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Generic, Literal, Optional, Sequence, TypeVar
+
+from dotenv import load_dotenv
+
+from vibero.adapters.db.pool import pool_status
+
+ReplicaSelection = Literal["round_robin", "least_loaded"]
+
+TEngine = TypeVar("TEngine")
+
+
+def replica_urls_from_env() -> list[str]:
+    """The comma-separated DATABASE_REPLICA_URLS, if any."""
+    load_dotenv()  # like DATABASE_URL, may be set in .env
+    return [
+        url.strip()
+        for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+
+
+class ReadRouter(Generic[TEngine]):
+    """Chooses the engine for each database call: writes go to the primary,
+    reads to one of the replicas, either in turn (round_robin) or to the one
+    with the fewest connections checked out (least_loaded).
+
+    Replicas lag behind the primary, so for read_your_writes_window seconds
+    after a write, reads by the same writer go to the primary. Writers are told
+    apart by consistency_key (e.g. the session token of the current request, or
+    the client's address); writes without a key, made outside of any request,
+    aren't tracked.
+
+    The recent writes are only known to this process: with several server
+    processes behind a load balancer, a client only reads its writes if its
+    requests stick to one process (e.g. by session affinity) for the window.
+    """
+
+    def __init__(
+        self,
+        primary: TEngine,
+        replicas: Sequence[TEngine] = (),
+        selection: ReplicaSelection = "round_robin",
+        read_your_writes_window: float = 2.0,
+        consistency_key: Optional[Callable[[], Optional[str]]] = None,
+        max_writers: int = 10_000,
+    ) -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._selection = selection
+        self._read_your_writes_window = read_your_writes_window
+        self._consistency_key = consistency_key or (lambda: None)
+        self._max_writers = max_writers
+
+        self._next_replica = itertools.cycle(range(len(self.replicas)))
+        self._last_writes = OrderedDict[str, float]()
+        self._lock = threading.Lock()
+
+    def for_read(self) -> TEngine:
+        if self.reads_from_primary():
+            return self.primary
+
+        if self._selection == "least_loaded":
+            return min(self.replicas, key=_checked_out)
+
+        with self._lock:
+            return self.replicas[next(self._next_replica)]
+
+    def reads_from_primary(self) -> bool:
+        """Whether the current caller's reads go to the primary."""
+        if not self.replicas:
+            return True
+
+        key = self._consistency_key()
+        return key is not None and self._wrote_recently(key)
+
+    def record_write(self) -> None:
+        if not self.replicas:
+            return
+
+        key = self._consistency_key()
+        if key is None:
+            return
+
+        with self._lock:
+            self._last_writes[key] = time.monotonic()
+            self._last_writes.move_to_end(key)
+            if len(self._last_writes) > self._max_writers:
+                self._last_writes.popitem(last=False)
+
+    def _wrote_recently(self, key: str) -> bool:
+        with self._lock:
+            last_write = self._last_writes.get(key)
+            if last_write is None:
+                return False
+            if time.monotonic() - last_write < self._read_your_writes_window:
+                return True
+            del self._last_writes[key]
+            return False
+
+
+def _checked_out(engine: Any) -> int:
+    # Engine and AsyncEngine both expose their pool
+    return pool_status(engine.pool).checked_out
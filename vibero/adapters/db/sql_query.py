@@ -0,0 +1,172 @@
+from typing import Any, Iterator, Mapping, Optional, Sequence, Union
+from sqlalchemy import (
+    CursorResult,
+    Delete,
+    Insert,
+    Result,
+    Row,
+    Select,
+    Update,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+
+from vibero.adapters.db.sql_where import model_column, where_to_sql
+from vibero.core.persistence.common import (
+    FieldName,
+    Sort,
+    Where,
+    document_fields,
+    keyset_filter,
+    keyset_sort,
+    projection_with_sort_keys,
+)
+from vibero.core.persistence.document_database import InsertOne, WriteOperation
+
+
+def select_documents(
+    orm_model: type[Any],
+    filters: Where,
+    sort: Optional[Sort] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[Sequence[FieldName]] = None,
+) -> Select[Any]:
+    """Builds the statement behind DocumentCollection.find(), pushing filtering,
+    keyset pagination, ordering, limiting and projection down into the database."""
+    if cursor:
+        filters = {"$and": [filters, keyset_filter(cursor, sort)]}
+
+    if projection is not None:
+        statement = select(
+            *(
+                _attribute(orm_model, field_name)
+                for field_name in projection_with_sort_keys(projection, sort)
+            )
+        )
+    else:
+        statement = select(orm_model)
+
+    statement = statement.where(where_to_sql(orm_model, filters))
+
+    if sort or limit is not None or cursor:
+        statement = statement.order_by(
+            *(
+                (
+                    _attribute(orm_model, field_name).desc()
+                    if direction == "desc"
+                    else _attribute(orm_model, field_name).asc()
+                )
+                for field_name, direction in keyset_sort(sort)
+            )
+        )
+
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return statement
+
+
+def select_one(orm_model: type[Any], filters: Where) -> Select[Any]:
+    return select(orm_model).where(where_to_sql(orm_model, filters)).limit(1)
+
+
+def insert_statements(
+    orm_model: type[Any],
+    documents: Sequence[Any],
+    chunk_size: int,
+) -> Iterator[tuple[Insert, list[dict[str, Any]]]]:
+    """Builds the statements behind DocumentCollection.insert_many(): one
+    executemany (batched into multi-row INSERTs by the driver) per chunk, rather
+    than a statement per document."""
+    statement = insert(orm_model)
+    for i in range(0, len(documents), chunk_size):
+        yield statement, [
+            dict(document_fields(d)) for d in documents[i : i + chunk_size]
+        ]
+
+
+def model_values(orm_model: type[Any], params: Any) -> dict[str, Any]:
+    """The fields of the params that the model has, the only ones updates set."""
+    return {k: v for k, v in document_fields(params).items() if hasattr(orm_model, k)}
+
+
+def apply_update(obj: Any, params: Any) -> None:
+    for k, v in model_values(type(obj), params).items():
+        setattr(obj, k, v)
+
+
+def new_document(orm_model: type[Any], params: Any) -> Any:
+    """The ORM instance an upsert adds when nothing matches."""
+    return orm_model(**model_values(orm_model, params))
+
+
+def update_documents(
+    orm_model: type[Any],
+    filters: Where,
+    params: Mapping[str, Any],
+) -> Union[Update, Select[Any]]:
+    """Builds the statement behind DocumentCollection.update_many(). With no
+    field to set, it counts the matches instead, which are still reported (see
+    affected_count())."""
+    condition = where_to_sql(orm_model, filters)
+    if values := model_values(orm_model, params):
+        return update(orm_model).where(condition).values(values)
+    return select(func.count()).select_from(orm_model).where(condition)
+
+
+def delete_documents(orm_model: type[Any], filters: Where) -> Delete:
+    return delete(orm_model).where(where_to_sql(orm_model, filters))
+
+
+def affected_count(result: Result[Any]) -> int:
+    """The number of documents matched by an update_documents() or
+    delete_documents() statement."""
+    if isinstance(result, CursorResult) and not result.returns_rows:
+        return result.rowcount
+    return int(result.scalar_one())  # the count of matches, if nothing was set
+
+
+def batch_inserts(
+    operations: Sequence[WriteOperation[Any]],
+) -> Iterator[Union[list[Any], WriteOperation[Any]]]:
+    """The operations of a bulk write in order, with each run of consecutive
+    inserts as one list of documents, so that they can be sent together."""
+    pending_inserts: list[Any] = []
+    for operation in operations:
+        if isinstance(operation, InsertOne):
+            pending_inserts.append(operation.document)
+            continue
+
+        if pending_inserts:
+            yield pending_inserts
+            pending_inserts = []
+        yield operation
+
+    if pending_inserts:
+        yield pending_inserts
+
+
+def documents_from_result(
+    result: Result[Any],
+    projection: Optional[Sequence[FieldName]] = None,
+) -> Sequence[Any]:
+    if projection is not None:
+        return [dict(row._mapping) for row in result]
+    return result.scalars().all()
+
+
+def documents_from_rows(
+    rows: Sequence[Row[Any]],
+    projection: Optional[Sequence[FieldName]] = None,
+) -> Sequence[Any]:
+    if projection is not None:
+        return [dict(row._mapping) for row in rows]
+    return [row[0] for row in rows]
+
+
+def _attribute(orm_model: type[Any], field_name: FieldName) -> Any:
+    return getattr(orm_model, model_column(orm_model, field_name).key)
@@ -0,0 +1,97 @@
+from typing import Any, Callable, Mapping, cast
+from sqlalchemy import Column, and_, false, or_, true
+from sqlalchemy.sql.elements import ColumnElement
+
+from vibero.core.persistence.common import LiteralValue, Where
+
+_COMPARISONS: dict[str, Callable[[Any, Any], ColumnElement[bool]]] = {
+    "$eq": lambda column, value: column == value,
+    "$ne": lambda column, value: column != value,
+    "$gt": lambda column, value: column > value,
+    "$gte": lambda column, value: column >= value,
+    "$lt": lambda column, value: column < value,
+    "$lte": lambda column, value: column <= value,
+    "$in": lambda column, values: column.in_(values),
+    "$nin": lambda column, values: column.not_in(values),
+}
+
+# SQL's three-valued logic drops NULL rows from negative comparisons, whereas
+# matches_filters() treats None as just another value that differs from the operand.
+_NEGATIVE_OPERATORS = ("$ne", "$nin")
+
+
+def where_to_sql(orm_model: type[Any], where: Where) -> ColumnElement[bool]:
+    """Translates the query grammar of vibero.core.persistence.common into a
+    SQLAlchemy boolean expression over the columns of the given ORM model,
+    so that filtering runs inside the database (and can use its indexes).
+
+    For compatibility with the former filter_by() behavior, a bare literal in
+    place of an operator mapping is treated as {"$eq": literal}.
+    """
+    if not where:
+        return true()
+
+    clauses: list[ColumnElement[bool]] = []
+
+    for key, value in where.items():
+        if key == "$and":
+            clauses.append(
+                _conjunction(
+                    [where_to_sql(orm_model, sub) for sub in cast(list[Where], value)]
+                )
+            )
+        elif key == "$or":
+            operands = [
+                where_to_sql(orm_model, sub) for sub in cast(list[Where], value)
+            ]
+            clauses.append(or_(*operands) if operands else false())
+        else:
+            clauses.append(_field_to_sql(orm_model, key, value))
+
+    return _conjunction(clauses)
+
+
+def model_column(orm_model: type[Any], field_name: str) -> Column[Any]:
+    column = orm_model.__table__.columns.get(field_name)
+    if column is None:
+        raise ValueError(
+            f"Unknown field '{field_name}' for '{orm_model.__tablename__}'"
+        )
+    return column
+
+
+def _field_to_sql(
+    orm_model: type[Any],
+    field_name: str,
+    field_filter: Any,
+) -> ColumnElement[bool]:
+    column = model_column(orm_model, field_name)
+    attribute = getattr(orm_model, column.key)
+
+    if not isinstance(field_filter, Mapping):
+        field_filter = {"$eq": field_filter}
+
+    clauses: list[ColumnElement[bool]] = []
+
+    for operator, filter_value in cast(
+        Mapping[str, LiteralValue], field_filter
+    ).items():
+        if operator not in _COMPARISONS:
+            raise ValueError(f"Unsupported filter operator '{operator}'")
+
+        clause = _COMPARISONS[operator](attribute, filter_value)
+
+        if operator in _NEGATIVE_OPERATORS and column.nullable:
+            clause = or_(clause, attribute.is_(None))
+
+        clauses.append(clause)
+
+    return _conjunction(clauses)
+
+
+def _conjunction(clauses: list[ColumnElement[bool]]) -> ColumnElement[bool]:
+    if not clauses:
+        return true()
+    if len(clauses) == 1:
+        return clauses[0]
+    return and_(*clauses)
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Sequence
+
+from vibero.core.authentication import Authenticator
+from vibero.core.common import DefaultBaseModel, admin_user_role
+from vibero.core.persistence.instrumentation import QueryStats
+from vibero.core.users import User
+
+
+class QueryShapeStatsDTO(DefaultBaseModel):
+    collection: str
+    operation: str
+    shape: str
+    calls: int
+    rows: int
+    total_duration: float
+    mean_duration: float
+    max_duration: float
+    slow_calls: int
+
+
+def create_router(query_stats: QueryStats, authenticator: Authenticator) -> APIRouter:
+    async def require_admin(
+        user: Annotated[User, Depends(authenticator.current_user)],
+    ) -> None:
+        # Signup is open, so being signed in isn't enough to look at (or wipe)
+        # operational data
+        if user.role != admin_user_role():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin role required",
+            )
+
+    router = APIRouter(dependencies=[Depends(require_admin)])
+
+    @router.get(
+        "/query-stats",
+        response_model=Sequence[QueryShapeStatsDTO],
+    )
+    async def read_query_stats() -> Sequence[QueryShapeStatsDTO]:
+        """Per collection, operation and query shape (the filter with its values
+        replaced by "?"), the most time-consuming first."""
+        return [
+            QueryShapeStatsDTO(
+                collection=s.collection,
+                operation=s.operation,
+                shape=s.shape,
+                calls=s.calls,
+                rows=s.rows,
+                total_duration=s.total_duration,
+                mean_duration=s.mean_duration,
+                max_duration=s.max_duration,
+                slow_calls=s.slow_calls,
+            )
+            for s in query_stats.snapshot()
+        ]
+
+    @router.delete(
+        "/query-stats",
+        status_code=status.HTTP_204_NO_CONTENT,
+    )
+    async def reset_query_stats() -> None:
+        query_stats.reset()
+
+    return router
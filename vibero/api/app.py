@@ -1,15 +1,27 @@
 from fastapi import APIRouter, FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import PlainTextResponse
 import os
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 from typing import Callable, Awaitable, TypeAlias
 from starlette.types import Receive, Scope, Send
+import time
 import uuid
 from lagom import Container
+from vibero.core.authentication import AuthenticationError, Authenticator
 from vibero.core.common import generate_id, ItemNotFoundError
 from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.health import DatabaseHealthCheck
 from vibero.core.loggers import Logger
-from vibero.api import user_games_store, users
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.tracing import Tracer
+from vibero.core.password_hasher import PasswordHasher, PasswordHasherOverloadedError
+from vibero.api import admin, health, user_games_store, users
+from vibero.api.common import NEXT_CURSOR_HEADER
+from vibero.api.compression import CompressionConfig, CompressionMiddleware
+from vibero.core.persistence.common import InvalidCursorError
+from vibero.core.persistence.instrumentation import QueryStats
+from vibero.core.session_cache import SessionCache
 from vibero.core.users import UserStore
 from vibero.core.user_games_store import UserGameRepoStore
 
@@ -30,14 +42,47 @@ class AppWrapper:
             pass
 
 
+def _route_template(scope: Scope) -> str:
+    """The matched route's path template (e.g. /store/{username}/games), which
+    unlike the path keeps the number of metric series bounded."""
+    if (route := scope.get("route")) is None:
+        return "<unmatched>"
+
+    # Newer FastAPI versions keep included routes unprefixed, and expose the
+    # full path of the matched route separately
+    if effective_route := scope.get("fastapi", {}).get("effective_route_context"):
+        return str(effective_route.path)
+    return str(route.path)
+
+
 async def create_api_app(container: Container) -> ASGIApplication:
     correlator = container[ContextualCorrelator]
     logger = container[Logger]
     user_store = container[UserStore]
     user_game_repository = container[UserGameRepoStore]
+    password_hasher = container[PasswordHasher]
+    session_cache = container[SessionCache]
+    authenticator = container[Authenticator]
+    metrics = container[MetricsRegistry]
+    tracer = container[Tracer]
+    query_stats = container[QueryStats]
+    database_health_check = container[DatabaseHealthCheck]
+    compression_config = container[CompressionConfig]
+
+    http_request_durations = metrics.histogram(
+        "http_request_duration_seconds",
+        "Duration of HTTP requests, by route template",
+        ["method", "route", "status"],
+    )
 
     api_app = FastAPI()
 
+    # Added first, hence innermost, so that request durations and traces
+    # include the time spent compressing
+    api_app.add_middleware(
+        CompressionMiddleware, config=compression_config, metrics=metrics
+    )
+
     @api_app.middleware("http")
     async def handle_cancellation(
         request: Request,
@@ -54,8 +99,27 @@ async def create_api_app(container: Container) -> ASGIApplication:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
+    @api_app.middleware("http")
+    async def trace_request(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        with tracer.span(
+            f"HTTP {request.method}",
+            {"http.method": request.method, "http.target": request.url.path},
+            kind="server",
+        ) as request_span:
+            response = await call_next(request)
+
+            if request_span:
+                request_span.set_attribute("http.route", _route_template(request.scope))
+                request_span.set_attribute("http.status_code", response.status_code)
+
+            return response
+
     @api_app.middleware("http")
     async def add_correlation_id(
         request: Request,
@@ -66,9 +130,54 @@ async def create_api_app(container: Container) -> ASGIApplication:
 
         request_id = generate_id()
         with correlator.correlation_scope(f"RID({request_id})"):
-            with logger.operation(f"HTTP Request: {request.method} {request.url.path}"):
+            # The path goes in the props, keeping the operation name (and hence
+            # its timing metric) to one per method. Requests are sampled per
+            # route though, so that rare routes aren't drowned out by busy ones
+            with logger.operation(
+                f"HTTP Request: {request.method}",
+                {"path": request.url.path},
+                sample_key=lambda: f"{request.method} {_route_template(request.scope)}",
+            ):
                 return await call_next(request)
 
+    @api_app.middleware("http")
+    async def record_request_duration(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        t_start = time.perf_counter()
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            http_request_durations.observe(
+                time.perf_counter() - t_start,
+                method=request.method,
+                route=_route_template(request.scope),
+                status=str(status_code),
+            )
+
+    @api_app.get("/metrics", include_in_schema=False)
+    async def read_metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            metrics.render_prometheus(),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    @api_app.middleware("http")
+    async def authenticate(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        # The session is resolved lazily, by the routes that depend on it
+        with authenticator.authentication_scope(
+            request.cookies.get("session"),
+            request.client.host if request.client else None,
+        ):
+            return await call_next(request)
+
     @api_app.exception_handler(ItemNotFoundError)
     async def item_not_found_error_handler(
         request: Request, exc: ItemNotFoundError
@@ -80,13 +189,51 @@ async def create_api_app(container: Container) -> ASGIApplication:
             detail=str(exc),
         )
 
+    @api_app.exception_handler(InvalidCursorError)
+    async def invalid_cursor_error_handler(
+        request: Request, exc: InvalidCursorError
+    ) -> HTTPException:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        )
+
+    @api_app.exception_handler(AuthenticationError)
+    async def authentication_error_handler(
+        request: Request, exc: AuthenticationError
+    ) -> HTTPException:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+        )
+
+    @api_app.exception_handler(PasswordHasherOverloadedError)
+    async def password_hasher_overloaded_error_handler(
+        request: Request, exc: PasswordHasherOverloadedError
+    ) -> HTTPException:
+        logger.warning(
+            f"{exc}: {password_hasher.stats()}",
+            rate_limit_key="Password hasher overloaded",
+        )
+
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        )
+
     # USERS - all user-related functionality is grouped under /users
     # Includes: create user, login, session, update/delete profile, etc.
     users_router = APIRouter()
     users_router.include_router(
         prefix="/users",  # URL prefix for all user routes
         tags=["users"],  # Tag used in Swagger/OpenAPI docs
-        router=users.create_router(user_store=user_store),  # User API logic
+        router=users.create_router(  # User API logic
+            user_store=user_store,
+            password_hasher=password_hasher,
+            session_cache=session_cache,
+            authenticator=authenticator,
+        ),
     )
     api_app.include_router(users_router)
 
@@ -97,9 +244,26 @@ async def create_api_app(container: Container) -> ASGIApplication:
         prefix="/store",  # Public-facing store path
         tags=["store"],  # Tag for grouping in docs
         router=user_games_store.create_router(  # Game listing logic
-            game_repository=user_game_repository
+            game_repository=user_game_repository,
         ),
     )
     api_app.include_router(user_store_router)
 
+    # ADMIN - operational introspection, under /admin
+    api_app.include_router(
+        prefix="/admin",
+        tags=["admin"],
+        router=admin.create_router(
+            query_stats=query_stats,
+            authenticator=authenticator,
+        ),
+    )
+
+    # HEALTH - dependency checks for load balancers and monitoring, under /health
+    api_app.include_router(
+        prefix="/health",
+        tags=["health"],
+        router=health.create_router(database_health_check=database_health_check),
+    )
+
     return AppWrapper(api_app)
@@ -0,0 +1,225 @@
+from fastapi import HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+import hashlib
+import orjson
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Literal,
+    Optional,
+    Sequence,
+    TypeAlias,
+)
+
+from vibero.core.persistence.common import (
+    FieldName,
+    Sort,
+    document_fields,
+    encode_cursor,
+)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+SortQuery: TypeAlias = Annotated[
+    Optional[str],
+    Query(
+        description="Comma-separated fields to sort by; prefix a field with '-' "
+        "to sort it in descending order",
+        examples=["-created_at,title"],
+    ),
+]
+
+LimitQuery: TypeAlias = Annotated[
+    Optional[int],
+    Query(
+        description="Maximum number of items to return",
+        ge=1,
+        le=1000,
+    ),
+]
+
+CursorQuery: TypeAlias = Annotated[
+    Optional[str],
+    Query(
+        description=f"Opaque cursor returned in the {NEXT_CURSOR_HEADER} header of "
+        "the previous page, with the same sort",
+    ),
+]
+
+FieldsQuery: TypeAlias = Annotated[
+    Optional[str],
+    Query(
+        description="Comma-separated fields to include in each item",
+        examples=["id,title"],
+    ),
+]
+
+StreamQuery: TypeAlias = Annotated[
+    Optional[Literal["ndjson", "json"]],
+    Query(
+        description="Stream all matching items instead of returning a single page, "
+        "either as newline-delimited JSON objects (ndjson) or as a JSON array (json)",
+    ),
+]
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+STREAM_BATCH_SIZE = 500
+
+
+def parse_sort(value: Optional[str], allowed: Sequence[FieldName]) -> Optional[Sort]:
+    if not value:
+        return None
+
+    sort: list[tuple[FieldName, Any]] = []
+
+    for item in value.split(","):
+        field_name = item.strip().removeprefix("-")
+        if field_name not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Cannot sort by '{field_name}'",
+            )
+        sort.append((field_name, "desc" if item.strip().startswith("-") else "asc"))
+
+    return sort
+
+
+def parse_fields(
+    value: Optional[str],
+    allowed: Sequence[FieldName],
+) -> Optional[list[FieldName]]:
+    if not value:
+        return None
+
+    fields = [item.strip() for item in value.split(",")]
+
+    if unknown := [f for f in fields if f not in allowed]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {unknown}",
+        )
+
+    return fields
+
+
+def pagination_headers(
+    documents: Sequence[Any],
+    sort: Optional[Sort],
+    limit: Optional[int],
+) -> dict[str, str]:
+    if limit is not None and documents and len(documents) == limit:
+        return {NEXT_CURSOR_HEADER: encode_cursor(documents[-1], sort)}
+    return {}
+
+
+def _select_fields(document: Any, fields: Sequence[FieldName]) -> dict[str, Any]:
+    values = document_fields(document)
+    return {f: values[f] for f in fields}
+
+
+def document_response(
+    document: Any,
+    fields: Sequence[FieldName],
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Renders the given fields of a document straight to JSON.
+
+    Documents come from the stores, whose schema the DTOs mirror, so no DTO is
+    built or validated along the way; the DTO remains the documented
+    response_model. Only the listed fields are ever rendered.
+    """
+    return Response(
+        content=orjson.dumps(_select_fields(document, fields)),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def documents_response(
+    documents: Sequence[Any],
+    fields: Sequence[FieldName],
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Like document_response(), for a list of documents."""
+    return Response(
+        content=orjson.dumps([_select_fields(d, fields) for d in documents]),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def ensure_streamable(limit: Optional[int], cursor: Optional[str]) -> None:
+    if limit is not None or cursor is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="limit and cursor cannot be used when streaming",
+        )
+
+
+def streaming_response(
+    documents: AsyncIterator[Any],
+    fields: Sequence[FieldName],
+    framing: Literal["ndjson", "json"],
+) -> StreamingResponse:
+    """Renders documents as they are fetched, sending one chunk per batch of
+    STREAM_BATCH_SIZE items, so the full result set is never held in memory."""
+
+    async def chunks() -> AsyncIterator[str]:
+        batch: list[str] = ["["] if framing == "json" else []
+        count = 0
+
+        async for document in documents:
+            item = orjson.dumps(_select_fields(document, fields)).decode()
+
+            if framing == "ndjson":
+                batch.append(item + "\n")
+            else:
+                batch.append(item if count == 0 else "," + item)
+
+            count += 1
+            if count % STREAM_BATCH_SIZE == 0:
+                yield "".join(batch)
+                batch = []
+
+        if framing == "json":
+            batch.append("]")
+
+        if batch:
+            yield "".join(batch)
+
+    return StreamingResponse(chunks(), media_type=STREAM_MEDIA_TYPES[framing])
+
+
+def content_etag(body: bytes) -> str:
+    # Weak, since the bytes sent may still differ, e.g. by their encoding
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    cache_control: str,
+) -> Response:
+    """Validates the response by an ETag derived from its body, and returns a
+    304 instead if it matches the request's If-None-Match (RFC 9110).
+
+    Deriving the ETag from the content rather than tracking versions keeps it
+    right whoever changed the data, and in whichever server process; the
+    response still has to be rendered, but is not sent again.
+    """
+    etag = content_etag(bytes(response.body))
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if if_none_match := request.headers.get("if-none-match"):
+        # Weak comparison, since the ETags are weak
+        etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in etags or etag.removeprefix("W/") in etags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return response
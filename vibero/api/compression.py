@@ -0,0 +1,310 @@
+from dataclasses import dataclass
+import hashlib
+from typing import Callable, Optional, Protocol
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from vibero.core.cache import LocalCache
+from vibero.core.metrics import MetricsRegistry
+
+try:
+    import brotli
+except ImportError:  # the "compression" extra
+    brotli = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # the "compression" extra
+    zstandard = None  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class CompressionConfig:
+    """Settings of CompressionMiddleware.
+
+    Bodies smaller than minimum_size bytes are sent as-is, since compressing
+    them saves less than it costs. Each encoding has its own level scale:
+    gzip 1-9, brotli 0-11 and zstd 1-22; higher levels compress better but
+    slower. Up to cache_size compressed bodies of cacheable responses are kept
+    for cache_ttl seconds, keyed by a hash of the uncompressed body.
+    """
+
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    zstd_level: int = 3
+    cache_size: int = 1024
+    cache_ttl: float = 300.0
+
+
+class _Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Returns all data compressed so far, so that it can be sent."""
+        ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # wbits=31 writes a gzip header, with no timestamp so that bodies of the
+        # same content are identical
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def available_encodings(
+    config: CompressionConfig,
+) -> dict[str, Callable[[], _Compressor]]:
+    """The encodings this server can produce, most preferred first."""
+    encodings: dict[str, Callable[[], _Compressor]] = {}
+    if zstandard:
+        encodings["zstd"] = lambda: _ZstdCompressor(config.zstd_level)
+    if brotli:
+        encodings["br"] = lambda: _BrotliCompressor(config.brotli_quality)
+    encodings["gzip"] = lambda: _GzipCompressor(config.gzip_level)
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, encodings: list[str]) -> Optional[str]:
+    """The encoding to use given an Accept-Encoding header: the one with the
+    highest q-value, ties going to the earliest in encodings. None if the client
+    accepts none of them."""
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        param, _, value = params.strip().partition("=")
+        if param.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    ranked = [
+        (quality, -i, encoding)
+        for i, encoding in enumerate(encodings)
+        if (quality := qualities.get(encoding, qualities.get("*", 0.0))) > 0
+    ]
+    return max(ranked)[2] if ranked else None
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in ("application/json", "application/x-ndjson")
+        or media_type.endswith("+json")
+    )
+
+
+def _is_cacheable(headers: Headers) -> bool:
+    # Responses with a validator are the ones expected to be requested again
+    return (
+        "etag" in headers and "no-store" not in headers.get("cache-control", "").lower()
+    )
+
+
+class CompressionMiddleware:
+    """Compresses text and JSON responses with the best encoding the client
+    accepts: zstd or br when the "compression" extra is installed, gzip
+    otherwise.
+
+    Streamed responses are compressed as they go, flushing after each chunk so
+    that clients still receive every batch as soon as it is sent. The
+    compressed bodies of responses with an ETag are kept by a hash of their
+    content, so that e.g. a popular storefront is only compressed once for as
+    long as it doesn't change.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: CompressionConfig = CompressionConfig(),
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self._app = app
+        self._config = config
+        self._encodings = available_encodings(config)
+        self._cache = LocalCache(config.cache_size, config.cache_ttl)
+        self._responses = (
+            metrics.counter(
+                "http_compressed_responses_total",
+                "Compressed HTTP responses by encoding, and whether the body "
+                "was compressed, reused from the cache or streamed",
+                ["encoding", "source"],
+            )
+            if metrics
+            else None
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), list(self._encodings)
+        )
+        responder = _CompressingResponder(self, scope, encoding, send)
+        await self._app(scope, receive, responder.send)
+
+    def _count(self, encoding: str, source: str) -> None:
+        if self._responses:
+            self._responses.inc(encoding=encoding, source=source)
+
+
+class _CompressingResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        encoding: Optional[str],
+        send: Send,
+    ) -> None:
+        self._middleware = middleware
+        self._scope = scope
+        self._encoding = encoding
+        self._send = send
+
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type", ""))
+                or message["status"] in (204, 304)
+            ):
+                self._passthrough = True
+                await self._send(message)
+                return
+
+            # Caches must keep compressed and uncompressed bodies apart, whether
+            # or not this one ends up compressed
+            headers.add_vary_header("Accept-Encoding")
+            if self._encoding is None:
+                self._passthrough = True
+                await self._send(message)
+                return
+
+            # Held back until the body shows whether compression is worthwhile
+            self._start = message
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        assert self._encoding is not None
+
+        if self._compressor is not None:
+            await self._send_chunk(body, more_body)
+        elif more_body:
+            self._compressor = self._middleware._encodings[self._encoding]()
+            headers = self._start_headers()
+            del headers["content-length"]
+            headers["content-encoding"] = self._encoding
+            await self._send(self._pop_start())
+            self._middleware._count(self._encoding, "stream")
+            await self._send_chunk(body, more_body)
+        elif len(body) < self._middleware._config.minimum_size:
+            await self._send(self._pop_start())
+            await self._send(message)
+        else:
+            compressed = self._compress_body(body)
+            headers = self._start_headers()
+            headers["content-encoding"] = self._encoding
+            headers["content-length"] = str(len(compressed))
+            await self._send(self._pop_start())
+            await self._send(
+                {"type": "http.response.body", "body": compressed, "more_body": False}
+            )
+
+    def _compress_body(self, body: bytes) -> bytes:
+        assert self._encoding is not None
+        headers = self._start_headers()
+
+        cache_key = None
+        if _is_cacheable(headers):
+            # Keyed by the body itself, since an ETag needn't change with it
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            cache_key = f"{self._encoding} {len(body)} {digest}"
+            if (compressed := self._middleware._cache.get(cache_key)) is not None:
+                self._middleware._count(self._encoding, "cached")
+                return compressed
+
+        compressor = self._middleware._encodings[self._encoding]()
+        compressed = compressor.compress(body) + compressor.finish()
+        self._middleware._count(self._encoding, "compressed")
+
+        if cache_key:
+            self._middleware._cache.put(cache_key, compressed)
+        return compressed
+
+    async def _send_chunk(self, body: bytes, more_body: bool) -> None:
+        assert self._compressor is not None
+        chunk = self._compressor.compress(body)
+        chunk += self._compressor.flush() if more_body else self._compressor.finish()
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+
+    def _start_headers(self) -> MutableHeaders:
+        assert self._start is not None
+        return MutableHeaders(raw=self._start["headers"])
+
+    def _pop_start(self) -> Message:
+        assert self._start is not None
+        start, self._start = self._start, None
+        return start
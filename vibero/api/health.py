@@ -0,0 +1,67 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from typing import Mapping, Optional
+
+from vibero.core.common import DefaultBaseModel
+from vibero.core.health import DatabaseHealthCheck
+
+
+class PoolStatusDTO(DefaultBaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    utilization: float
+
+
+class DatabaseHealthDTO(DefaultBaseModel):
+    healthy: bool
+    latency: Optional[float]
+    pools: Mapping[str, PoolStatusDTO]
+    error: Optional[str] = None
+
+
+def create_router(database_health_check: DatabaseHealthCheck) -> APIRouter:
+    router = APIRouter()
+
+    @router.get(
+        "/db",
+        response_model=DatabaseHealthDTO,
+        responses={
+            status.HTTP_503_SERVICE_UNAVAILABLE: {"model": DatabaseHealthDTO},
+        },
+    )
+    async def read_database_health() -> JSONResponse:
+        """Pings the database and reports the state of its connection pools.
+        Responds with 503 when the database cannot be reached."""
+        health = await database_health_check.check_health()
+
+        dto = DatabaseHealthDTO(
+            healthy=health.healthy,
+            latency=health.latency,
+            pools={
+                name: PoolStatusDTO(
+                    size=pool.size,
+                    max_overflow=pool.max_overflow,
+                    checked_out=pool.checked_out,
+                    idle=pool.idle,
+                    overflow=pool.overflow,
+                    utilization=pool.utilization,
+                )
+                for name, pool in health.pools.items()
+            },
+            error=health.error,
+        )
+
+        return JSONResponse(
+            content=jsonable_encoder(dto),
+            status_code=(
+                status.HTTP_200_OK
+                if health.healthy
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+        )
+
+    return router
@@ -1,8 +1,26 @@
-from fastapi import APIRouter, Path, HTTPException
+from fastapi import APIRouter, Path, HTTPException, Request, Response
 from typing import Annotated, Sequence
+from vibero.api.common import (
+    CursorQuery,
+    FieldsQuery,
+    LimitQuery,
+    SortQuery,
+    StreamQuery,
+    conditional_response,
+    ensure_streamable,
+    documents_response,
+    pagination_headers,
+    parse_fields,
+    parse_sort,
+    streaming_response,
+)
 from vibero.core.user_games_store import UserGameRepoStore, Game  # ✅ renamed import
 from vibero.core.common import DefaultBaseModel
 
+# A storefront looks the same to every visitor, so shared caches (e.g. a CDN)
+# may serve it briefly, and keep serving it while revalidating in the background
+STOREFRONT_CACHE_CONTROL = "public, max-age=10, stale-while-revalidate=30"
+
 UsernamePath = Annotated[
     str,
     Path(
@@ -22,21 +40,66 @@ class GameDTO(DefaultBaseModel):
     discount: float
 
 
-def create_router(game_repository: UserGameRepoStore) -> APIRouter:
+GAME_DTO_FIELDS = list(GameDTO.model_fields)
+GAME_SORT_FIELDS = [*GAME_DTO_FIELDS, "created_at"]
+
+
+def create_router(
+    game_repository: UserGameRepoStore,
+    cache_control: str = STOREFRONT_CACHE_CONTROL,
+) -> APIRouter:
     router = APIRouter()
 
     @router.get(
         "/{username}/games",
         response_model=Sequence[GameDTO],
     )
-    async def get_user_games(username: UsernamePath) -> Sequence[GameDTO]:
+    async def get_user_games(
+        username: UsernamePath,
+        request: Request,
+        sort: SortQuery = None,
+        limit: LimitQuery = None,
+        cursor: CursorQuery = None,
+        fields: FieldsQuery = None,
+        stream: StreamQuery = None,
+    ) -> Response:
+        order = parse_sort(sort, GAME_SORT_FIELDS)
+        selected_fields = parse_fields(fields, GAME_DTO_FIELDS)
+
+        if stream:
+            ensure_streamable(limit, cursor)
+            stream_response = streaming_response(
+                game_repository.iter_games_by_username(
+                    username,
+                    sort=order,
+                    projection=selected_fields or GAME_DTO_FIELDS,
+                ),
+                selected_fields or GAME_DTO_FIELDS,
+                stream,
+            )
+            # Not validated, since the body is only known once it has been sent
+            stream_response.headers["Cache-Control"] = cache_control
+            return stream_response
+
         try:
-            games = await game_repository.get_games_by_username(username)
+            games = await game_repository.get_games_by_username(
+                username,
+                sort=order,
+                limit=limit,
+                cursor=cursor,
+                projection=selected_fields or GAME_DTO_FIELDS,
+            )
         except ValueError as e:
             raise HTTPException(status_code=404, detail=str(e))
 
-        return [
-            GameDTO(**g.__dict__, created_at=g.created_at.isoformat()) for g in games
-        ]
+        return conditional_response(
+            request,
+            documents_response(
+                games,
+                selected_fields or GAME_DTO_FIELDS,
+                pagination_headers(games, order, limit),
+            ),
+            cache_control,
+        )
 
     return router
@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Path, status, Response, HTTPException, Request
+from fastapi import APIRouter, Depends, Path, status, Response, HTTPException, Request
 from pydantic import Field
 from typing import Annotated, Optional, Sequence, TypeAlias, Literal
 import enum
 
-from vibero.core.users import UserStore, UserId
-from vibero.core.common import DefaultBaseModel
-from vibero.core.security import (
-    create_session_token,
-    verify_session_token,
-    verify_password,
+from vibero.api.common import (
+    CursorQuery,
+    FieldsQuery,
+    LimitQuery,
+    SortQuery,
+    StreamQuery,
+    conditional_response,
+    document_response,
+    documents_response,
+    ensure_streamable,
+    pagination_headers,
+    parse_fields,
+    parse_sort,
+    streaming_response,
 )
+from vibero.core.authentication import Authenticator
+from vibero.core.users import User, UserStore, UserId
+from vibero.core.common import DefaultBaseModel
+from vibero.core.password_hasher import PasswordHasher
+from vibero.core.security import create_session_token
+from vibero.core.session_cache import SessionCache
 
 API_GROUP = "users"
 
+# A profile includes the user's email, so it is kept out of shared caches, and
+# revalidated on every use
+USER_CACHE_CONTROL = "private, no-cache"
+
 UserIdPath: TypeAlias = Annotated[
     UserId,
     Path(
@@ -61,6 +79,9 @@ class UserDTO(DefaultBaseModel):
     role: str
 
 
+USER_DTO_FIELDS = list(UserDTO.model_fields)
+
+
 class UserCreationParamsDTO(DefaultBaseModel):
     username: UsernameField
     email: UserEmailField
@@ -80,7 +101,12 @@ class LoginDTO(DefaultBaseModel):
     password: Annotated[str, Field(min_length=6, max_length=128)]
 
 
-def create_router(user_store: UserStore) -> APIRouter:
+def create_router(
+    user_store: UserStore,
+    password_hasher: PasswordHasher,
+    session_cache: SessionCache,
+    authenticator: Authenticator,
+) -> APIRouter:
     router = APIRouter()
 
     @router.post(
@@ -100,30 +126,55 @@ def create_router(user_store: UserStore) -> APIRouter:
         "",
         response_model=Sequence[UserDTO],
     )
-    async def list_users() -> Sequence[UserDTO]:
-        users = await user_store.list_users()
-        return [UserDTO(**u.__dict__) for u in users]
+    async def list_users(
+        sort: SortQuery = None,
+        limit: LimitQuery = None,
+        cursor: CursorQuery = None,
+        fields: FieldsQuery = None,
+        stream: StreamQuery = None,
+    ) -> Response:
+        order = parse_sort(sort, USER_DTO_FIELDS)
+        selected_fields = parse_fields(fields, USER_DTO_FIELDS)
+
+        if stream:
+            ensure_streamable(limit, cursor)
+            return streaming_response(
+                user_store.iter_users(
+                    sort=order,
+                    projection=selected_fields or USER_DTO_FIELDS,
+                ),
+                selected_fields or USER_DTO_FIELDS,
+                stream,
+            )
+
+        # Only DTO fields are ever loaded, never e.g. the password hash
+        users = await user_store.list_users(
+            sort=order,
+            limit=limit,
+            cursor=cursor,
+            projection=selected_fields or USER_DTO_FIELDS,
+        )
+        return documents_response(
+            users,
+            selected_fields or USER_DTO_FIELDS,
+            pagination_headers(users, order, limit),
+        )
 
     @router.get("/session", response_model=UserDTO)
-    async def read_session(request: Request) -> UserDTO:
-        session_token = request.cookies.get("session")
-        if not session_token:
-            raise HTTPException(status_code=401, detail="Not authenticated")
-
-        user_id = verify_session_token(session_token)
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid session token")
-
-        user = await user_store.read_user(user_id)
-        return UserDTO(**{**user.__dict__, "created_at": user.created_at.isoformat()})
+    async def read_session(
+        user: Annotated[User, Depends(authenticator.current_user)],
+    ) -> Response:
+        return document_response(user, USER_DTO_FIELDS)
 
     @router.get(
         "/{user_id}",
         response_model=UserDTO,
     )
-    async def read_user(user_id: UserIdPath) -> UserDTO:
+    async def read_user(user_id: UserIdPath, request: Request) -> Response:
         user = await user_store.read_user(user_id)
-        return UserDTO(**{**user.__dict__, "created_at": user.created_at.isoformat()})
+        return conditional_response(
+            request, document_response(user, USER_DTO_FIELDS), USER_CACHE_CONTROL
+        )
 
     @router.patch(
         "/{user_id}",
@@ -131,11 +182,13 @@ def create_router(user_store: UserStore) -> APIRouter:
     )
     async def update_user(user_id: UserIdPath, params: UserUpdateParamsDTO) -> UserDTO:
         user = await user_store.update_user(user_id, params.dict(exclude_unset=True))
+        session_cache.invalidate_user(user_id)
         return UserDTO(
             id=user.id,
             username=user.username,
             email=user.email,
             created_at=user.created_at.isoformat(),
+            role=user.role,
         )
 
     @router.delete(
@@ -144,6 +197,7 @@ def create_router(user_store: UserStore) -> APIRouter:
     )
     async def delete_user(user_id: UserIdPath) -> None:
         await user_store.delete_user(user_id)
+        session_cache.invalidate_user(user_id)
 
     @router.post(
         "/{username}/login",
@@ -154,9 +208,18 @@ def create_router(user_store: UserStore) -> APIRouter:
         username: str, params: LoginDTO, response: Response
     ) -> UserDTO:
         user = await user_store.get_by_username(username)
-        if not verify_password(params.password, user.hashed_password):
+        is_valid, new_hash = await password_hasher.verify_and_update(
+            params.password, user.hashed_password
+        )
+        if not is_valid:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
+        if new_hash:
+            # The hash scheme or cost was retuned since this password was set
+            user = await user_store.update_user(user.id, {"hashed_password": new_hash})
+            # Cached sessions still hold the user with the outdated hash
+            session_cache.invalidate_user(user.id)
+
         session_token = create_session_token(user.id)
 
         response.set_cookie(
@@ -174,7 +237,9 @@ def create_router(user_store: UserStore) -> APIRouter:
         "/{username}/logout",
         status_code=status.HTTP_204_NO_CONTENT,
     )
-    async def logout_user(response: Response) -> None:
+    async def logout_user(request: Request, response: Response) -> None:
+        if session_token := request.cookies.get("session"):
+            session_cache.invalidate_token(session_token)
         response.delete_cookie("session")
 
     return router
@@ -0,0 +1,57 @@
+# vibero/bin/benchmark_serialization.py
+
+from datetime import datetime, timezone
+import timeit
+from typing import Sequence
+
+import click
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from vibero.api.common import documents_response
+from vibero.api.user_games_store import GAME_DTO_FIELDS, GameDTO
+from vibero.core.persistence.common import document_fields
+from vibero.core.user_games_store import Game
+
+
+def _games(count: int) -> list[Game]:
+    now = datetime.now(timezone.utc)
+    return [
+        Game(
+            id=f"game-{i}",
+            user_id="user-1",
+            title=f"Game {i}",
+            image=f"https://example.com/games/{i}.png",
+            price=59.99,
+            discount=0.1,
+            created_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+@click.command()
+@click.option("--count", type=int, default=10_000, show_default=True)
+@click.option("--repeat", type=int, default=5, show_default=True)
+def main(count: int, repeat: int) -> None:
+    """Compares rendering a list of games through GameDTO and response_model
+    validation, as the handlers used to, with documents_response()."""
+    games = _games(count)
+    response_model = TypeAdapter(Sequence[GameDTO])
+
+    def through_dtos() -> bytes:
+        # What FastAPI does with the returned DTOs when a response_model is set
+        dtos = [GameDTO(**document_fields(g)) for g in games]
+        validated = response_model.validate_python(jsonable_encoder(dtos))
+        return response_model.dump_json(validated)
+
+    def direct() -> bytes:
+        return bytes(documents_response(games, GAME_DTO_FIELDS).body)
+
+    for name, render in (("dto + response_model", through_dtos), ("direct", direct)):
+        best = min(timeit.repeat(render, number=1, repeat=repeat))
+        click.echo(f"{name:>22}: {best * 1000:8.1f} ms for {count} games")
+
+
+if __name__ == "__main__":
+    main()
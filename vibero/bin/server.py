@@ -1,34 +1,178 @@
 # vibero/bin/server.py
 
 import asyncio
+import dataclasses
+import os
+from pathlib import Path
+from typing import Any, Optional, Sequence
 import uvicorn
 import click
 from lagom import Container
 from vibero.api import user_games_store
 from vibero.api.app import create_api_app
+from vibero.api.compression import CompressionConfig
 from vibero.core.contextual_correlator import ContextualCorrelator
-from vibero.core.loggers import StdoutLogger, Logger, LogLevel
-from vibero.core.users import UserStore, UserDocumentStore
-from vibero.core.user_games_store import UserGameRepoStore, UserGameRepoDocumentStore
+from vibero.core.health import DatabaseHealthCheck
+from vibero.core.loggers import (
+    LogFormat,
+    LogOverflowPolicy,
+    LogQueueConfig,
+    LogSampling,
+    StdoutLogger,
+    Logger,
+    LogLevel,
+)
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.password_hasher import ExecutorKind, PasswordHasher
+from vibero.core.authentication import Authenticator
+from vibero.core.session_cache import SessionCache
+from vibero.core.tracing import OtlpJsonFileExporter, Tracer
+from vibero.core.persistence.document_database import DocumentDatabase
+from vibero.core.persistence.coalescing import CoalescingDocumentDatabase
+from vibero.core.persistence.instrumentation import (
+    InstrumentedDocumentDatabase,
+    QueryStats,
+)
+from vibero.core.cache import ReadThroughCache
+from vibero.core.users import CachedUserStore, UserStore, UserDocumentStore
+from vibero.core.user_games_store import (
+    CachedUserGameRepoStore,
+    UserGameRepoStore,
+    UserGameRepoDocumentStore,
+)
+from vibero.adapters.db.pool import PoolConfig
 from vibero.adapters.db.postgres import PostgresDB
+from vibero.adapters.db.replicas import ReadRouter, ReplicaSelection
+from vibero.adapters.db.async_postgres import AsyncPostgresDB
 from vibero.core.common import ASGIApplication
 
 
-async def setup_container(log_level: str) -> Container:
+async def setup_container(
+    log_level: str,
+    db_driver: str = "asyncpg",
+    password_hash_workers: int = os.cpu_count() or 1,
+    password_hash_queue: int = 64,
+    password_hash_executor: ExecutorKind = "thread",
+    log_queue: Optional[LogQueueConfig] = LogQueueConfig(),
+    log_format: LogFormat = "console",
+    log_sampling: LogSampling = LogSampling(),
+    trace_file: Optional[Path] = None,
+    slow_query_threshold: Optional[float] = 0.2,
+    pool_config: Optional[PoolConfig] = None,
+    replica_urls: Optional[Sequence[str]] = None,
+    replica_selection: ReplicaSelection = "round_robin",
+    read_your_writes_window: float = 2.0,
+    store_cache_size: int = 10_000,
+    store_cache_ttl: float = 10.0,
+    compression: CompressionConfig = CompressionConfig(),
+) -> Container:
     container = Container()
     correlator = ContextualCorrelator()
-    logger = StdoutLogger(correlator, log_level=LogLevel[log_level.upper()])
+    metrics = MetricsRegistry()
+    logger = StdoutLogger(
+        correlator,
+        log_level=LogLevel[log_level.upper()],
+        log_queue=log_queue,
+        log_format=log_format,
+        metrics=metrics,
+        log_sampling=log_sampling,
+    )
 
     container[ContextualCorrelator] = correlator
+    container[MetricsRegistry] = metrics
     container[Logger] = logger
+    container[StdoutLogger] = logger
+    container[Tracer] = Tracer(
+        correlator,
+        OtlpJsonFileExporter(trace_file) if trace_file else None,
+    )
+    query_stats = QueryStats(logger, metrics, slow_query_threshold)
+    container[QueryStats] = query_stats
 
-    db = PostgresDB(logger)
-    db.init_db()
-    user_store = await UserDocumentStore(db).__aenter__()
-    container[UserStore] = user_store
+    pool_config = pool_config or PoolConfig.from_env()
+
+    # A client reads its own writes from the primary for a while. The
+    # authenticator is only created below, once the user store exists.
+    def consistency_key() -> Optional[str]:
+        return authenticator.current_client_key()
+
+    db: DocumentDatabase
+    read_router: ReadRouter[Any]
+    if db_driver == "asyncpg":
+        async_db = AsyncPostgresDB(
+            logger,
+            pool_config=pool_config,
+            metrics=metrics,
+            replica_urls=replica_urls,
+            replica_selection=replica_selection,
+            read_your_writes_window=read_your_writes_window,
+            consistency_key=consistency_key,
+        )
+        await async_db.init_db()
+        container[AsyncPostgresDB] = async_db
+        container[DatabaseHealthCheck] = async_db
+        db = CoalescingDocumentDatabase(
+            InstrumentedDocumentDatabase(async_db, query_stats),
+            read_scope=async_db.read_router.reads_from_primary,
+        )
+        read_router = async_db.read_router
+    else:
+        sync_db = PostgresDB(
+            logger,
+            pool_config=pool_config,
+            metrics=metrics,
+            replica_urls=replica_urls,
+            replica_selection=replica_selection,
+            read_your_writes_window=read_your_writes_window,
+            consistency_key=consistency_key,
+        )
+        sync_db.init_db()
+        container[PostgresDB] = sync_db
+        container[DatabaseHealthCheck] = sync_db
+        db = CoalescingDocumentDatabase(
+            InstrumentedDocumentDatabase(sync_db, query_stats),
+            read_scope=sync_db.read_router.reads_from_primary,
+        )
+        read_router = sync_db.read_router
+
+    password_hasher = PasswordHasher(
+        workers=password_hash_workers,
+        max_pending=password_hash_queue,
+        executor_kind=password_hash_executor,
+        metrics=metrics,
+    )
+    container[PasswordHasher] = password_hasher
+
+    user_store: UserStore = await UserDocumentStore(db, password_hasher).__aenter__()
+    user_games_store: UserGameRepoStore = await UserGameRepoDocumentStore(
+        db
+    ).__aenter__()
+
+    if store_cache_size:
+        user_store = CachedUserStore(
+            user_store,
+            ReadThroughCache(
+                "users",
+                store_cache_size,
+                store_cache_ttl,
+                metrics=metrics,
+                # Reads right after a write may still be served by a replica
+                replica_lag=read_your_writes_window if read_router.replicas else 0.0,
+            ),
+        )
+        user_games_store = CachedUserGameRepoStore(
+            user_games_store,
+            ReadThroughCache(
+                "games", store_cache_size, store_cache_ttl, metrics=metrics
+            ),
+        )
 
-    user_games_store = await UserGameRepoDocumentStore(db).__aenter__()
+    container[UserStore] = user_store
     container[UserGameRepoStore] = user_games_store
+    container[SessionCache] = SessionCache()
+    container[CompressionConfig] = compression
+    authenticator = Authenticator(user_store, container[SessionCache])
+    container[Authenticator] = authenticator
 
     return container
 
@@ -41,16 +185,267 @@ async def setup_container(log_level: str) -> Container:
     type=click.Choice(["debug", "info", "warning", "error", "critical"]),
     help="Logging level.",
 )
+@click.option(
+    "--log-format",
+    default="console",
+    type=click.Choice(["console", "json"]),
+    help="Render logs for humans (console) or as one JSON object per line (json).",
+)
+@click.option(
+    "--log-sample-rate",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Log 1 in N successful operations (e.g. HTTP requests) of each kind.",
+)
+@click.option(
+    "--log-slow-threshold",
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Always log operations slower than this many seconds, even if not sampled.",
+)
+@click.option(
+    "--log-warning-rate",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Limit each distinct warning to this many per second (bursts of 10).",
+)
+@click.option(
+    "--log-queue-size",
+    default=10_000,
+    type=click.IntRange(min=0),
+    help="Log records buffered for the background log writer (0 writes synchronously).",
+)
+@click.option(
+    "--log-queue-overflow",
+    default="drop",
+    type=click.Choice(["drop", "block"]),
+    help="Whether to drop log records or block the caller when the log queue is full.",
+)
+@click.option(
+    "--trace-file",
+    default=None,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Export request traces to this file, one OTLP/JSON request per line.",
+)
+@click.option(
+    "--slow-query-threshold",
+    default=0.2,
+    type=click.FloatRange(min=0),
+    help="Log document collection calls slower than this many seconds.",
+)
+@click.option(
+    "--db-driver",
+    default="asyncpg",
+    type=click.Choice(["asyncpg", "psycopg2"]),
+    help="Postgres driver: asyncpg (non-blocking) or psycopg2 (blocking, legacy).",
+)
+@click.option(
+    "--db-pool-size",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Database connections kept open (default: $DB_POOL_SIZE or 5).",
+)
+@click.option(
+    "--db-pool-max-overflow",
+    default=None,
+    type=click.IntRange(min=0),
+    help="Extra connections opened under load (default: $DB_POOL_MAX_OVERFLOW or 10).",
+)
+@click.option(
+    "--db-pool-timeout",
+    default=None,
+    type=click.FloatRange(min=0),
+    help="Seconds to wait for a free connection (default: $DB_POOL_TIMEOUT or 30).",
+)
+@click.option(
+    "--db-pool-recycle",
+    default=None,
+    type=click.IntRange(min=-1),
+    help="Replace connections older than this many seconds, -1 for never "
+    "(default: $DB_POOL_RECYCLE or 1800).",
+)
+@click.option(
+    "--db-pool-pre-ping/--no-db-pool-pre-ping",
+    default=None,
+    help="Test connections before use (default: $DB_POOL_PRE_PING or on).",
+)
+@click.option(
+    "--db-replica-url",
+    "db_replica_urls",
+    multiple=True,
+    help="Read replica to route reads to; repeat for several "
+    "(default: comma-separated $DATABASE_REPLICA_URLS).",
+)
+@click.option(
+    "--db-replica-selection",
+    default="round_robin",
+    type=click.Choice(["round_robin", "least_loaded"]),
+    help="Route reads to replicas in turn, or to the one with the fewest busy connections.",
+)
+@click.option(
+    "--db-read-your-writes-window",
+    default=2.0,
+    type=click.FloatRange(min=0),
+    help="Seconds after a write during which the same client reads from the primary. "
+    "Tracked per server process, so clients must stick to one process to benefit.",
+)
+@click.option(
+    "--store-cache-size",
+    default=10_000,
+    type=click.IntRange(min=0),
+    help="Users and game listings cached in memory, per store (0 disables caching).",
+)
+@click.option(
+    "--store-cache-ttl",
+    default=10.0,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds a cached user or game listing is served for.",
+)
+@click.option(
+    "--compression-minimum-size",
+    default=1024,
+    type=click.IntRange(min=0),
+    help="Send responses smaller than this many bytes uncompressed.",
+)
+@click.option(
+    "--gzip-level",
+    default=6,
+    type=click.IntRange(1, 9),
+    help="gzip compression level; higher compresses better but slower.",
+)
+@click.option(
+    "--brotli-quality",
+    default=4,
+    type=click.IntRange(0, 11),
+    help="Brotli compression quality, if the brotli package is installed.",
+)
+@click.option(
+    "--zstd-level",
+    default=3,
+    type=click.IntRange(1, 22),
+    help="zstd compression level, if the zstandard package is installed.",
+)
+@click.option(
+    "--compression-cache-size",
+    default=1024,
+    type=click.IntRange(min=0),
+    help="Compressed bodies of cacheable responses kept for reuse, by ETag.",
+)
+@click.option(
+    "--password-hash-workers",
+    default=os.cpu_count() or 1,
+    type=click.IntRange(min=1),
+    help="Number of workers hashing and verifying passwords.",
+)
+@click.option(
+    "--password-hash-queue",
+    default=64,
+    type=click.IntRange(min=0),
+    help="Password operations allowed to wait for a worker before new ones are rejected (503).",
+)
+@click.option(
+    "--password-hash-executor",
+    default="thread",
+    type=click.Choice(["thread", "process"]),
+    help="Run password hashing in a thread pool or a process pool.",
+)
 @click.option(
     "--migrate", is_flag=True, help="Enable database migrations (not implemented yet)."
 )
-def main(port: int, log_level: str, migrate: bool) -> None:
+def main(
+    port: int,
+    log_level: str,
+    log_format: LogFormat,
+    log_sample_rate: int,
+    log_slow_threshold: Optional[float],
+    log_warning_rate: Optional[float],
+    log_queue_size: int,
+    log_queue_overflow: LogOverflowPolicy,
+    trace_file: Optional[Path],
+    slow_query_threshold: float,
+    db_driver: str,
+    db_pool_size: Optional[int],
+    db_pool_max_overflow: Optional[int],
+    db_pool_timeout: Optional[float],
+    db_pool_recycle: Optional[int],
+    db_pool_pre_ping: Optional[bool],
+    db_replica_urls: tuple[str, ...],
+    db_replica_selection: ReplicaSelection,
+    db_read_your_writes_window: float,
+    store_cache_size: int,
+    store_cache_ttl: float,
+    compression_minimum_size: int,
+    gzip_level: int,
+    brotli_quality: int,
+    zstd_level: int,
+    compression_cache_size: int,
+    password_hash_workers: int,
+    password_hash_queue: int,
+    password_hash_executor: ExecutorKind,
+    migrate: bool,
+) -> None:
+    pool_overrides = {
+        "pool_size": db_pool_size,
+        "max_overflow": db_pool_max_overflow,
+        "pool_timeout": db_pool_timeout,
+        "pool_recycle": db_pool_recycle,
+        "pool_pre_ping": db_pool_pre_ping,
+    }
+    pool_config = dataclasses.replace(
+        PoolConfig.from_env(),
+        **{k: v for k, v in pool_overrides.items() if v is not None},
+    )
+
     async def _run():
-        container = await setup_container(log_level)
-        app: ASGIApplication = await create_api_app(container)
+        container = await setup_container(
+            log_level,
+            db_driver,
+            password_hash_workers,
+            password_hash_queue,
+            password_hash_executor,
+            log_queue=(
+                LogQueueConfig(max_size=log_queue_size, overflow=log_queue_overflow)
+                if log_queue_size
+                else None
+            ),
+            log_format=log_format,
+            log_sampling=LogSampling(
+                operation_sample_rate=log_sample_rate,
+                slow_operation_threshold=log_slow_threshold,
+                warning_rate=log_warning_rate,
+            ),
+            trace_file=trace_file,
+            slow_query_threshold=slow_query_threshold,
+            pool_config=pool_config,
+            replica_urls=db_replica_urls or None,
+            replica_selection=db_replica_selection,
+            read_your_writes_window=db_read_your_writes_window,
+            store_cache_size=store_cache_size,
+            store_cache_ttl=store_cache_ttl,
+            compression=CompressionConfig(
+                minimum_size=compression_minimum_size,
+                gzip_level=gzip_level,
+                brotli_quality=brotli_quality,
+                zstd_level=zstd_level,
+                cache_size=compression_cache_size,
+            ),
+        )
+        try:
+            app: ASGIApplication = await create_api_app(container)
+
+            config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level=log_level)
+            server = uvicorn.Server(config)
+            await server.serve()
+        finally:
+            try:
+                container[PasswordHasher].shutdown()
 
-        config = uvicorn.Config(app, host="0.0.0.0", port=port, log_level=log_level)
-        server = uvicorn.Server(config)
-        await server.serve()
+                if db_driver == "asyncpg":
+                    await container[AsyncPostgresDB].close()
+            finally:
+                # Last, and even after a crash, so that the queued log records
+                # and spans explaining it are written out
+                container[Tracer].close()
+                container[StdoutLogger].close()
 
     asyncio.run(_run())
@@ -0,0 +1,117 @@
+from contextlib import contextmanager
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Mapping, Optional, cast
+
+from vibero.core.common import generate_id
+from vibero.core.security import decode_session_token
+from vibero.core.session_cache import SessionCache
+from vibero.core.tracing import traced
+from vibero.core.users import User, UserId, UserStore
+
+
+class AuthenticationError(Exception):
+    def __init__(self, message: str = "Not authenticated") -> None:
+        super().__init__(message)
+
+
+@dataclass
+class _RequestAuthentication:
+    session_token: Optional[str]
+    client_address: Optional[str] = None
+    claims: Optional[Mapping[str, Any]] = None
+    user: Optional[User] = field(default=None, repr=False)
+
+
+class Authenticator:
+    """Resolves the session of the current request at most once.
+
+    Like ContextualCorrelator, it keeps its state in a context variable, which
+    authentication_scope() sets for the duration of a request. Resolution is
+    lazy: the token is only decoded when claims or a user are first asked for,
+    and the user is only fetched when actually needed.
+    """
+
+    def __init__(self, user_store: UserStore, session_cache: SessionCache) -> None:
+        self._user_store = user_store
+        self._session_cache = session_cache
+
+        self._requests = contextvars.ContextVar[Optional[_RequestAuthentication]](
+            f"authenticator_{generate_id()}_requests",
+            default=None,
+        )
+
+    @contextmanager
+    def authentication_scope(
+        self,
+        session_token: Optional[str],
+        client_address: Optional[str] = None,
+    ) -> Iterator[None]:
+        reset_token = self._requests.set(
+            _RequestAuthentication(session_token, client_address)
+        )
+        try:
+            yield
+        finally:
+            self._requests.reset(reset_token)
+
+    def current_session_token(self) -> Optional[str]:
+        """The session token of the current request, if any, without verifying it."""
+        request = self._requests.get()
+        return request.session_token if request else None
+
+    def current_client_key(self) -> Optional[str]:
+        """Tells apart the clients of requests, signed in or not: the session
+        token if any, the client's address otherwise, without verifying either."""
+        request = self._requests.get()
+        if request is None:
+            return None
+        if request.session_token:
+            return request.session_token
+        if request.client_address:
+            return f"address:{request.client_address}"
+        return None
+
+    async def current_claims(self) -> Mapping[str, Any]:
+        """The verified claims of the session token, without a database read."""
+        request = self._current_request()
+
+        if request.claims is None:
+            if not request.session_token:
+                raise AuthenticationError()
+
+            claims = decode_session_token(request.session_token)
+            if not claims or not claims.get("sub"):
+                raise AuthenticationError("Invalid session token")
+
+            request.claims = claims
+
+        return request.claims
+
+    async def current_user_id(self) -> UserId:
+        return UserId((await self.current_claims())["sub"])
+
+    @traced("authentication.current_user")
+    async def current_user(self) -> User:
+        request = self._current_request()
+
+        if request.user is None and request.session_token:
+            request.user = self._session_cache.get(request.session_token)
+
+        if request.user is None:
+            claims = await self.current_claims()
+            try:
+                request.user = await self._user_store.read_user(claims["sub"])
+            except ValueError:
+                # A valid token of a user that has since been deleted
+                raise AuthenticationError("User not found")
+            self._session_cache.put(
+                cast(str, request.session_token), claims, request.user
+            )
+
+        return request.user
+
+    def _current_request(self) -> _RequestAuthentication:
+        if request := self._requests.get():
+            return request
+        raise RuntimeError("No authentication scope is active")
@@ -0,0 +1,272 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Any, Awaitable, Callable, Optional, Sequence, TypeVar, cast
+from typing_extensions import override
+
+from vibero.core.metrics import MetricsRegistry
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class SharedCache(ABC):
+    """A cache tier shared by all server processes, such as Redis or memcached.
+
+    Entries are tagged, so that all entries derived from the same record can be
+    invalidated together. Implementations serialize values as they need to.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value, or None if there is none."""
+        ...
+
+    @abstractmethod
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        tags: Sequence[str] = (),
+    ) -> None: ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Sequence[str]) -> None: ...
+
+
+@dataclass(frozen=True)
+class _LocalEntry:
+    value: Any
+    tags: tuple[str, ...]
+    expires_at: float
+
+
+class LocalCache:
+    """A bounded LRU cache whose entries expire after `ttl` seconds, and can be
+    invalidated by tag."""
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 10.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, _LocalEntry] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return default
+
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        tags: Sequence[str] = (),
+        ttl: Optional[float] = None,
+    ) -> None:
+        self._remove(key)
+        self._entries[key] = _LocalEntry(
+            value, tuple(tags), time.monotonic() + (ttl or self._ttl)
+        )
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            for key in list(self._keys_by_tag.get(tag, ())):
+                self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for tag in entry.tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+class InMemorySharedCache(SharedCache):
+    """Stands in for a shared cache in tests and single-process deployments."""
+
+    def __init__(self, max_size: int = 100_000) -> None:
+        self._cache = LocalCache(max_size)
+
+    @override
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    @override
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: float,
+        tags: Sequence[str] = (),
+    ) -> None:
+        self._cache.put(key, value, tags, ttl)
+
+    @override
+    async def invalidate_tags(self, tags: Sequence[str]) -> None:
+        self._cache.invalidate_tags(tags)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    size: int
+    local_hits: int
+    shared_hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return (self.local_hits + self.shared_hits) / lookups if lookups else 0.0
+
+
+class ReadThroughCache:
+    """Serves values from an in-process LRU cache, then from an optional shared
+    cache, and only then loads them (e.g. from the database), filling both.
+
+    Writers must invalidate the tags of the entries they affect. Only the local
+    cache of the current process and the shared cache are invalidated, so other
+    processes may serve a stale value for up to `ttl` seconds; keep it short.
+
+    A value is not cached if one of its tags was invalidated while it was being
+    loaded, since it may predate the write, nor within replica_lag seconds of
+    such an invalidation, since it may come from a replica that has not caught
+    up with the write yet.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 10_000,
+        ttl: float = 10.0,
+        shared: Optional[SharedCache] = None,
+        shared_ttl: float = 60.0,
+        metrics: Optional[MetricsRegistry] = None,
+        replica_lag: float = 0.0,
+    ) -> None:
+        self._name = name
+        self._max_size = max_size
+        self._local = LocalCache(max_size, ttl)
+        self._shared = shared
+        self._shared_ttl = shared_ttl
+        self._replica_lag = replica_lag
+
+        # The invalidation count and time of the last invalidation of each
+        # recently invalidated tag, and the newest count no longer tracked
+        self._invalidations = 0
+        self._invalidated_tags: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._forgotten_invalidations = 0
+
+        self._local_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._lookups = (
+            metrics.counter(
+                "cache_lookups_total",
+                "Cache lookups by cache and result",
+                ["cache", "result"],
+            )
+            if metrics
+            else None
+        )
+
+    async def get_or_load(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[T]],
+        tags: Callable[[T], Sequence[str]] = lambda _: (),
+    ) -> T:
+        """Returns the cached value for key, or caches and returns what load()
+        returns, tagged with tags(value). Errors raised by load() are not cached."""
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count("local_hit")
+            return cast(T, value)
+
+        invalidations = self._invalidations
+
+        if self._shared:
+            value = await self._shared.get(key)
+            if value is not None:
+                self._count("shared_hit")
+                if self._may_cache(tags(value), invalidations):
+                    self._local.put(key, value, tags(value))
+                return cast(T, value)
+
+        self._count("miss")
+        loaded = await load()
+        if self._may_cache(tags(loaded), invalidations):
+            self._local.put(key, loaded, tags(loaded))
+            if self._shared:
+                await self._shared.set(key, loaded, self._shared_ttl, tags(loaded))
+        return loaded
+
+    async def invalidate(self, *tags: str) -> None:
+        self._invalidations += 1
+        now = time.monotonic()
+        for tag in tags:
+            self._invalidated_tags[tag] = (self._invalidations, now)
+            self._invalidated_tags.move_to_end(tag)
+        while len(self._invalidated_tags) > self._max_size:
+            _, (forgotten, _) = self._invalidated_tags.popitem(last=False)
+            self._forgotten_invalidations = forgotten
+
+        self._local.invalidate_tags(tags)
+        if self._shared:
+            await self._shared.invalidate_tags(tags)
+
+    def _may_cache(self, tags: Sequence[str], invalidations: int) -> bool:
+        """Whether a value with these tags, loaded after the given number of
+        invalidations, may be cached."""
+        if invalidations < self._forgotten_invalidations:
+            return False
+
+        now = time.monotonic()
+        for tag in tags:
+            invalidated = self._invalidated_tags.get(tag)
+            if invalidated is None:
+                continue
+            count, invalidated_at = invalidated
+            if count > invalidations or now - invalidated_at < self._replica_lag:
+                return False
+        return True
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._local),
+            local_hits=self._local_hits,
+            shared_hits=self._shared_hits,
+            misses=self._misses,
+        )
+
+    def _count(self, result: str) -> None:
+        if result == "local_hit":
+            self._local_hits += 1
+        elif result == "shared_hit":
+            self._shared_hits += 1
+        else:
+            self._misses += 1
+
+        if self._lookups:
+            self._lookups.inc(cache=self._name, result=result)
@@ -109,3 +109,7 @@ def generate_id() -> UniqueId:
 
 def default_user_role() -> str:
     return "regular"
+
+
+def admin_user_role() -> str:
+    return "admin"
@@ -14,19 +14,52 @@
 
 from contextlib import contextmanager
 import contextvars
-from typing import Iterator
+from typing import Iterator, Optional
 from vibero.core.common import generate_id
 
 _UNINITIALIZED = 0xC0FFEE
 
 
+class ScopeChain:
+    """An immutable linked list of nested scope ids.
+
+    Entering a scope pushes a node in O(1), sharing its parent, rather than
+    building a new string. The joined form is rendered at most once per node,
+    when first asked for, and then reused by every log line within the scope.
+    """
+
+    __slots__ = ("_scope_id", "_parent", "_separator", "_rendered")
+
+    def __init__(
+        self,
+        scope_id: str,
+        parent: Optional["ScopeChain"] = None,
+        separator: str = "",
+    ) -> None:
+        self._scope_id = scope_id
+        self._parent = parent
+        self._separator = separator
+        self._rendered: Optional[str] = None
+
+    def push(self, scope_id: str) -> "ScopeChain":
+        return ScopeChain(scope_id, self, self._separator)
+
+    def __str__(self) -> str:
+        if self._rendered is None:
+            if self._parent is None:
+                self._rendered = self._scope_id
+            else:
+                self._rendered = f"{self._parent}{self._separator}{self._scope_id}"
+        return self._rendered
+
+
 class ContextualCorrelator:
     def __init__(self) -> None:
         self._instance_id = generate_id()
 
-        self._scopes = contextvars.ContextVar[str](
+        self._scopes = contextvars.ContextVar[Optional[ScopeChain]](
             f"correlator_{self._instance_id}_scopes",
-            default="",
+            default=None,
         )
 
     @contextmanager
@@ -34,18 +67,18 @@ class ContextualCorrelator:
         current_scopes = self._scopes.get()
 
         if current_scopes:
-            new_scopes = current_scopes + f"::{scope_id}"
+            new_scopes = current_scopes.push(scope_id)
         else:
-            new_scopes = scope_id
+            new_scopes = ScopeChain(scope_id, separator="::")
 
         reset_token = self._scopes.set(new_scopes)
-
-        yield
-
-        self._scopes.reset(reset_token)
+        try:
+            yield
+        finally:
+            self._scopes.reset(reset_token)
 
     @property
     def correlation_id(self) -> str:
         if scopes := self._scopes.get():
-            return scopes
+            return str(scopes)
         return "<main>"
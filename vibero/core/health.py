@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+
+@dataclass(frozen=True)
+class PoolStatus:
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+
+    @property
+    def utilization(self) -> float:
+        """Share of the pool's capacity (size + max_overflow) checked out."""
+        capacity = self.size + self.max_overflow
+        return self.checked_out / capacity if capacity else 0.0
+
+
+@dataclass(frozen=True)
+class DatabaseHealth:
+    healthy: bool
+    latency: Optional[float]
+    pools: Mapping[str, PoolStatus]
+    error: Optional[str] = None
+
+
+class DatabaseHealthCheck(ABC):
+    @abstractmethod
+    async def check_health(self) -> DatabaseHealth:
+        """Round-trips a trivial query and reports the state of the
+        connection pools, by name (e.g. "primary")."""
+        ...
@@ -16,17 +16,22 @@ from abc import ABC, abstractmethod
 import asyncio
 from contextlib import ExitStack, contextmanager
 import contextvars
+from dataclasses import dataclass
 from enum import Enum, auto
 import logging
+import orjson
 from pathlib import Path
+import queue
 import structlog
+import threading
 import time
 import traceback
-from typing import Any, Iterator, Sequence
+from typing import Any, Callable, Iterator, Literal, Optional, Sequence
 from typing_extensions import override
 
 from vibero.core.common import generate_id
-from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.contextual_correlator import ContextualCorrelator, ScopeChain
+from vibero.core.metrics import MetricsRegistry
 
 
 class LogLevel(Enum):
@@ -46,24 +51,260 @@ class LogLevel(Enum):
         }[self]
 
 
+LogOverflowPolicy = Literal["drop", "block"]
+
+LogFormat = Literal["console", "json"]
+
+
+def _json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    return orjson.dumps(obj, default=default).decode()
+
+
+@dataclass(frozen=True)
+class LogQueueConfig:
+    max_size: int = 10_000
+    batch_size: int = 256
+    overflow: LogOverflowPolicy = "drop"
+
+
+class QueueLogHandler(logging.Handler):
+    """Hands log records over to a background thread, which formats them and
+    writes them to the target handlers in batches, so that slow rendering and
+    I/O stay off the caller's path.
+
+    The queue is bounded. When it is full, records are either dropped (and
+    the number of dropped records is reported once there is room again) or the
+    caller blocks until there is room, depending on the overflow policy.
+    Closing the handler writes out every queued record before returning.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        handlers: Sequence[logging.Handler],
+        config: LogQueueConfig = LogQueueConfig(),
+    ) -> None:
+        super().__init__()
+
+        self._handlers = list(handlers)
+        self._config = config
+        self._queue = queue.Queue[Any](maxsize=config.max_size)
+        self._dropped = 0
+        self._reported_dropped = 0
+        self._closed = False
+
+        self._writer = threading.Thread(
+            target=self._write_batches,
+            name="log-writer",
+            daemon=True,
+        )
+        self._writer.start()
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._closed:
+            return
+
+        if self._config.overflow == "block":
+            self._queue.put(record)
+            return
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._dropped += 1
+
+    @override
+    def flush(self) -> None:
+        """Waits until every record queued so far has been written."""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    @override
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._queue.put(self._STOP)
+            self._writer.join()
+
+            for handler in self._handlers:
+                handler.close()
+
+        super().close()
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+
+            while batch[-1] is not self._STOP and len(batch) < self._config.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [r for r in batch if r is not self._STOP]
+
+            if self._dropped > self._reported_dropped:
+                records.append(self._dropped_records_warning())
+
+            self._write(records)
+
+            for _ in batch:
+                self._queue.task_done()
+
+            if batch[-1] is self._STOP:
+                return
+
+    def _dropped_records_warning(self) -> logging.LogRecord:
+        dropped, self._reported_dropped = (
+            self._dropped - self._reported_dropped,
+            self._dropped,
+        )
+        return logging.makeLogRecord(
+            {
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"{dropped} log records were dropped: the log queue was full",
+            }
+        )
+
+    def _write(self, records: Sequence[logging.LogRecord]) -> None:
+        for handler in self._handlers:
+            handled = [r for r in records if r.levelno >= handler.level]
+            if not handled:
+                continue
+
+            try:
+                if isinstance(handler, logging.StreamHandler):
+                    # One write and one flush per batch, rather than per record
+                    text = "".join(
+                        handler.format(r) + handler.terminator for r in handled
+                    )
+                    with handler.lock:  # type: ignore[union-attr]
+                        handler.stream.write(text)
+                        handler.flush()
+                else:
+                    for record in handled:
+                        handler.handle(record)
+            except Exception:
+                handler.handleError(handled[0])
+
+
+@dataclass(frozen=True)
+class LogSampling:
+    # Log 1 in N operations of each name that succeed and aren't slow
+    operation_sample_rate: int = 1
+    # Operations taking longer than this (in seconds) are always logged
+    slow_operation_threshold: Optional[float] = None
+    # Token bucket per warning rate limit key (by default the message):
+    # sustained rate (per second) and burst
+    warning_rate: Optional[float] = None
+    warning_burst: int = 10
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self.suppressed = 0
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+
+        self.suppressed += 1
+        return False
+
+
+class LogSampler:
+    """Decides which operations and warnings are worth a log line.
+
+    Operations are sampled per key (their name, unless given a sample key), but
+    failed and slow ones are always logged. Warnings are rate limited per key
+    (their message, unless given a rate limit key), and the first one let
+    through after a suppression reports how many were suppressed in between.
+    """
+
+    _MAX_WARNING_KEYS = 1024
+
+    def __init__(self, sampling: LogSampling = LogSampling()) -> None:
+        self._sampling = sampling
+        self._operation_counts: dict[str, int] = {}
+        self._warning_buckets: dict[str, _TokenBucket] = {}
+
+    def sample_operation(self, key: str) -> bool:
+        if self._sampling.operation_sample_rate <= 1:
+            return True
+
+        count = self._operation_counts.get(key, 0)
+        self._operation_counts[key] = count + 1
+        return count % self._sampling.operation_sample_rate == 0
+
+    def is_slow(self, duration: float) -> bool:
+        threshold = self._sampling.slow_operation_threshold
+        return threshold is not None and duration >= threshold
+
+    def admit_warning(self, key: str) -> tuple[bool, int]:
+        """Returns whether to log the warning, and how many with the same key
+        were suppressed since the last one that was logged."""
+        if self._sampling.warning_rate is None:
+            return True, 0
+
+        bucket = self._warning_buckets.get(key)
+        if bucket is None:
+            if len(self._warning_buckets) >= self._MAX_WARNING_KEYS:
+                del self._warning_buckets[next(iter(self._warning_buckets))]
+
+            bucket = _TokenBucket(
+                self._sampling.warning_rate, self._sampling.warning_burst
+            )
+            self._warning_buckets[key] = bucket
+
+        if not bucket.take():
+            return False, 0
+
+        suppressed, bucket.suppressed = bucket.suppressed, 0
+        return True, suppressed
+
+
 class Logger(ABC):
     @abstractmethod
     def set_level(self, log_level: LogLevel) -> None: ...
 
     @abstractmethod
-    def debug(self, message: str) -> None: ...
+    def debug(self, message: str, **fields: Any) -> None: ...
 
     @abstractmethod
-    def info(self, message: str) -> None: ...
+    def info(self, message: str, **fields: Any) -> None: ...
 
     @abstractmethod
-    def warning(self, message: str) -> None: ...
+    def warning(
+        self, message: str, *, rate_limit_key: Optional[str] = None, **fields: Any
+    ) -> None:
+        """Warnings are rate limited per rate_limit_key, which defaults to the
+        message; messages that embed values (durations, ids) should pass a key
+        that doesn't, e.g. their template."""
+        ...
 
     @abstractmethod
-    def error(self, message: str) -> None: ...
+    def error(self, message: str, **fields: Any) -> None: ...
 
     @abstractmethod
-    def critical(self, message: str) -> None: ...
+    def critical(self, message: str, **fields: Any) -> None: ...
 
     @abstractmethod
     @contextmanager
@@ -71,7 +312,18 @@ class Logger(ABC):
 
     @abstractmethod
     @contextmanager
-    def operation(self, name: str, props: dict[str, Any] = {}) -> Iterator[None]: ...
+    def operation(
+        self,
+        name: str,
+        props: dict[str, Any] = {},
+        sample_key: Optional[Callable[[], str]] = None,
+    ) -> Iterator[None]:
+        """Logs and times the operation. It's sampled per name, unless given a
+        sample_key, which is called once the operation is done, so that it may
+        depend on what the operation found out (e.g. the route a request
+        matched). Such operations are logged once done, with no "started" line.
+        """
+        ...
 
 
 class CorrelationalLogger(Logger):
@@ -80,11 +332,42 @@ class CorrelationalLogger(Logger):
         correlator: ContextualCorrelator,
         log_level: LogLevel = LogLevel.DEBUG,
         logger_id: str | None = None,
+        log_queue: Optional[LogQueueConfig] = None,
+        log_format: LogFormat = "console",
+        metrics: Optional[MetricsRegistry] = None,
+        log_sampling: LogSampling = LogSampling(),
     ) -> None:
         self._correlator = correlator
+        self._log_queue = log_queue
+        self._log_format = log_format
+        self._sampler = LogSampler(log_sampling)
+        self._operation_durations = (
+            metrics.histogram(
+                "operation_duration_seconds",
+                "Duration of operations timed by Logger.operation()",
+                ["operation", "outcome"],
+            )
+            if metrics
+            else None
+        )
+        self._handlers: list[logging.Handler] = []
         self.raw_logger = logging.getLogger(logger_id or "parlant")
         self.raw_logger.setLevel(log_level.to_logging_level())
 
+        # Rendering happens in the handlers' formatter, so that with a log queue
+        # it runs on the writer thread rather than on the caller's path
+        self._formatter = structlog.stdlib.ProcessorFormatter(
+            processor=(
+                structlog.processors.JSONRenderer(serializer=_json_dumps)
+                if log_format == "json"
+                else structlog.dev.ConsoleRenderer(colors=True)
+            ),
+            foreign_pre_chain=[
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.stdlib.add_log_level,
+            ],
+        )
+
         # Wrap it with structlog configuration
         self._logger = structlog.wrap_logger(
             self.raw_logger,
@@ -95,7 +378,7 @@ class CorrelationalLogger(Logger):
                 structlog.stdlib.PositionalArgumentsFormatter(),
                 structlog.processors.StackInfoRenderer(),
                 structlog.processors.format_exc_info,
-                structlog.dev.ConsoleRenderer(colors=True),
+                structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
             ],
             wrapper_class=structlog.make_filtering_bound_logger(logging.DEBUG),
         )
@@ -103,34 +386,54 @@ class CorrelationalLogger(Logger):
         # Scope support using contextvars
         self._instance_id = generate_id()
 
-        self._scopes = contextvars.ContextVar[str](
+        self._scopes = contextvars.ContextVar[Optional[ScopeChain]](
             f"logger_{self._instance_id}_scopes",
-            default="",
+            default=None,
         )
 
+    def add_handlers(self, handlers: Sequence[logging.Handler]) -> None:
+        for handler in handlers:
+            handler.setFormatter(self._formatter)
+
+        if self._log_queue:
+            handlers = [QueueLogHandler(handlers, self._log_queue)]
+
+        for handler in handlers:
+            self.raw_logger.addHandler(handler)
+            self._handlers.append(handler)
+
+    def close(self) -> None:
+        """Detaches and closes this logger's handlers, flushing any queued records."""
+        for handler in self._handlers:
+            self.raw_logger.removeHandler(handler)
+            handler.close()
+        self._handlers.clear()
+
     @override
     def set_level(self, log_level: LogLevel) -> None:
         self.raw_logger.setLevel(log_level.to_logging_level())
 
     @override
-    def debug(self, message: str) -> None:
-        self._logger.debug(self._add_correlation_id_and_scopes(message))
+    def debug(self, message: str, **fields: Any) -> None:
+        self._log(LogLevel.DEBUG, message, fields)
 
     @override
-    def info(self, message: str) -> None:
-        self._logger.info(self._add_correlation_id_and_scopes(message))
+    def info(self, message: str, **fields: Any) -> None:
+        self._log(LogLevel.INFO, message, fields)
 
     @override
-    def warning(self, message: str) -> None:
-        self._logger.warning(self._add_correlation_id_and_scopes(message))
+    def warning(
+        self, message: str, *, rate_limit_key: Optional[str] = None, **fields: Any
+    ) -> None:
+        self._log(LogLevel.WARNING, message, fields, rate_limit_key)
 
     @override
-    def error(self, message: str) -> None:
-        self._logger.error(self._add_correlation_id_and_scopes(message))
+    def error(self, message: str, **fields: Any) -> None:
+        self._log(LogLevel.ERROR, message, fields)
 
     @override
-    def critical(self, message: str) -> None:
-        self._logger.critical(self._add_correlation_id_and_scopes(message))
+    def critical(self, message: str, **fields: Any) -> None:
+        self._log(LogLevel.CRITICAL, message, fields)
 
     @override
     @contextmanager
@@ -138,58 +441,115 @@ class CorrelationalLogger(Logger):
         current_scopes = self._scopes.get()
 
         if current_scopes:
-            new_scopes = current_scopes + f"[{scope_id}]"
+            new_scopes = current_scopes.push(f"[{scope_id}]")
         else:
-            new_scopes = f"[{scope_id}]"
+            new_scopes = ScopeChain(f"[{scope_id}]")
 
         reset_token = self._scopes.set(new_scopes)
-
-        yield
-
-        self._scopes.reset(reset_token)
+        try:
+            yield
+        finally:
+            self._scopes.reset(reset_token)
 
     @override
     @contextmanager
-    def operation(self, name: str, props: dict[str, Any] = {}) -> Iterator[None]:
-        t_start = time.time()
+    def operation(
+        self,
+        name: str,
+        props: dict[str, Any] = {},
+        sample_key: Optional[Callable[[], str]] = None,
+    ) -> Iterator[None]:
+        t_start = time.perf_counter()
+        outcome = "success"
+        # Unsampled operations are only logged once they turn out slow or fail
+        sampled = sample_key is None and self._sampler.sample_operation(name)
         try:
-            if props:
-                self.info(f"{name} [{props}] started")
-            else:
-                self.info(f"{name} started")
+            if sampled:
+                if props:
+                    self.info(f"{name} [{props}] started")
+                else:
+                    self.info(f"{name} started")
 
             yield
 
-            t_end = time.time()
+            t_end = time.perf_counter()
 
-            if props:
-                self.info(f"{name} [{props}] finished in {t_end - t_start}s")
-            else:
-                self.info(f"{name} finished in {round(t_end - t_start, 3)} seconds")
+            if sample_key is not None:
+                sampled = self._sampler.sample_operation(sample_key())
+
+            if sampled or self._sampler.is_slow(t_end - t_start):
+                if props:
+                    self.info(
+                        f"{name} [{props}] finished in {round(t_end - t_start, 3)}s"
+                    )
+                else:
+                    self.info(f"{name} finished in {round(t_end - t_start, 3)} seconds")
         except asyncio.CancelledError:
+            outcome = "cancelled"
             self.warning(
-                f"{name} cancelled after {round(time.time() - t_start, 3)} seconds"
+                f"{name} cancelled after {round(time.perf_counter() - t_start, 3)} seconds"
             )
             raise
         except Exception as exc:
+            outcome = "error"
             self.error(f"{name} failed")
             self.error(" ".join(traceback.format_exception(exc)))
             raise
         except BaseException as exc:
+            outcome = "error"
             self.error(f"{name} failed with critical error")
             self.critical(" ".join(traceback.format_exception(exc)))
             raise
+        finally:
+            if self._operation_durations:
+                self._operation_durations.observe(
+                    time.perf_counter() - t_start,
+                    operation=name,
+                    outcome=outcome,
+                )
 
     @property
     def current_scope(self) -> str:
         return self._get_scopes()
 
+    def _log(
+        self,
+        level: LogLevel,
+        message: str,
+        fields: dict[str, Any],
+        rate_limit_key: Optional[str] = None,
+    ) -> None:
+        # Checked up front, so that disabled levels cost no formatting at all
+        if not self.raw_logger.isEnabledFor(level.to_logging_level()):
+            return
+
+        if level == LogLevel.WARNING:
+            admitted, suppressed = self._sampler.admit_warning(
+                rate_limit_key or message
+            )
+            if not admitted:
+                return
+            if suppressed:
+                fields = {**fields, "suppressed": suppressed}
+
+        log = getattr(self._logger, level.name.lower())
+
+        if self._log_format == "json":
+            log(
+                message,
+                correlation_id=self._correlator.correlation_id,
+                scopes=self.current_scope,
+                **fields,
+            )
+        else:
+            log(self._add_correlation_id_and_scopes(message), **fields)
+
     def _add_correlation_id_and_scopes(self, message: str) -> str:
         return f"[{self._correlator.correlation_id}]{self.current_scope} {message}"
 
     def _get_scopes(self) -> str:
         if scopes := self._scopes.get():
-            return scopes
+            return str(scopes)
         return ""
 
 
@@ -199,9 +559,21 @@ class StdoutLogger(CorrelationalLogger):
         correlator: ContextualCorrelator,
         log_level: LogLevel = LogLevel.DEBUG,
         logger_id: str | None = None,
+        log_queue: Optional[LogQueueConfig] = None,
+        log_format: LogFormat = "console",
+        metrics: Optional[MetricsRegistry] = None,
+        log_sampling: LogSampling = LogSampling(),
     ) -> None:
-        super().__init__(correlator, log_level, logger_id)
-        self.raw_logger.addHandler(logging.StreamHandler())
+        super().__init__(
+            correlator,
+            log_level,
+            logger_id,
+            log_queue,
+            log_format,
+            metrics,
+            log_sampling,
+        )
+        self.add_handlers([logging.StreamHandler()])
 
 
 class FileLogger(CorrelationalLogger):
@@ -211,16 +583,27 @@ class FileLogger(CorrelationalLogger):
         correlator: ContextualCorrelator,
         log_level: LogLevel = LogLevel.DEBUG,
         logger_id: str | None = None,
+        log_queue: Optional[LogQueueConfig] = None,
+        log_format: LogFormat = "console",
+        metrics: Optional[MetricsRegistry] = None,
+        log_sampling: LogSampling = LogSampling(),
     ) -> None:
-        super().__init__(correlator, log_level, logger_id)
-
-        handlers: list[logging.Handler] = [
-            logging.FileHandler(log_file_path),
-            logging.StreamHandler(),
-        ]
+        super().__init__(
+            correlator,
+            log_level,
+            logger_id,
+            log_queue,
+            log_format,
+            metrics,
+            log_sampling,
+        )
 
-        for handler in handlers:
-            self.raw_logger.addHandler(handler)
+        self.add_handlers(
+            [
+                logging.FileHandler(log_file_path),
+                logging.StreamHandler(),
+            ]
+        )
 
 
 class CompositeLogger(Logger):
@@ -236,42 +619,59 @@ class CompositeLogger(Logger):
             logger.set_level(log_level)
 
     @override
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, **fields: Any) -> None:
         for logger in self._loggers:
-            logger.debug(message)
+            logger.debug(message, **fields)
 
     @override
-    def info(self, message: str) -> None:
+    def info(self, message: str, **fields: Any) -> None:
         for logger in self._loggers:
-            logger.info(message)
+            logger.info(message, **fields)
 
     @override
-    def warning(self, message: str) -> None:
+    def warning(
+        self, message: str, *, rate_limit_key: Optional[str] = None, **fields: Any
+    ) -> None:
         for logger in self._loggers:
-            logger.warning(message)
+            logger.warning(message, rate_limit_key=rate_limit_key, **fields)
 
     @override
-    def error(self, message: str) -> None:
+    def error(self, message: str, **fields: Any) -> None:
         for logger in self._loggers:
-            logger.error(message)
+            logger.error(message, **fields)
 
     @override
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, **fields: Any) -> None:
         for logger in self._loggers:
-            logger.critical(message)
+            logger.critical(message, **fields)
 
     @override
     @contextmanager
     def scope(self, scope_id: str) -> Iterator[None]:
+        if len(self._loggers) == 1:
+            with self._loggers[0].scope(scope_id):
+                yield
+            return
+
         with ExitStack() as stack:
-            for context in [logger.scope(scope_id) for logger in self._loggers]:
-                stack.enter_context(context)
+            for logger in self._loggers:
+                stack.enter_context(logger.scope(scope_id))
             yield
 
     @override
     @contextmanager
-    def operation(self, name: str, props: dict[str, Any] = {}) -> Iterator[None]:
+    def operation(
+        self,
+        name: str,
+        props: dict[str, Any] = {},
+        sample_key: Optional[Callable[[], str]] = None,
+    ) -> Iterator[None]:
+        if len(self._loggers) == 1:
+            with self._loggers[0].operation(name, props, sample_key):
+                yield
+            return
+
         with ExitStack() as stack:
-            for context in [logger.operation(name, props) for logger in self._loggers]:
-                stack.enter_context(context)
+            for logger in self._loggers:
+                stack.enter_context(logger.operation(name, props, sample_key))
             yield
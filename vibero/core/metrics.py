@@ -0,0 +1,188 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass
+import math
+import threading
+import time
+from typing import Callable, Iterator, Sequence, Union, cast
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class _HistogramSeries:
+    bucket_counts: list[int]
+    sum: float = 0.0
+    count: int = 0
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        label_values = tuple(labels[name] for name in self.label_names)
+        # The first bucket whose upper bound is >= value; len(buckets) is +Inf
+        bucket = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = _HistogramSeries([0] * (len(self.buckets) + 1))
+                self._series[label_values] = series
+
+            series.bucket_counts[bucket] += 1
+            series.sum += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t_start, **labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+
+        with self._lock:
+            series_items = [
+                (values, list(s.bucket_counts), s.sum, s.count)
+                for values, s in self._series.items()
+            ]
+
+        for label_values, bucket_counts, total, count in series_items:
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+
+            for bound, bucket_count in zip(
+                [*self.buckets, math.inf],
+                bucket_counts,
+            ):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                yield f"{self.name}_bucket{_render_labels([*labels, ('le', le)])} {cumulative}"
+
+            yield f"{self.name}_sum{_render_labels(labels)} {total}"
+            yield f"{self.name}_count{_render_labels(labels)} {count}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        label_values = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+
+        with self._lock:
+            values = list(self._values.items())
+
+        for label_values, value in values:
+            labels = list(zip(self.label_names, label_values))
+            yield f"{self.name}{_render_labels(labels)} {value}"
+
+
+class Gauge:
+    """A value per label set, either set directly or read from a function
+    each time the metrics are rendered."""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], Union[float, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(labels[name] for name in self.label_names)] = value
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        with self._lock:
+            self._values[tuple(labels[name] for name in self.label_names)] = function
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+
+        with self._lock:
+            values = list(self._values.items())
+
+        for label_values, value in values:
+            labels = list(zip(self.label_names, label_values))
+            current = value() if callable(value) else value
+            yield f"{self.name}{_render_labels(labels)} {current}"
+
+
+class MetricsRegistry:
+    """Holds in-process metrics and renders them in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Union[Histogram, Counter, Gauge]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Returns the histogram with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help, label_names, buckets)
+            return cast(Histogram, self._metrics[name])
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()) -> Counter:
+        """Returns the counter with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help, label_names)
+            return cast(Counter, self._metrics[name])
+
+    def gauge(self, name: str, help: str, label_names: Sequence[str] = ()) -> Gauge:
+        """Returns the gauge with this name, creating it on first use."""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name, help, label_names)
+            return cast(Gauge, self._metrics[name])
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_labels(labels: Sequence[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels) + "}"
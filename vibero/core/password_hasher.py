@@ -0,0 +1,145 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+import os
+from typing import Any, Callable, Literal, Optional, TypeVar
+
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.security import (
+    hash_password,
+    verify_and_update_password,
+    verify_password,
+)
+
+T = TypeVar("T")
+
+ExecutorKind = Literal["thread", "process"]
+
+
+class PasswordHasherOverloadedError(Exception):
+    def __init__(self, message: str = "Password hashing capacity exceeded") -> None:
+        super().__init__(message)
+
+
+@dataclass(frozen=True)
+class PasswordHasherStats:
+    workers: int
+    max_pending: int
+    running: int
+    pending: int
+    completed: int
+    rejected: int
+
+    @property
+    def saturation(self) -> float:
+        """Share of the admission capacity (workers + max_pending) in use."""
+        return (self.running + self.pending) / (self.workers + self.max_pending)
+
+
+class PasswordHasher:
+    """Runs password hashing and verification (deliberately slow, CPU-bound work)
+    on a bounded worker pool rather than on the event loop.
+
+    At most `workers` operations run at once and at most `max_pending` more wait
+    for a worker. Beyond that, operations are rejected immediately with
+    PasswordHasherOverloadedError, so a burst of logins sheds load instead of
+    building an ever-growing backlog.
+
+    bcrypt releases the GIL while hashing, so threads scale across cores; a
+    process pool is available for schemes that do not.
+
+    Given a metrics registry, the pool's running and pending operations and its
+    saturation are exposed as gauges, and rejections as a counter.
+    """
+
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        max_pending: int = 64,
+        executor_kind: ExecutorKind = "thread",
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        self._workers = workers
+        self._executor_kind = executor_kind
+        self._max_pending = max_pending
+        self._executor: Executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+            if executor_kind == "thread"
+            else ProcessPoolExecutor(max_workers=workers)
+        )
+
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+        self._rejections = None
+        if metrics:
+            operations = metrics.gauge(
+                "password_hasher_operations",
+                "Password hashing operations by state",
+                ["state"],
+            )
+            operations.set_function(lambda: self.stats().running, state="running")
+            operations.set_function(lambda: self.stats().pending, state="pending")
+            metrics.gauge(
+                "password_hasher_saturation",
+                "Share of the password hasher's admission capacity in use",
+            ).set_function(lambda: self.stats().saturation)
+            self._rejections = metrics.counter(
+                "password_hasher_rejected_total",
+                "Password hashing operations rejected for lack of capacity",
+            )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def verify_and_update(
+        self,
+        password: str,
+        hashed_password: str,
+    ) -> tuple[bool, Optional[str]]:
+        """Like verify(), also returning a new hash when the stored one is
+        outdated (a deprecated scheme or a different cost), or None otherwise."""
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> PasswordHasherStats:
+        return PasswordHasherStats(
+            workers=self._workers,
+            max_pending=self._max_pending,
+            running=min(self._in_flight, self._workers),
+            pending=max(self._in_flight - self._workers, 0),
+            completed=self._completed,
+            rejected=self._rejected,
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._in_flight >= self._workers + self._max_pending:
+            self._rejected += 1
+            if self._rejections:
+                self._rejections.inc()
+            raise PasswordHasherOverloadedError()
+
+        self._in_flight += 1
+        try:
+            if self._executor_kind == "thread":
+                # Carries context variables (e.g. the current trace span) over
+                # to the worker thread, as asyncio.to_thread() would
+                call = functools.partial(contextvars.copy_context().run, func, *args)
+            else:
+                call = functools.partial(func, *args)
+
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, call
+            )
+            self._completed += 1
+            return result
+        finally:
+            self._in_flight -= 1
@@ -0,0 +1,262 @@
+import asyncio
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from typing_extensions import override
+
+from vibero.core.persistence.common import FieldName, Sort, Where
+from vibero.core.persistence.document_database import (
+    DEFAULT_CHUNK_SIZE,
+    BaseDocument,
+    BulkWriteResult,
+    DeleteManyResult,
+    DeleteResult,
+    DocumentCollection,
+    DocumentDatabase,
+    InsertManyResult,
+    InsertResult,
+    TDocument,
+    UpdateManyResult,
+    UpdateResult,
+    WriteOperation,
+)
+from vibero.core.tracing import span
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time: callers that ask for a key
+    while its call is in flight await that call's result instead of starting
+    their own.
+
+    The call runs as a task of its own, so that it completes for the callers
+    still waiting even if the one that started it is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+        # Every caller may have been cancelled; don't warn about the error then
+        if not future.cancelled():
+            future.exception()
+
+
+def _query_key(*parts: Any) -> str:
+    # Non-JSON values (e.g. datetimes) are compared through their str()
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class CoalescingDocumentDatabase(DocumentDatabase):
+    """Wraps a DocumentDatabase so that identical concurrent reads on its
+    collections (same filters, sort, page and projection) share a single call
+    to the underlying database.
+
+    Coalesced callers receive the same result objects, which must therefore be
+    treated as read-only. The shared call runs in the context (e.g. the trace)
+    of the caller that started it; the others record a span of their own for
+    the time they waited on it.
+
+    Reads only coalesce with reads of the same read_scope(), which must tell
+    apart callers whose reads the database would route differently, e.g. to
+    the primary within a client's read-your-writes window, or to a replica.
+    """
+
+    def __init__(
+        self,
+        database: DocumentDatabase,
+        read_scope: Callable[[], Hashable] = lambda: None,
+    ) -> None:
+        self._database = database
+        self._read_scope = read_scope
+
+    @override
+    async def create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+    ) -> DocumentCollection[TDocument]:
+        return CoalescingDocumentCollection(
+            await self._database.create_collection(name, schema),
+            name,
+            self._read_scope,
+        )
+
+    @override
+    async def get_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        **kwargs: Any,
+    ) -> DocumentCollection[TDocument]:
+        return CoalescingDocumentCollection(
+            await self._database.get_collection(
+                name, schema, document_loader, **kwargs
+            ),
+            name,
+            self._read_scope,
+        )
+
+    @override
+    async def get_or_create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        **kwargs: Any,
+    ) -> DocumentCollection[TDocument]:
+        return CoalescingDocumentCollection(
+            await self._database.get_or_create_collection(
+                name, schema, document_loader, **kwargs
+            ),
+            name,
+            self._read_scope,
+        )
+
+    @override
+    async def delete_collection(self, name: str) -> None:
+        await self._database.delete_collection(name)
+
+
+class CoalescingDocumentCollection(DocumentCollection[TDocument]):
+    def __init__(
+        self,
+        collection: DocumentCollection[TDocument],
+        name: str,
+        read_scope: Callable[[], Hashable] = lambda: None,
+    ) -> None:
+        self._collection = collection
+        self._name = name
+        self._read_scope = read_scope
+        self._single_flight = SingleFlight()
+        # Part of every read's key, so that a read issued after a write never
+        # joins a read that may have started before it
+        self._writes = 0
+
+    async def _read(
+        self,
+        operation: str,
+        args: tuple[Any, ...],
+        call: Callable[[], Awaitable[T]],
+    ) -> T:
+        key = _query_key(operation, self._writes, self._read_scope(), *args)
+        if not self._single_flight.in_flight(key):
+            return await self._single_flight.do(key, call)
+
+        with span(f"{self._name}.{operation}", {"db.coalesced": True}):
+            return await self._single_flight.do(key, call)
+
+    async def _write(self, call: Callable[[], Awaitable[T]]) -> T:
+        self._writes += 1
+        try:
+            return await call()
+        finally:
+            self._writes += 1
+
+    @override
+    async def find(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[TDocument]:
+        return await self._read(
+            "find",
+            (filters, sort, limit, cursor, projection),
+            lambda: self._collection.find(filters, sort, limit, cursor, projection),
+        )
+
+    @override
+    def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        # Each consumer pulls at its own pace, so streams are not shared
+        return self._collection.find_iter(filters, sort, projection, batch_size)
+
+    @override
+    async def find_one(self, filters: Where) -> Optional[TDocument]:
+        return await self._read(
+            "find_one", (filters,), lambda: self._collection.find_one(filters)
+        )
+
+    @override
+    async def insert_one(self, document: TDocument) -> InsertResult:
+        return await self._write(lambda: self._collection.insert_one(document))
+
+    @override
+    async def update_one(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateResult[TDocument]:
+        return await self._write(
+            lambda: self._collection.update_one(filters, params, upsert)
+        )
+
+    @override
+    async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
+        return await self._write(lambda: self._collection.delete_one(filters))
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        return await self._write(
+            lambda: self._collection.insert_many(documents, chunk_size)
+        )
+
+    @override
+    async def update_many(self, filters: Where, params: TDocument) -> UpdateManyResult:
+        return await self._write(lambda: self._collection.update_many(filters, params))
+
+    @override
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        return await self._write(lambda: self._collection.delete_many(filters))
+
+    @override
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        return await self._write(
+            lambda: self._collection.bulk_write(operations, chunk_size)
+        )
@@ -1,5 +1,22 @@
-from typing import Any, Callable, Mapping, NewType, Union, cast, get_type_hints
-from typing_extensions import Literal, TypedDict
+import base64
+from datetime import datetime
+from functools import lru_cache
+import json
+import operator
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Literal,
+    Mapping,
+    NewType,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+    get_type_hints,
+)
+from typing_extensions import TypedDict
 
 from vibero.core.common import Version
 
@@ -60,67 +77,131 @@ LogicalOperator = TypedDict(
 Where = Union[WhereExpression, LogicalOperator]
 
 
-def _evaluate_filter(
-    operator: str,
-    field_value: LiteralValue,
-    filter_value: LiteralValue,
-) -> bool:
-    tests: dict[str, Callable[[Any, Any], bool]] = {
-        "$eq": lambda field_value, filter_value: field_value == filter_value,
-        "$ne": lambda field_value, filter_value: field_value != filter_value,
-        "$gt": lambda field_value, filter_value: field_value > filter_value,
-        "$gte": lambda field_value, filter_value: field_value >= filter_value,
-        "$lt": lambda field_value, filter_value: field_value < filter_value,
-        "$lte": lambda field_value, filter_value: field_value <= filter_value,
-    }
-    return tests[operator](field_value, filter_value)
+FilterPredicate = Callable[[Mapping[str, Any]], bool]
+
+_Plan = Callable[[Mapping[str, Any], Sequence[Any]], bool]
+
+_COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$in": lambda field_value, filter_values: field_value in filter_values,
+    "$nin": lambda field_value, filter_values: field_value not in filter_values,
+}
+
+
+def _split_shape(where: Where, params: list[Any]) -> tuple[Any, ...]:
+    """Separates a filter into its shape (fields, operators and nesting, which is
+    hashable and shared by all queries of the same form) and its literal values,
+    which are appended to params in the order the shape refers to them."""
+    nodes: list[tuple[Any, ...]] = []
+
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            operands = cast(list[Where], value)
+            nodes.append((key, tuple(_split_shape(sub, params) for sub in operands)))
+            continue
+
+        if not isinstance(value, Mapping):
+            value = {"$eq": value}
+
+        for op, filter_value in value.items():
+            if op not in _COMPARISONS:
+                raise ValueError(f"Unsupported filter operator '{op}'")
+
+            if op in ("$in", "$nin"):
+                filter_value = _as_container(cast(list[LiteralValue], filter_value))
+
+            nodes.append(("$field", key, op, len(params)))
+            params.append(filter_value)
+
+    return ("$and", tuple(nodes))
+
+
+def _as_container(values: list[LiteralValue]) -> Collection[LiteralValue]:
+    try:
+        return frozenset(values)
+    except TypeError:
+        return tuple(values)
+
+
+@lru_cache(maxsize=1024)
+def _compile_shape(shape: tuple[Any, ...]) -> _Plan:
+    if shape[0] == "$field":
+        _, field_name, op, index = shape
+        test = _COMPARISONS[op]
+
+        def evaluate_field(candidate: Mapping[str, Any], params: Sequence[Any]) -> bool:
+            return test(candidate[field_name], params[index])
+
+        return evaluate_field
+
+    kind, children = shape
+    plans = tuple(_compile_shape(child) for child in children)
+
+    if len(plans) == 1:
+        return plans[0]
+
+    if kind == "$and":
+
+        def evaluate_and(candidate: Mapping[str, Any], params: Sequence[Any]) -> bool:
+            for plan in plans:
+                if not plan(candidate, params):
+                    return False
+            return True
+
+        return evaluate_and
+
+    def evaluate_or(candidate: Mapping[str, Any], params: Sequence[Any]) -> bool:
+        for plan in plans:
+            if plan(candidate, params):
+                return True
+        return False
+
+    return evaluate_or
+
+
+def compile_filters(where: Where) -> FilterPredicate:
+    """Compiles a filter into a predicate over candidate documents.
+
+    The filter is interpreted once per call rather than once per candidate, and the
+    evaluation plan for each query shape is cached, so repeated queries that differ
+    only in their values (e.g. lookups by different ids) reuse the same plan.
+    """
+    if not where:
+        return lambda candidate: True
+
+    params: list[Any] = []
+    plan = _compile_shape(_split_shape(where, params))
+
+    return lambda candidate: plan(candidate, params)
 
 
 def matches_filters(
     where: Where,
     candidate: Mapping[str, Any],
 ) -> bool:
-    if not where:
-        return True
-
-    if next(iter(where.keys())) in ("$and", "$or"):
-        op = cast(LogicalOperator, where)
-        for operator in op:
-            operands = op[cast(Literal["$and", "$or"], operator)]
-            if operator == "$and":
-                if not all(
-                    matches_filters(sub_filter, candidate) for sub_filter in operands
-                ):
-                    return False
-            elif operator == "$or":
-                if not any(
-                    matches_filters(sub_filter, candidate) for sub_filter in operands
-                ):
-                    return False
-    else:
-        field_filters = cast(WhereExpression, where)
-        for field_name, field_filter in field_filters.items():
-            for operator, filter_value in field_filter.items():
-                if operator == "$in":
-                    if not any(
-                        candidate[field_name] == val
-                        for val in cast(list[LiteralValue], filter_value)
-                    ):
-                        return False
-                elif operator == "$nin":
-                    if any(
-                        candidate[field_name] == val
-                        for val in cast(list[LiteralValue], filter_value)
-                    ):
-                        return False
-                else:
-                    if not _evaluate_filter(
-                        operator,
-                        candidate[field_name],
-                        cast(LiteralValue, filter_value),
-                    ):
-                        return False
-    return True
+    """One-off check of a single candidate. Use compile_filters() when scanning."""
+    return compile_filters(where)(candidate)
+
+
+def normalize_where(where: Where) -> dict[str, Any]:
+    """Returns the filter with every literal value replaced by "?", so that all
+    queries of the same form (e.g. for statistics) normalize to the same filter."""
+    normalized: dict[str, Any] = {}
+
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            normalized[key] = [normalize_where(sub) for sub in cast(list[Where], value)]
+        elif isinstance(value, Mapping):
+            normalized[key] = {op: "?" for op in value}
+        else:
+            normalized[key] = {"$eq": "?"}
+
+    return normalized
 
 
 def ensure_is_total(
@@ -134,3 +215,91 @@ def ensure_is_total(
             f"Provided TypedDict '{schema.__qualname__}' is missing required keys: {missing_keys}. "
             f"Expected at least the keys: {list(required_keys)}."
         )
+
+
+def document_fields(document: Any) -> Mapping[str, Any]:
+    """Returns the fields of a document, whether it is a mapping (TypedDict, projected
+    row) or an object such as a dataclass or an ORM instance."""
+    return document if isinstance(document, Mapping) else vars(document)
+
+
+# Sorting & Keyset Pagination
+SortDirection = Literal["asc", "desc"]
+Sort = Sequence[tuple[FieldName, SortDirection]]
+
+
+class InvalidCursorError(Exception):
+    def __init__(self, message: str = "Invalid pagination cursor") -> None:
+        super().__init__(message)
+
+
+def keyset_sort(sort: Optional[Sort]) -> list[tuple[FieldName, SortDirection]]:
+    """Completes a sort with an "id" tie-breaker, making the order total so that a
+    cursor identifies a unique position in it."""
+    result = list(sort or [])
+    if not any(field_name == "id" for field_name, _ in result):
+        result.append(("id", "asc"))
+    return result
+
+
+def projection_with_sort_keys(
+    projection: Sequence[FieldName],
+    sort: Optional[Sort],
+) -> list[FieldName]:
+    """Projected documents keep their sort keys, so a cursor can be taken from them."""
+    return list(
+        dict.fromkeys([*projection, *(field for field, _ in keyset_sort(sort))])
+    )
+
+
+def encode_cursor(document: Any, sort: Optional[Sort]) -> str:
+    """Encodes the position of a document within the given sort as an opaque cursor."""
+    fields = document_fields(document)
+    payload = [
+        [field_name, direction, _encode_cursor_value(fields[field_name])]
+        for field_name, direction in keyset_sort(sort)
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def keyset_filter(cursor: str, sort: Optional[Sort]) -> Where:
+    """Translates a cursor into a filter matching the documents that come after it
+    in the given sort, which must be the sort the cursor was taken with."""
+    sort = keyset_sort(sort)
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        positions = [(f, d) for f, d, _ in payload]
+        values = [_decode_cursor_value(v) for _, _, v in payload]
+    except (ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError() from exc
+
+    if positions != [(f, d) for f, d in sort]:
+        raise InvalidCursorError("Pagination cursor does not match the requested sort")
+
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with < for descending keys
+    alternatives: list[Where] = []
+    for i, (field_name, direction) in enumerate(sort):
+        operator_name = "$gt" if direction == "asc" else "$lt"
+        alternatives.append(
+            {
+                "$and": [
+                    *({f: {"$eq": values[j]}} for j, (f, _) in enumerate(sort[:i])),
+                    {field_name: {operator_name: values[i]}},
+                ]
+            }
+        )
+
+    return {"$or": alternatives}
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["$datetime"])
+    return value
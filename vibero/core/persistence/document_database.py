@@ -16,6 +16,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import (
+    AsyncIterator,
     Awaitable,
     Callable,
     Generic,
@@ -23,9 +24,10 @@ from typing import (
     Sequence,
     TypeVar,
     TypedDict,
+    Union,
 )
 
-from vibero.core.persistence.common import ObjectId, Where
+from vibero.core.persistence.common import FieldName, ObjectId, Sort, Where
 from vibero.core.common import Version
 
 
@@ -57,6 +59,76 @@ class DeleteResult(Generic[TDocument]):
     deleted_document: Optional[TDocument]
 
 
+@dataclass(frozen=True)
+class InsertManyResult:
+    acknowledged: bool
+    inserted_count: int
+
+
+@dataclass(frozen=True)
+class UpdateManyResult:
+    acknowledged: bool
+    matched_count: int
+    modified_count: int
+
+
+@dataclass(frozen=True)
+class DeleteManyResult:
+    acknowledged: bool
+    deleted_count: int
+
+
+@dataclass(frozen=True)
+class BulkWriteResult:
+    acknowledged: bool
+    inserted_count: int
+    matched_count: int
+    modified_count: int
+    upserted_count: int
+    deleted_count: int
+
+
+# Operations for DocumentCollection.bulk_write(), each with the semantics of
+# the method of the same name
+@dataclass(frozen=True)
+class InsertOne(Generic[TDocument]):
+    document: TDocument
+
+
+@dataclass(frozen=True)
+class UpdateOne(Generic[TDocument]):
+    filters: Where
+    params: TDocument
+    upsert: bool = False
+
+
+@dataclass(frozen=True)
+class UpdateMany(Generic[TDocument]):
+    filters: Where
+    params: TDocument
+
+
+@dataclass(frozen=True)
+class DeleteOne:
+    filters: Where
+
+
+@dataclass(frozen=True)
+class DeleteMany:
+    filters: Where
+
+
+WriteOperation = Union[
+    InsertOne[TDocument],
+    UpdateOne[TDocument],
+    UpdateMany[TDocument],
+    DeleteOne,
+    DeleteMany,
+]
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
 async def identity_loader(doc: BaseDocument) -> BaseDocument:
     return doc
 
@@ -113,8 +185,31 @@ class DocumentCollection(ABC, Generic[TDocument]):
     async def find(
         self,
         filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
     ) -> Sequence[TDocument]:
-        """Finds all documents that match the given filters."""
+        """Finds all documents that match the given filters.
+
+        When sort, limit or cursor is given, results are ordered by sort (completed
+        with an "id" tie-breaker) and start right after the cursor, which is obtained
+        from the last document of the previous page through encode_cursor().
+        When projection is given, documents are returned as plain dicts holding only
+        the projected fields and the sort keys."""
+        ...
+
+    @abstractmethod
+    def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        """Yields all documents that match the given filters, like find() does for
+        sort and projection, while fetching them in batches of batch_size so that
+        memory use stays flat regardless of the number of matches."""
         ...
 
     @abstractmethod
@@ -151,3 +246,40 @@ class DocumentCollection(ABC, Generic[TDocument]):
     ) -> DeleteResult[TDocument]:
         """Deletes the first document that matches the query criteria."""
         ...
+
+    @abstractmethod
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        """Inserts all documents in a single transaction, sending them in batches
+        of chunk_size. Either all of them are inserted or none is."""
+        ...
+
+    @abstractmethod
+    async def update_many(
+        self,
+        filters: Where,
+        params: TDocument,
+    ) -> UpdateManyResult:
+        """Updates all documents that match the query criteria."""
+        ...
+
+    @abstractmethod
+    async def delete_many(
+        self,
+        filters: Where,
+    ) -> DeleteManyResult:
+        """Deletes all documents that match the query criteria."""
+        ...
+
+    @abstractmethod
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        """Applies the operations in order, in a single transaction. Consecutive
+        inserts are sent in batches of chunk_size."""
+        ...
@@ -0,0 +1,403 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+import json
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+)
+from typing_extensions import override
+
+from vibero.core.loggers import Logger
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.persistence.common import FieldName, Sort, Where, normalize_where
+from vibero.core.persistence.document_database import (
+    DEFAULT_CHUNK_SIZE,
+    BaseDocument,
+    BulkWriteResult,
+    DeleteManyResult,
+    DeleteResult,
+    DocumentCollection,
+    DocumentDatabase,
+    InsertManyResult,
+    InsertResult,
+    TDocument,
+    UpdateManyResult,
+    UpdateResult,
+    WriteOperation,
+)
+from vibero.core.tracing import end_span, span, start_span
+
+
+def query_shape(filters: Optional[Where]) -> str:
+    """A canonical rendering of the filter's form, without its literal values."""
+    if filters is None:
+        return ""
+    return json.dumps(normalize_where(filters), sort_keys=True)
+
+
+@dataclass(frozen=True)
+class QueryShapeStats:
+    collection: str
+    operation: str
+    shape: str
+    calls: int
+    rows: int
+    total_duration: float
+    max_duration: float
+    slow_calls: int
+
+    @property
+    def mean_duration(self) -> float:
+        return self.total_duration / self.calls if self.calls else 0.0
+
+
+@dataclass
+class _ShapeTotals:
+    calls: int = 0
+    rows: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    slow_calls: int = 0
+
+
+class QueryStats:
+    """Aggregates calls, rows returned and latency per collection, operation and
+    query shape, and logs every query slower than slow_query_threshold seconds."""
+
+    def __init__(
+        self,
+        logger: Logger,
+        metrics: Optional[MetricsRegistry] = None,
+        slow_query_threshold: Optional[float] = 0.2,
+    ) -> None:
+        self._logger = logger
+        self._slow_query_threshold = slow_query_threshold
+        self._totals: dict[tuple[str, str, str], _ShapeTotals] = {}
+        self._lock = threading.Lock()
+        self._durations = (
+            metrics.histogram(
+                "db_query_duration_seconds",
+                "Duration of document collection calls",
+                ["collection", "operation"],
+            )
+            if metrics
+            else None
+        )
+
+    def record(
+        self,
+        collection: str,
+        operation: str,
+        shape: str,
+        duration: float,
+        rows: int,
+    ) -> None:
+        slow = (
+            self._slow_query_threshold is not None
+            and duration >= self._slow_query_threshold
+        )
+
+        with self._lock:
+            totals = self._totals.setdefault(
+                (collection, operation, shape), _ShapeTotals()
+            )
+            totals.calls += 1
+            totals.rows += rows
+            totals.total_duration += duration
+            totals.max_duration = max(totals.max_duration, duration)
+            totals.slow_calls += slow
+
+        if self._durations:
+            self._durations.observe(
+                duration, collection=collection, operation=operation
+            )
+
+        if slow:
+            self._logger.warning(
+                f"Slow query: {collection}.{operation} took {round(duration, 3)}s",
+                rate_limit_key=f"Slow query: {collection}.{operation}",
+                filters=shape,
+                rows=rows,
+            )
+
+    def snapshot(self) -> list[QueryShapeStats]:
+        """All statistics, the most time-consuming query shapes first."""
+        with self._lock:
+            stats = [
+                QueryShapeStats(
+                    collection=collection,
+                    operation=operation,
+                    shape=shape,
+                    calls=totals.calls,
+                    rows=totals.rows,
+                    total_duration=totals.total_duration,
+                    max_duration=totals.max_duration,
+                    slow_calls=totals.slow_calls,
+                )
+                for (collection, operation, shape), totals in self._totals.items()
+            ]
+
+        return sorted(stats, key=lambda s: s.total_duration, reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+class InstrumentedDocumentDatabase(DocumentDatabase):
+    """Wraps a DocumentDatabase so that every call on its collections is traced
+    and, given QueryStats, accounted for."""
+
+    def __init__(
+        self,
+        database: DocumentDatabase,
+        query_stats: Optional[QueryStats] = None,
+    ) -> None:
+        self._database = database
+        self._query_stats = query_stats
+
+    @override
+    async def create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+    ) -> DocumentCollection[TDocument]:
+        return InstrumentedDocumentCollection(
+            await self._database.create_collection(name, schema),
+            name,
+            self._query_stats,
+        )
+
+    @override
+    async def get_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        **kwargs: Any,
+    ) -> DocumentCollection[TDocument]:
+        return InstrumentedDocumentCollection(
+            await self._database.get_collection(
+                name, schema, document_loader, **kwargs
+            ),
+            name,
+            self._query_stats,
+        )
+
+    @override
+    async def get_or_create_collection(
+        self,
+        name: str,
+        schema: type[TDocument],
+        document_loader: Callable[[BaseDocument], Awaitable[Optional[TDocument]]],
+        **kwargs: Any,
+    ) -> DocumentCollection[TDocument]:
+        return InstrumentedDocumentCollection(
+            await self._database.get_or_create_collection(
+                name, schema, document_loader, **kwargs
+            ),
+            name,
+            self._query_stats,
+        )
+
+    @override
+    async def delete_collection(self, name: str) -> None:
+        await self._database.delete_collection(name)
+
+
+@dataclass
+class _CallResult:
+    rows: int = 0
+
+
+class InstrumentedDocumentCollection(DocumentCollection[TDocument]):
+    def __init__(
+        self,
+        collection: DocumentCollection[TDocument],
+        name: str,
+        query_stats: Optional[QueryStats] = None,
+    ) -> None:
+        self._collection = collection
+        self._name = name
+        self._query_stats = query_stats
+
+    def _attributes(self, operation: str, shape: str) -> dict[str, str]:
+        return {
+            "db.collection": self._name,
+            "db.operation": operation,
+            "db.statement": shape,
+        }
+
+    def _record(self, operation: str, shape: str, duration: float, rows: int) -> None:
+        if self._query_stats:
+            self._query_stats.record(self._name, operation, shape, duration, rows)
+
+    @contextmanager
+    def _instrumented(
+        self,
+        operation: str,
+        filters: Optional[Where],
+    ) -> Iterator[_CallResult]:
+        shape = query_shape(filters)
+        result = _CallResult()
+        t_start = time.perf_counter()
+
+        with span(
+            f"{self._name}.{operation}", self._attributes(operation, shape)
+        ) as call_span:
+            try:
+                yield result
+            finally:
+                if call_span:
+                    call_span.set_attribute("db.rows", result.rows)
+                self._record(
+                    operation, shape, time.perf_counter() - t_start, result.rows
+                )
+
+    @override
+    async def find(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[TDocument]:
+        with self._instrumented("find", filters) as result:
+            documents = await self._collection.find(
+                filters, sort, limit, cursor, projection
+            )
+            result.rows = len(documents)
+            return documents
+
+    @override
+    async def find_iter(
+        self,
+        filters: Where,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[TDocument]:
+        shape = query_shape(filters)
+        # Not made the current span, since the caller's code runs between yields
+        iter_span = start_span(
+            f"{self._name}.find_iter", self._attributes("find_iter", shape)
+        )
+        rows = 0
+        # Only the time spent waiting for documents, not the caller's (e.g. a
+        # client slowly consuming a streamed response) in between
+        duration = 0.0
+        error: Optional[BaseException] = None
+
+        documents = aiter(
+            self._collection.find_iter(filters, sort, projection, batch_size)
+        )
+        try:
+            while True:
+                t_start = time.perf_counter()
+                try:
+                    document = await anext(documents)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    duration += time.perf_counter() - t_start
+
+                rows += 1
+                yield document
+        except GeneratorExit:
+            # The caller stopped iterating early, which is not a failure
+            raise
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            # Releases the inner iterator's session now, rather than whenever
+            # it gets garbage collected
+            if aclose := getattr(documents, "aclose", None):
+                await aclose()
+
+            if iter_span:
+                iter_span.set_attribute("db.rows", rows)
+                end_span(iter_span, error)
+            self._record("find_iter", shape, duration, rows)
+
+    @override
+    async def find_one(self, filters: Where) -> Optional[TDocument]:
+        with self._instrumented("find_one", filters) as result:
+            document = await self._collection.find_one(filters)
+            result.rows = int(document is not None)
+            return document
+
+    @override
+    async def insert_one(self, document: TDocument) -> InsertResult:
+        with self._instrumented("insert_one", None) as result:
+            inserted = await self._collection.insert_one(document)
+            result.rows = 1
+            return inserted
+
+    @override
+    async def update_one(
+        self,
+        filters: Where,
+        params: TDocument,
+        upsert: bool = False,
+    ) -> UpdateResult[TDocument]:
+        with self._instrumented("update_one", filters) as result:
+            updated = await self._collection.update_one(filters, params, upsert)
+            result.rows = updated.modified_count
+            return updated
+
+    @override
+    async def delete_one(self, filters: Where) -> DeleteResult[TDocument]:
+        with self._instrumented("delete_one", filters) as result:
+            deleted = await self._collection.delete_one(filters)
+            result.rows = deleted.deleted_count
+            return deleted
+
+    @override
+    async def insert_many(
+        self,
+        documents: Sequence[TDocument],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> InsertManyResult:
+        with self._instrumented("insert_many", None) as result:
+            inserted = await self._collection.insert_many(documents, chunk_size)
+            result.rows = inserted.inserted_count
+            return inserted
+
+    @override
+    async def update_many(self, filters: Where, params: TDocument) -> UpdateManyResult:
+        with self._instrumented("update_many", filters) as result:
+            updated = await self._collection.update_many(filters, params)
+            result.rows = updated.modified_count
+            return updated
+
+    @override
+    async def delete_many(self, filters: Where) -> DeleteManyResult:
+        with self._instrumented("delete_many", filters) as result:
+            deleted = await self._collection.delete_many(filters)
+            result.rows = deleted.deleted_count
+            return deleted
+
+    @override
+    async def bulk_write(
+        self,
+        operations: Sequence[WriteOperation[TDocument]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkWriteResult:
+        with self._instrumented("bulk_write", None) as result:
+            written = await self._collection.bulk_write(operations, chunk_size)
+            result.rows = (
+                written.inserted_count
+                + written.modified_count
+                + written.upserted_count
+                + written.deleted_count
+            )
+            return written
@@ -1,10 +1,12 @@
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Optional, Sequence
 import os
 from dotenv import load_dotenv
 from passlib.context import CryptContext  # ✅ NEW
 
+from vibero.core.tracing import traced
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -16,6 +18,7 @@ ACCESS_TOKEN_EXPIRE_DAYS = 7
 
 
 # --- Token Management ---
+@traced("security.create_session_token")
 def create_session_token(user_id: str) -> str:
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
     payload = {
@@ -25,21 +28,106 @@ def create_session_token(user_id: str) -> str:
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_session_token(token: str) -> Optional[str]:
+@traced("security.decode_session_token")
+def decode_session_token(token: str) -> Optional[dict[str, Any]]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
 
+@traced("security.verify_session_token")
+def verify_session_token(token: str) -> Optional[str]:
+    payload = decode_session_token(token)
+    return payload.get("sub") if payload else None
+
+
 # --- Password Security --- ✅ NEW
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes of every listed scheme verify, but only the first one is used for new
+# hashes. With deprecated="auto", hashes of any other scheme, or with a cost
+# differing from the configured one, report needs_update() and are transparently
+# rehashed on the next successful login.
+PASSWORD_HASH_SCHEMES = [
+    scheme.strip()
+    for scheme in os.getenv("PASSWORD_HASH_SCHEMES", "bcrypt").split(",")
+    if scheme.strip()
+]
+
+DEFAULT_BCRYPT_ROUNDS = 12
+
+# CryptContext setting -> environment variable holding its value
+_PASSWORD_HASH_COST_SETTINGS = {
+    "bcrypt__rounds": "BCRYPT_ROUNDS",
+    "argon2__time_cost": "ARGON2_TIME_COST",
+    "argon2__memory_cost": "ARGON2_MEMORY_COST",
+    "argon2__parallelism": "ARGON2_PARALLELISM",
+    "scrypt__rounds": "SCRYPT_ROUNDS",
+    "scrypt__block_size": "SCRYPT_BLOCK_SIZE",
+    "scrypt__parallelism": "SCRYPT_PARALLELISM",
+}
+
+
+def create_password_context(
+    schemes: Sequence[str] = ("bcrypt",),
+    **cost_settings: int,
+) -> CryptContext:
+    """Creates a CryptContext hashing with schemes[0] and verifying all of them.
+
+    bcrypt is always kept verifiable, since existing users hold bcrypt hashes.
+    Cost settings are given as CryptContext keywords, e.g. bcrypt__rounds=12;
+    settings of schemes that are not listed are ignored.
+    """
+    schemes = list(schemes) + ([] if "bcrypt" in schemes else ["bcrypt"])
+
+    # Hashes are only flagged for a cost update once the cost is set explicitly
+    cost_settings.setdefault("bcrypt__rounds", DEFAULT_BCRYPT_ROUNDS)
 
+    context = CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        **{
+            key: value
+            for key, value in cost_settings.items()
+            if key.split("__")[0] in schemes
+        },
+    )
 
+    if not context.handler(schemes[0]).has_backend():
+        raise RuntimeError(
+            f"No backend is installed for password hash scheme '{schemes[0]}'."
+        )
+
+    return context
+
+
+def _password_hash_cost_settings_from_env() -> dict[str, Any]:
+    return {
+        key: int(value)
+        for key, variable in _PASSWORD_HASH_COST_SETTINGS.items()
+        if (value := os.getenv(variable))
+    }
+
+
+pwd_ctx = create_password_context(
+    PASSWORD_HASH_SCHEMES,
+    **_password_hash_cost_settings_from_env(),
+)
+
+
+@traced("security.hash_password")
 def hash_password(password: str) -> str:
     return pwd_ctx.hash(password)
 
 
+@traced("security.verify_password")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_ctx.verify(plain_password, hashed_password)
+
+
+@traced("security.verify_and_update_password")
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    """Verifies the password and, if its hash is outdated, returns a new hash of it."""
+    return pwd_ctx.verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Any, Mapping, Optional
+
+from vibero.core.users import User, UserId
+
+
+@dataclass(frozen=True)
+class _CachedSession:
+    claims: Mapping[str, Any]
+    user: User
+    expires_at: float
+
+
+class SessionCache:
+    """A bounded LRU cache of verified session tokens, holding their decoded
+    claims and the user they belong to, so that resolving a session needs
+    neither a JWT verification nor a database read.
+
+    An entry lives for at most `ttl` seconds, and never past the token's own
+    `exp` claim. Since the cached user goes stale when it is updated or deleted,
+    writers must call invalidate_user() accordingly.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._sessions: OrderedDict[str, _CachedSession] = OrderedDict()
+        self._tokens_by_user: dict[UserId, set[str]] = {}
+
+    def get(self, token: str) -> Optional[User]:
+        session = self._sessions.get(token)
+        if session is None:
+            return None
+
+        if session.expires_at <= time.time():
+            self._remove(token)
+            return None
+
+        self._sessions.move_to_end(token)
+        return session.user
+
+    def put(self, token: str, claims: Mapping[str, Any], user: User) -> None:
+        expires_at = time.time() + self._ttl
+        if "exp" in claims:
+            expires_at = min(expires_at, float(claims["exp"]))
+
+        self._remove(token)
+        self._sessions[token] = _CachedSession(claims, user, expires_at)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+
+        while len(self._sessions) > self._max_size:
+            self._remove(next(iter(self._sessions)))
+
+    def invalidate_token(self, token: str) -> None:
+        self._remove(token)
+
+    def invalidate_user(self, user_id: UserId) -> None:
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._remove(token)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _remove(self, token: str) -> None:
+        session = self._sessions.pop(token, None)
+        if session is None:
+            return
+
+        tokens = self._tokens_by_user[session.user.id]
+        tokens.discard(token)
+        if not tokens:
+            del self._tokens_by_user[session.user.id]
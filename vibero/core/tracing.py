@@ -0,0 +1,373 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+from dataclasses import dataclass, field
+import functools
+import inspect
+import logging
+from pathlib import Path
+import secrets
+import time
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    TypeVar,
+    cast,
+)
+from typing_extensions import override
+
+import orjson
+
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import QueueLogHandler
+
+SpanKind = Literal["internal", "server"]
+SpanStatus = Literal["unset", "ok", "error"]
+
+AttributeValue = str | int | float | bool
+
+TCallable = TypeVar("TCallable", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    kind: SpanKind
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+    status: SpanStatus = "unset"
+    status_message: Optional[str] = None
+    _trace: Optional["_Trace"] = field(default=None, repr=False, compare=False)
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1e9
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        """Receives the spans of a trace once its root span has ended, then
+        as a follow-up batch each span of it that ends later (e.g. one reading
+        the database for a response body streamed after the request returned).
+        """
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class _Trace:
+    def __init__(self, exporter: SpanExporter) -> None:
+        self.exporter = exporter
+        self.spans: list[Span] = []
+        self.exported = False
+
+
+# Shared by all tracers, so that code without access to a Tracer (see span()
+# and traced()) can still add child spans to the trace of the current request.
+_current_span = contextvars.ContextVar[Optional[Span]]("tracing_current_span")
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get(None)
+
+
+class Tracer:
+    """Records nested, timed spans per request, and hands each finished trace
+    (all spans under a root span) over to a SpanExporter.
+
+    Spans are kept in a context variable, like the scopes of
+    ContextualCorrelator, whose correlation id is attached to every root span.
+    """
+
+    def __init__(
+        self,
+        correlator: ContextualCorrelator,
+        exporter: Optional[SpanExporter] = None,
+    ) -> None:
+        self._correlator = correlator
+        self._exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Mapping[str, AttributeValue] = {},
+        kind: SpanKind = "internal",
+    ) -> Iterator[Optional[Span]]:
+        """Opens a span under the current one, or the root span of a new trace."""
+        if self._exporter is None:
+            yield None
+            return
+
+        parent = current_span()
+
+        if parent is not None and parent._trace is not None:
+            new_span = start_span(name, attributes, kind)
+        else:
+            new_span = Span(
+                name=name,
+                trace_id=secrets.token_hex(16),
+                span_id=secrets.token_hex(8),
+                parent_span_id=None,
+                kind=kind,
+                start_time_ns=time.time_ns(),
+                attributes={
+                    **attributes,
+                    "correlation_id": self._correlator.correlation_id,
+                },
+                _trace=_Trace(self._exporter),
+            )
+
+        with _activate(new_span):
+            yield new_span
+
+    def close(self) -> None:
+        if self._exporter:
+            self._exporter.close()
+
+
+def start_span(
+    name: str,
+    attributes: Mapping[str, AttributeValue] = {},
+    kind: SpanKind = "internal",
+) -> Optional[Span]:
+    """Starts a child of the current span, without making it the current one
+    (as needed e.g. around an async generator), or returns None outside a trace.
+
+    The span must be finished with end_span()."""
+    parent = current_span()
+    if parent is None or parent._trace is None:
+        return None
+
+    return Span(
+        name=name,
+        trace_id=parent.trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent.span_id,
+        kind=kind,
+        start_time_ns=time.time_ns(),
+        attributes=dict(attributes),
+        _trace=parent._trace,
+    )
+
+
+def end_span(span: Span, error: Optional[BaseException] = None) -> None:
+    span.end_time_ns = time.time_ns()
+
+    if error is not None:
+        span.status = "error"
+        span.status_message = f"{type(error).__name__}: {error}"
+    elif span.status == "unset":
+        span.status = "ok"
+
+    if trace := span._trace:
+        if trace.exported:
+            trace.exporter.export([span])
+            return
+
+        trace.spans.append(span)
+
+        if span.parent_span_id is None:
+            trace.exported = True
+            trace.exporter.export(trace.spans)
+
+
+@contextmanager
+def span(
+    name: str,
+    attributes: Mapping[str, AttributeValue] = {},
+) -> Iterator[Optional[Span]]:
+    """Opens a child of the current span, if a trace is being recorded."""
+    new_span = start_span(name, attributes)
+
+    if new_span is None:
+        yield None
+        return
+
+    with _activate(new_span):
+        yield new_span
+
+
+def traced(name: str) -> Callable[[TCallable], TCallable]:
+    """Decorates a function (sync or async) to run within a span of this name."""
+
+    def decorator(func: TCallable) -> TCallable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return cast(TCallable, async_wrapper)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return cast(TCallable, wrapper)
+
+    return decorator
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[None]:
+    reset_token = _current_span.set(span)
+    try:
+        yield
+    except BaseException as exc:
+        end_span(span, exc)
+        raise
+    else:
+        end_span(span)
+    finally:
+        _current_span.reset(reset_token)
+
+
+# === Exporters ===
+
+_OTLP_SPAN_KINDS = {"internal": 1, "server": 2}
+_OTLP_STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+
+def _otlp_attribute_value(value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Mapping[str, AttributeValue]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_attribute_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+def to_otlp_json(spans: Sequence[Span], service_name: str = "vibero") -> dict[str, Any]:
+    """Renders spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": service_name})
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "vibero.core.tracing"},
+                        "spans": [
+                            {
+                                "traceId": s.trace_id,
+                                "spanId": s.span_id,
+                                **(
+                                    {"parentSpanId": s.parent_span_id}
+                                    if s.parent_span_id
+                                    else {}
+                                ),
+                                "name": s.name,
+                                "kind": _OTLP_SPAN_KINDS[s.kind],
+                                "startTimeUnixNano": str(s.start_time_ns),
+                                "endTimeUnixNano": str(s.end_time_ns),
+                                "attributes": _otlp_attributes(s.attributes),
+                                "status": {
+                                    "code": _OTLP_STATUS_CODES[s.status],
+                                    **(
+                                        {"message": s.status_message}
+                                        if s.status_message
+                                        else {}
+                                    ),
+                                },
+                            }
+                            for s in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the most recent traces in memory, standing in for a collector:
+    follow-up batches are added to their trace, if it's still kept."""
+
+    def __init__(self, max_traces: int = 1000) -> None:
+        self._traces = deque[list[Span]](maxlen=max_traces)
+
+    @override
+    def export(self, spans: Sequence[Span]) -> None:
+        if spans and (
+            trace := next(
+                (
+                    t
+                    for t in reversed(self._traces)
+                    if t[0].trace_id == spans[0].trace_id
+                ),
+                None,
+            )
+        ):
+            trace.extend(spans)
+        else:
+            self._traces.append(list(spans))
+
+    @property
+    def traces(self) -> list[Sequence[Span]]:
+        return list(self._traces)
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """Appends each trace to a file as one line of OTLP/JSON.
+
+    Writes go through the same queued, batching handler as the logs, so that
+    exporting never blocks a request on disk I/O.
+    """
+
+    def __init__(self, path: Path, service_name: str = "vibero") -> None:
+        self._service_name = service_name
+
+        file_handler = logging.FileHandler(path)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._handler = QueueLogHandler([file_handler])
+
+    @override
+    def export(self, spans: Sequence[Span]) -> None:
+        self._handler.handle(
+            logging.makeLogRecord(
+                {
+                    "levelno": logging.INFO,
+                    "levelname": "INFO",
+                    "msg": orjson.dumps(
+                        to_otlp_json(spans, self._service_name)
+                    ).decode(),
+                }
+            )
+        )
+
+    @override
+    def close(self) -> None:
+        self._handler.close()
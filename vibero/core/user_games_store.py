@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Sequence, NewType
+from typing import AsyncIterator, Optional, Sequence, NewType
 from typing_extensions import TypedDict, override
 from vibero.adapters.db.models import GameModel
-from passlib.context import CryptContext
+from vibero.core.cache import ReadThroughCache
 
+from vibero.core.persistence.common import FieldName, Sort
 from vibero.core.persistence.document_database import (
     BaseDocument,
     DocumentDatabase,
@@ -28,7 +29,22 @@ class Game:
 
 class UserGameRepoStore(ABC):
     @abstractmethod
-    async def get_games_by_username(self, username: str) -> Sequence[Game]: ...
+    async def get_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[Game]: ...
+
+    @abstractmethod
+    def iter_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[Game]: ...
 
 
 class UserGameRepoDocumentStore(UserGameRepoStore):
@@ -53,5 +69,80 @@ class UserGameRepoDocumentStore(UserGameRepoStore):
         return doc  # trusting DB schema for now
 
     @override
-    async def get_games_by_username(self, username: str) -> Sequence[Game]:
-        return await self._collection.find({"username": username})
+    async def get_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[Game]:
+        return await self._collection.find(
+            {"username": {"$eq": username}},
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            projection=projection,
+        )
+
+    @override
+    async def iter_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[Game]:
+        async for game in self._collection.find_iter(
+            {"username": {"$eq": username}},
+            sort=sort,
+            projection=projection,
+        ):
+            yield game
+
+
+class CachedUserGameRepoStore(UserGameRepoStore):
+    """Serves pages of games through a ReadThroughCache, since a storefront
+    page is the same for every visitor. Streams are not cached.
+
+    Games are not written through this store (they are imported into the
+    database directly), so nothing invalidates a cached page: a storefront may
+    be up to the cache's ttl old.
+    """
+
+    def __init__(self, store: UserGameRepoStore, cache: ReadThroughCache) -> None:
+        self._store = store
+        self._cache = cache
+
+    @override
+    async def get_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[Game]:
+        key = repr(
+            (
+                username,
+                tuple(sort) if sort else None,
+                limit,
+                cursor,
+                tuple(projection) if projection else None,
+            )
+        )
+        return await self._cache.get_or_load(
+            f"games:{key}",
+            lambda: self._store.get_games_by_username(
+                username, sort, limit, cursor, projection
+            ),
+        )
+
+    @override
+    def iter_games_by_username(
+        self,
+        username: str,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[Game]:
+        return self._store.iter_games_by_username(username, sort, projection)
@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Sequence, NewType
+from typing import AsyncIterator, Optional, Sequence, NewType
 from typing_extensions import TypedDict, override
 from vibero.adapters.db.models import UserModel
-from passlib.context import CryptContext
+from vibero.core.cache import ReadThroughCache
+from vibero.core.password_hasher import PasswordHasher
 
+from vibero.core.persistence.common import FieldName, Sort
 from vibero.core.persistence.document_database import (
     BaseDocument,
     DocumentDatabase,
@@ -18,6 +20,8 @@ UserId = NewType("UserId", str)
 class UserUpdateParams(TypedDict, total=False):
     username: str
     email: str
+    hashed_password: str
+    role: str
 
 
 @dataclass(frozen=True)
@@ -32,10 +36,23 @@ class User:
 
 class UserStore(ABC):
     @abstractmethod
-    async def create_user(self, username: str, email: str) -> User: ...
+    async def create_user(self, username: str, email: str, password: str) -> User: ...
+
+    @abstractmethod
+    async def list_users(
+        self,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[User]: ...
 
     @abstractmethod
-    async def list_users(self) -> Sequence[User]: ...
+    def iter_users(
+        self,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[User]: ...
 
     @abstractmethod
     async def read_user(self, user_id: UserId) -> User: ...
@@ -51,8 +68,14 @@ class UserStore(ABC):
 
 
 class UserDocumentStore(UserStore):
-    def __init__(self, db: DocumentDatabase, allow_migration: bool = False):
+    def __init__(
+        self,
+        db: DocumentDatabase,
+        password_hasher: PasswordHasher,
+        allow_migration: bool = False,
+    ):
         self._db = db
+        self._password_hasher = password_hasher
         self._allow_migration = allow_migration
         self._collection: Optional[DocumentCollection[User]] = None
 
@@ -75,8 +98,7 @@ class UserDocumentStore(UserStore):
     async def create_user(self, username: str, email: str, password: str) -> User:
         from vibero.core.common import generate_id, default_user_role
 
-        pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        hashed_password = pwd_ctx.hash(password)
+        hashed_password = await self._password_hasher.hash(password)
 
         user = User(
             id=UserId(generate_id()),
@@ -90,26 +112,51 @@ class UserDocumentStore(UserStore):
         return user
 
     @override
-    async def list_users(self) -> list[User]:
-        return await self._collection.find({})
+    async def list_users(
+        self,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[User]:
+        return await self._collection.find(
+            {},
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            projection=projection,
+        )
+
+    @override
+    async def iter_users(
+        self,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[User]:
+        async for user in self._collection.find_iter(
+            {},
+            sort=sort,
+            projection=projection,
+        ):
+            yield user
 
     @override
     async def read_user(self, user_id: UserId) -> User:
-        user = await self._collection.find_one({"id": user_id})
+        user = await self._collection.find_one({"id": {"$eq": user_id}})
         if user is None:
             raise ValueError(f"User with id '{user_id}' not found")
         return user
 
     @override
     async def get_by_username(self, username: str) -> User:
-        user = await self._collection.find_one({"username": username})
+        user = await self._collection.find_one({"username": {"$eq": username}})
         if user is None:
             raise ValueError(f"User with username '{username}' not found")
         return user
 
     @override
     async def update_user(self, user_id: UserId, params: UserUpdateParams) -> User:
-        result = await self._collection.update_one({"id": user_id}, params)
+        result = await self._collection.update_one({"id": {"$eq": user_id}}, params)
         doc = result.updated_document
 
         if doc is None:
@@ -119,9 +166,79 @@ class UserDocumentStore(UserStore):
             id=UserId(doc.id),
             username=doc.username,
             email=doc.email,
+            hashed_password=doc.hashed_password,
             created_at=doc.created_at,
+            role=doc.role,
+        )
+
+    @override
+    async def delete_user(self, user_id: UserId) -> None:
+        await self._collection.delete_one({"id": {"$eq": user_id}})
+
+
+class CachedUserStore(UserStore):
+    """Serves read_user() and get_by_username() through a ReadThroughCache,
+    invalidating a user's entries whenever it is updated or deleted through
+    this store."""
+
+    def __init__(self, store: UserStore, cache: ReadThroughCache) -> None:
+        self._store = store
+        self._cache = cache
+
+    @staticmethod
+    def _tags(user: User) -> list[str]:
+        # Entries keyed by username are tagged by id too, so that renaming a
+        # user also drops the entry under the old name
+        return [f"user:{user.id}"]
+
+    @override
+    async def create_user(self, username: str, email: str, password: str) -> User:
+        return await self._store.create_user(username, email, password)
+
+    @override
+    async def list_users(
+        self,
+        sort: Optional[Sort] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> Sequence[User]:
+        return await self._store.list_users(sort, limit, cursor, projection)
+
+    @override
+    def iter_users(
+        self,
+        sort: Optional[Sort] = None,
+        projection: Optional[Sequence[FieldName]] = None,
+    ) -> AsyncIterator[User]:
+        return self._store.iter_users(sort, projection)
+
+    @override
+    async def read_user(self, user_id: UserId) -> User:
+        return await self._cache.get_or_load(
+            f"user:id:{user_id}",
+            lambda: self._store.read_user(user_id),
+            self._tags,
+        )
+
+    @override
+    async def get_by_username(self, username: str) -> User:
+        return await self._cache.get_or_load(
+            f"user:username:{username}",
+            lambda: self._store.get_by_username(username),
+            self._tags,
         )
 
+    @override
+    async def update_user(self, user_id: UserId, params: UserUpdateParams) -> User:
+        try:
+            return await self._store.update_user(user_id, params)
+        finally:
+            await self._cache.invalidate(f"user:{user_id}")
+
     @override
     async def delete_user(self, user_id: UserId) -> None:
-        await self._collection.delete_one({"id": user_id})
+        try:
+            await self._store.delete_user(user_id)
+        finally:
+            await self._cache.invalidate(f"user:{user_id}")
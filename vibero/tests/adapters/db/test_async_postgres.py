@@ -0,0 +1,181 @@
+pytest_plugins = ["pytest_asyncio"]
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import inspect
+
+from vibero.adapters.db.async_postgres import AsyncPostgresDB, to_async_database_url
+from vibero.adapters.db.models import UserModel
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import StdoutLogger
+from vibero.core.persistence.document_database import (
+    DeleteMany,
+    InsertOne,
+    UpdateOne,
+)
+from vibero.core.users import User, UserId
+
+pytest.importorskip("aiosqlite")
+
+
+def test_sync_postgres_url_is_rewritten_to_asyncpg():
+    assert (
+        to_async_database_url("postgresql://vibero:pw@db:5432/viberodb")
+        == "postgresql+asyncpg://vibero:pw@db:5432/viberodb"
+    )
+    assert (
+        to_async_database_url("postgresql+psycopg2://vibero:pw@db/viberodb")
+        == "postgresql+asyncpg://vibero:pw@db/viberodb"
+    )
+
+
+@pytest.mark.asyncio
+async def test_collection_round_trip_over_async_engine():
+    logger = StdoutLogger(ContextualCorrelator())
+    db = AsyncPostgresDB(logger, database_url="sqlite+aiosqlite://")
+    await db.init_db()
+
+    users = await db.get_or_create_collection(
+        name="users",
+        schema=User,
+        document_loader=None,
+        orm_model=UserModel,
+    )
+
+    await asyncio.gather(
+        *(
+            users.insert_one(
+                User(
+                    id=UserId(f"u{i}"),
+                    username=f"user_{i}",
+                    email=f"user_{i}@example.com",
+                    hashed_password="x",
+                    created_at=datetime.utcnow(),
+                    role="regular",
+                )
+            )
+            for i in range(2)
+        )
+    )
+
+    assert len(await users.find({})) == 2
+    assert [
+        u["username"]
+        async for u in users.find_iter(
+            {}, sort=[("username", "desc")], projection=["username"], batch_size=1
+        )
+    ] == ["user_1", "user_0"]
+
+    updated = await users.update_one({"id": "u0"}, {"email": "new@example.com"})
+    assert updated.updated_document.email == "new@example.com"
+
+    deleted = await users.delete_one({"id": "u1"})
+    assert deleted.deleted_count == 1
+    assert await users.find_one({"id": "u1"}) is None
+
+    await db.close()
+
+
+def make_user(i: int) -> User:
+    return User(
+        id=UserId(f"u{i}"),
+        username=f"user_{i}",
+        email=f"user_{i}@example.com",
+        hashed_password="x",
+        created_at=datetime.utcnow(),
+        role="regular",
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_over_async_engine():
+    db = AsyncPostgresDB(
+        StdoutLogger(ContextualCorrelator()), database_url="sqlite+aiosqlite://"
+    )
+    await db.init_db()
+    users = await db.get_or_create_collection(
+        name="users", schema=User, document_loader=None, orm_model=UserModel
+    )
+
+    inserted = await users.insert_many([make_user(i) for i in range(25)], chunk_size=10)
+    assert inserted.inserted_count == 25
+
+    # Like update_one(), fields the model lacks are ignored
+    updated = await users.update_many(
+        {"id": {"$in": ["u0", "u1"]}}, {"role": "admin", "not_a_column": 1}
+    )
+    assert updated.modified_count == 2
+    assert (
+        await users.update_many({"id": "u2"}, {"not_a_column": 1})
+    ).matched_count == 1
+
+    result = await users.bulk_write(
+        [
+            InsertOne(make_user(100)),
+            InsertOne(make_user(101)),
+            UpdateOne({"id": "u100"}, {"email": "new@example.com"}),
+            DeleteMany({"role": "admin"}),
+        ],
+        chunk_size=1,
+    )
+    assert (result.inserted_count, result.modified_count, result.deleted_count) == (
+        2,
+        1,
+        2,
+    )
+    assert (await users.find_one({"id": "u100"})).email == "new@example.com"
+
+    deleted = await users.delete_many({})
+    assert deleted.deleted_count == 25
+
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_insert_many_is_all_or_nothing():
+    db = AsyncPostgresDB(
+        StdoutLogger(ContextualCorrelator()), database_url="sqlite+aiosqlite://"
+    )
+    await db.init_db()
+    users = await db.get_or_create_collection(
+        name="users", schema=User, document_loader=None, orm_model=UserModel
+    )
+
+    with pytest.raises(Exception):
+        # The duplicate id fails in the second chunk, after the first was sent
+        await users.insert_many(
+            [make_user(0), make_user(1), make_user(0)], chunk_size=2
+        )
+
+    assert await users.find({}) == []
+
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_collections_create_and_drop_their_tables():
+    logger = StdoutLogger(ContextualCorrelator())
+    db = AsyncPostgresDB(logger, database_url="sqlite+aiosqlite://")
+
+    users = await db.create_collection("users", User, orm_model=UserModel)
+    await users.insert_one(
+        User(
+            id=UserId("u0"),
+            username="user_0",
+            email="user_0@example.com",
+            hashed_password="x",
+            created_at=datetime.utcnow(),
+            role="regular",
+        )
+    )
+    assert len(await users.find({})) == 1
+
+    await db.delete_collection("users")
+
+    async with db.engine.connect() as conn:
+        tables = await conn.run_sync(
+            lambda sync_conn: inspect(sync_conn).get_table_names()
+        )
+    assert "users" not in tables
+    with pytest.raises(ValueError):
+        await db.delete_collection("users")
@@ -0,0 +1,223 @@
+pytest_plugins = ["pytest_asyncio"]
+import random
+import pytest
+
+from vibero.adapters.db.inmemory import InMemoryDocumentCollection
+from vibero.core.persistence.common import Where, compile_filters
+from vibero.core.persistence.document_database import (
+    BaseDocument,
+    DeleteMany,
+    DeleteOne,
+    InsertOne,
+    UpdateMany,
+    UpdateOne,
+)
+
+
+class GameDocument(BaseDocument, total=False):
+    title: str
+    price: float
+
+
+def make_collection(n: int = 200) -> InMemoryDocumentCollection[GameDocument]:
+    rng = random.Random(42)
+    return InMemoryDocumentCollection(
+        name="games",
+        schema=GameDocument,
+        data=[
+            {
+                "id": f"g{i}",
+                "version": "0.1.0",
+                "title": f"title_{i % 17}",
+                "price": float(rng.randint(0, 50)),
+            }
+            for i in range(n)
+        ],
+        indexes={"id": "hash", "title": "hash", "price": "sorted"},
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "where",
+    [
+        {"id": {"$eq": "g7"}},
+        {"title": {"$in": ["title_3", "title_5"]}},
+        {"price": {"$gt": 10.0, "$lte": 20.0}},
+        {"price": {"$lt": 5.0}},
+        {"price": {"$eq": 7.0}, "title": {"$ne": "title_0"}},
+        {"$and": [{"price": {"$gte": 45.0}}, {"title": {"$eq": "title_1"}}]},
+        {"$or": [{"price": {"$lt": 1.0}}, {"id": {"$eq": "g3"}}]},
+    ],
+)
+async def test_indexed_queries_return_the_same_documents_as_a_scan(where: Where):
+    collection = make_collection()
+    predicate = compile_filters(where)
+
+    expected = [doc for doc in collection._documents.values() if predicate(doc)]
+
+    assert await collection.find(where) == expected
+
+
+@pytest.mark.asyncio
+async def test_indexed_lookup_only_visits_matching_candidates():
+    collection = make_collection()
+
+    assert list(collection._candidate_slots({"id": {"$eq": "g7"}})) == [7]
+    assert (
+        len(list(collection._candidate_slots({"$or": [{"id": {"$eq": "g7"}}]}))) == 200
+    )
+
+
+@pytest.mark.asyncio
+async def test_indexes_stay_consistent_through_writes():
+    collection = make_collection(n=3)
+
+    await collection.update_one({"id": {"$eq": "g1"}}, {"price": 99.0, "title": "new"})
+    await collection.delete_one({"id": {"$eq": "g2"}})
+    await collection.insert_one(
+        {"id": "g3", "version": "0.1.0", "title": "new", "price": 1.0}
+    )
+
+    assert [d["id"] for d in await collection.find({"title": {"$eq": "new"}})] == [
+        "g1",
+        "g3",
+    ]
+    assert [d["id"] for d in await collection.find({"price": {"$gt": 50.0}})] == ["g1"]
+    assert await collection.find({"id": {"$eq": "g2"}}) == []
+
+
+@pytest.mark.asyncio
+async def test_updated_documents_keep_their_position():
+    collection = make_collection(n=3)
+
+    await collection.update_one({"id": {"$eq": "g0"}}, {"price": 99.0})
+    await collection.update_many({"id": {"$eq": "g1"}}, {"price": 99.0})
+
+    # Unindexed and indexed scans alike
+    assert [d["id"] for d in await collection.find({})] == ["g0", "g1", "g2"]
+    assert [d["id"] for d in await collection.find({"id": {"$ne": "x"}})] == [
+        "g0",
+        "g1",
+        "g2",
+    ]
+    assert [d["id"] for d in await collection.find({"price": {"$eq": 99.0}})] == [
+        "g0",
+        "g1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_find_iter_yields_what_find_returns():
+    collection = make_collection()
+    where: Where = {"price": {"$gte": 25.0}}
+    sort = [("price", "desc")]
+
+    streamed = [d async for d in collection.find_iter(where, sort=sort, batch_size=7)]
+
+    assert streamed == list(await collection.find(where, sort=sort))
+
+
+@pytest.mark.asyncio
+async def test_find_iter_skips_documents_deleted_while_iterating():
+    collection = make_collection(n=3)
+    seen: list[str] = []
+
+    async for document in collection.find_iter({}):
+        seen.append(document["id"])
+        if document["id"] == "g0":
+            await collection.delete_one({"id": {"$eq": "g1"}})
+
+    assert seen == ["g0", "g2"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_operations_keep_indexes_consistent():
+    collection = make_collection(0)
+
+    inserted = await collection.insert_many(
+        [
+            {"id": f"g{i}", "version": "0.1.0", "title": "t", "price": float(i)}
+            for i in range(10)
+        ]
+    )
+    assert inserted.inserted_count == 10
+
+    updated = await collection.update_many({"price": {"$lt": 5.0}}, {"title": "cheap"})
+    assert updated.modified_count == 5
+
+    deleted = await collection.delete_many({"title": {"$eq": "t"}})
+    assert deleted.deleted_count == 5
+
+    assert [d["id"] for d in await collection.find({"title": {"$eq": "cheap"}})] == [
+        f"g{i}" for i in range(5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_applies_operations_in_order():
+    collection = make_collection(3)
+
+    result = await collection.bulk_write(
+        [
+            InsertOne({"id": "new", "version": "0.1.0", "title": "t", "price": 1.0}),
+            UpdateOne({"id": {"$eq": "new"}}, {"price": 2.0}),
+            UpdateOne(
+                {"id": {"$eq": "upserted"}},
+                {"id": "upserted", "version": "0.1.0", "title": "u", "price": 3.0},
+                upsert=True,
+            ),
+            UpdateMany({"id": {"$in": ["g0", "g1"]}}, {"title": "sale"}),
+            DeleteOne({"id": {"$eq": "g2"}}),
+            DeleteMany({"title": {"$eq": "sale"}}),
+        ]
+    )
+
+    assert (
+        result.inserted_count,
+        result.matched_count,
+        result.modified_count,
+        result.upserted_count,
+        result.deleted_count,
+    ) == (1, 3, 3, 1, 3)
+    assert {d["id"]: d["price"] for d in await collection.find({})} == {
+        "new": 2.0,
+        "upserted": 3.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_insert_many_inserts_nothing_if_a_document_is_invalid():
+    collection = make_collection(0)
+
+    with pytest.raises(Exception):
+        await collection.insert_many(
+            [
+                {"id": "g0", "version": "0.1.0", "title": "t", "price": 1.0},
+                {"id": "g1"},
+            ]
+        )
+
+    assert await collection.find({}) == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_applies_nothing_if_an_operation_fails():
+    collection = make_collection(3)
+    before = await collection.find({})
+
+    with pytest.raises(TypeError):
+        await collection.bulk_write(
+            [
+                DeleteMany({"id": {"$eq": "g0"}}),
+                InsertOne(
+                    {"id": "new", "version": "0.1.0", "title": "t", "price": 1.0}
+                ),
+                # Partial params can't be inserted
+                UpdateOne({"id": {"$eq": "missing"}}, {"price": 2.0}, upsert=True),
+            ]
+        )
+
+    assert await collection.find({}) == before
+    assert [d["id"] for d in await collection.find({"id": {"$eq": "g0"}})] == ["g0"]
+    assert await collection.find({"id": {"$eq": "new"}}) == []
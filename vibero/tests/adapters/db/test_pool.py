@@ -0,0 +1,69 @@
+pytest_plugins = ["pytest_asyncio"]
+from pathlib import Path
+import pytest
+
+from vibero.adapters.db.async_postgres import AsyncPostgresDB
+from vibero.adapters.db.pool import PoolConfig
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import StdoutLogger
+from vibero.core.metrics import MetricsRegistry
+
+pytest.importorskip("aiosqlite")
+
+
+def test_pool_config_is_read_from_the_environment(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "-1")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+
+    config = PoolConfig.from_env()
+
+    assert config.pool_size == 20
+    assert config.max_overflow == PoolConfig().max_overflow
+    assert config.pool_recycle == -1
+    assert config.pool_pre_ping is False
+
+
+@pytest.mark.asyncio
+async def test_pool_state_is_reported_in_health_and_metrics(tmp_path: Path):
+    metrics = MetricsRegistry()
+    db = AsyncPostgresDB(
+        StdoutLogger(ContextualCorrelator()),
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        pool_config=PoolConfig(pool_size=2, max_overflow=1),
+        metrics=metrics,
+    )
+
+    try:
+        async with db.engine.connect():
+            health = await db.check_health()
+
+            assert health.healthy
+            assert health.pools["primary"].size == 2
+            # The ping's own connection is back in the pool by now
+            assert health.pools["primary"].checked_out == 1
+            assert health.pools["primary"].utilization == pytest.approx(1 / 3)
+
+        rendered = metrics.render_prometheus()
+        assert 'db_pool_checkout_wait_seconds_count{pool="primary"} 2' in rendered
+        assert 'db_pool_connections{pool="primary",state="idle"} 2' in rendered
+        assert 'db_pool_utilization{pool="primary"} 0.0' in rendered
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_database_is_reported_unhealthy(tmp_path: Path):
+    db = AsyncPostgresDB(
+        StdoutLogger(ContextualCorrelator()),
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'pool.db'}",
+        pool_config=PoolConfig(),
+    )
+
+    try:
+        health = await db.check_health()
+    finally:
+        await db.close()
+
+    assert not health.healthy
+    assert health.error
@@ -0,0 +1,109 @@
+pytest_plugins = ["pytest_asyncio"]
+from datetime import datetime
+from pathlib import Path
+import time
+from typing import Optional
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from vibero.adapters.db.async_postgres import AsyncPostgresDB
+from vibero.adapters.db.models import Base, UserModel
+from vibero.adapters.db.replicas import ReadRouter
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import StdoutLogger
+from vibero.core.users import User, UserId
+
+pytest.importorskip("aiosqlite")
+
+
+def test_reads_are_spread_over_replicas_in_turn():
+    router = ReadRouter("primary", ["replica-0", "replica-1"])
+
+    assert [router.for_read() for _ in range(4)] == [
+        "replica-0",
+        "replica-1",
+        "replica-0",
+        "replica-1",
+    ]
+
+
+def test_reads_go_to_the_least_loaded_replica(tmp_path: Path):
+    busy, idle = (
+        create_engine(f"sqlite:///{tmp_path / name}", poolclass=QueuePool)
+        for name in ("busy.db", "idle.db")
+    )
+    router = ReadRouter("primary", [busy, idle], selection="least_loaded")
+
+    with busy.connect():
+        assert router.for_read() is idle
+
+
+def test_writers_read_their_writes_from_the_primary_within_the_window():
+    writer: Optional[str] = "session-a"
+    router = ReadRouter(
+        "primary",
+        ["replica"],
+        read_your_writes_window=0.05,
+        consistency_key=lambda: writer,
+    )
+
+    router.record_write()
+
+    assert router.for_read() == "primary"
+    writer = "session-b"
+    assert router.for_read() == "replica"
+
+    writer = "session-a"
+    time.sleep(0.06)
+    assert router.for_read() == "replica"
+
+
+def test_writes_without_a_writer_are_not_tracked():
+    router = ReadRouter("primary", ["replica"], consistency_key=lambda: None)
+
+    router.record_write()
+
+    assert router.for_read() == "replica"
+
+
+@pytest.mark.asyncio
+async def test_collection_reads_are_routed_to_the_replica(tmp_path: Path):
+    # Two unrelated databases, so a read shows which one it was routed to
+    db = AsyncPostgresDB(
+        StdoutLogger(ContextualCorrelator()),
+        database_url=f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        replica_urls=[f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"],
+        read_your_writes_window=0.05,
+        consistency_key=lambda: "session",
+    )
+    await db.init_db()
+    [replica] = db.read_router.replicas
+    async with replica.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    users = await db.get_or_create_collection(
+        name="users", schema=User, document_loader=None, orm_model=UserModel
+    )
+
+    await users.insert_one(
+        User(
+            id=UserId("u0"),
+            username="user_0",
+            email="user_0@example.com",
+            hashed_password="x",
+            created_at=datetime.utcnow(),
+            role="regular",
+        )
+    )
+
+    assert await users.find_one({"id": "u0"}) is not None
+
+    time.sleep(0.06)
+    assert await users.find_one({"id": "u0"}) is None
+
+    health = await db.check_health()
+    assert health.healthy
+    assert set(health.pools) == {"primary", "replica-0"}
+
+    await db.close()
@@ -0,0 +1,119 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from vibero.adapters.db.models import Base, GameModel
+from vibero.adapters.db.sql_query import (
+    affected_count,
+    batch_inserts,
+    documents_from_result,
+    select_documents,
+    update_documents,
+)
+from vibero.adapters.db.sql_where import where_to_sql
+from vibero.core.persistence.common import Where, encode_cursor, matches_filters
+from vibero.core.persistence.document_database import DeleteOne, InsertOne
+
+GAMES = [
+    dict(id="g1", title="Alpha", price=10.0, discount=0.0),
+    dict(id="g2", title="Beta", price=20.0, discount=0.5),
+    dict(id="g3", title="Gamma", price=30.0, discount=0.0),
+    dict(id="g4", title="Delta", price=40.0, discount=0.25),
+]
+
+
+@pytest.fixture
+def session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for game in GAMES:
+            session.add(
+                GameModel(
+                    **game,
+                    user_id="u1",
+                    username="publisher",
+                    image="img.png",
+                    created_at=datetime.utcnow(),
+                )
+            )
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize(
+    "where",
+    [
+        {},
+        {"id": {"$eq": "g2"}},
+        {"title": {"$ne": "Alpha"}},
+        {"price": {"$gt": 10.0, "$lte": 30.0}},
+        {"price": {"$gte": 20.0}, "discount": {"$lt": 0.5}},
+        {"id": {"$in": ["g1", "g3", "nope"]}},
+        {"id": {"$nin": ["g1", "g3"]}},
+        {"discount": {"$ne": 0.5}},
+        {"discount": {"$nin": [0.0]}},
+        {"$or": [{"price": {"$lt": 15.0}}, {"price": {"$gt": 35.0}}]},
+        {
+            "$and": [
+                {"price": {"$gt": 10.0}},
+                {"$or": [{"id": {"$eq": "g2"}}, {"id": {"$eq": "g4"}}]},
+            ]
+        },
+    ],
+)
+def test_sql_filter_matches_in_memory_semantics(session: Session, where: Where):
+    rows = session.query(GameModel).filter(where_to_sql(GameModel, where)).all()
+
+    assert sorted(row.id for row in rows) == sorted(
+        game["id"] for game in GAMES if matches_filters(where, game)
+    )
+
+
+def test_bare_literal_is_treated_as_equality(session: Session):
+    rows = session.query(GameModel).filter(where_to_sql(GameModel, {"id": "g3"})).all()
+    assert [row.id for row in rows] == ["g3"]
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        where_to_sql(GameModel, {"rating": {"$gt": 3}})
+
+
+def test_keyset_pages_are_computed_in_sql(session: Session):
+    sort = [("price", "desc")]
+    seen: list[str] = []
+    cursor = None
+
+    while True:
+        statement = select_documents(
+            GameModel, {}, sort=sort, limit=3, cursor=cursor, projection=["title"]
+        )
+        page = documents_from_result(session.execute(statement), ["title"])
+        seen.extend(row["id"] for row in page)
+
+        if len(page) < 3:
+            break
+        cursor = encode_cursor(page[-1], sort)
+
+    assert seen == ["g4", "g3", "g2", "g1"]
+    assert set(page[0]) == {"title", "price", "id"}
+
+
+def test_updates_set_known_fields_or_count_the_matches(session: Session):
+    cheap = {"price": {"$lt": 25.0}}
+
+    updated = update_documents(GameModel, cheap, {"discount": 0.1, "unknown": 1})
+    assert affected_count(session.execute(updated)) == 2
+
+    counted = update_documents(GameModel, cheap, {"unknown": 1})
+    assert affected_count(session.execute(counted)) == 2
+
+
+def test_consecutive_inserts_of_a_bulk_write_are_batched():
+    delete = DeleteOne({"id": "g1"})
+
+    assert list(
+        batch_inserts([InsertOne("a"), InsertOne("b"), delete, InsertOne("c")])
+    ) == [["a", "b"], delete, ["c"]]
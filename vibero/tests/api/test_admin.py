@@ -0,0 +1,71 @@
+pytest_plugins = ["pytest_asyncio"]
+import httpx
+import pytest
+from fastapi import status
+from lagom import Container
+
+from vibero.core.users import UserStore
+
+
+async def sign_in(
+    async_client: httpx.AsyncClient,
+    container: Container,
+    role: str,
+) -> dict[str, str]:
+    response = await async_client.post(
+        "/users",
+        json={
+            "username": f"{role}_user",
+            "email": f"{role}@example.com",
+            "password": "secret123",
+        },
+    )
+    await container[UserStore].update_user(response.json()["id"], {"role": role})
+
+    response = await async_client.post(
+        f"/users/{role}_user/login", json={"password": "secret123"}
+    )
+    return {"session": response.cookies["session"]}
+
+
+@pytest.mark.asyncio
+async def test_query_stats_can_be_read_and_reset(
+    async_client: httpx.AsyncClient, container: Container
+):
+    session = await sign_in(async_client, container, "admin")
+    await async_client.get("/store/some_user/games")
+    await async_client.get("/store/other_user/games")
+
+    response = await async_client.get("/admin/query-stats", cookies=session)
+
+    assert response.status_code == status.HTTP_200_OK
+    stats = {(s["collection"], s["operation"]): s for s in response.json()}
+    games_stats = stats[("games", "find")]
+    assert games_stats["shape"] == '{"username": {"$eq": "?"}}'
+    assert games_stats["calls"] == 2
+
+    response = await async_client.delete("/admin/query-stats", cookies=session)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await async_client.get("/admin/query-stats", cookies=session)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_query_stats_require_authentication(async_client: httpx.AsyncClient):
+    for method in ("GET", "DELETE"):
+        response = await async_client.request(method, "/admin/query-stats")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_query_stats_require_the_admin_role(
+    async_client: httpx.AsyncClient, container: Container
+):
+    session = await sign_in(async_client, container, "regular")
+
+    for method in ("GET", "DELETE"):
+        response = await async_client.request(
+            method, "/admin/query-stats", cookies=session
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,110 @@
+pytest_plugins = ["pytest_asyncio"]
+import json
+import httpx
+import pytest
+from fastapi import status
+from lagom import Container
+from starlette.responses import JSONResponse
+from starlette.types import Receive, Scope, Send
+
+from vibero.api.compression import CompressionMiddleware, negotiate_encoding
+from vibero.core.metrics import MetricsRegistry
+from vibero.tests.api.test_user_games_store import add_games
+
+
+def test_negotiate_encoding_by_quality_then_server_preference():
+    assert negotiate_encoding("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("*", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("*, br;q=0", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["br", "gzip"]) is None
+    assert negotiate_encoding("", ["br", "gzip"]) is None
+
+
+@pytest.mark.asyncio
+async def test_compress_large_storefront_and_reuse_the_body_per_etag(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 50)
+
+    first = await async_client.get(
+        "/store/publisher/games", headers={"Accept-Encoding": "gzip"}
+    )
+    second = await async_client.get(
+        "/store/publisher/games", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert int(first.headers["content-length"]) < len(first.content)
+    assert len(first.json()) == 50
+    assert second.content == first.content
+
+    exposition = container[MetricsRegistry].render_prometheus()
+    assert (
+        'http_compressed_responses_total{encoding="gzip",source="compressed"} 1'
+        in exposition
+    )
+    assert (
+        'http_compressed_responses_total{encoding="gzip",source="cached"} 1'
+        in exposition
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_small_or_unaccepted_responses_as_is(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 50)
+
+    small = await async_client.get(
+        "/store/publisher/games?limit=1", headers={"Accept-Encoding": "gzip"}
+    )
+    unaccepted = await async_client.get(
+        "/store/publisher/games", headers={"Accept-Encoding": "identity"}
+    )
+
+    for response in (small, unaccepted):
+        assert response.status_code == status.HTTP_200_OK
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["vary"]
+
+
+@pytest.mark.asyncio
+async def test_compress_streams_as_they_go(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 3)
+
+    response = await async_client.get(
+        "/store/publisher/games?stream=ndjson", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [
+        f"publisher_g{i}" for i in range(3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_do_not_reuse_a_compressed_body_once_the_content_changed():
+    body = {"games": list(range(500))}
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        # An ETag that, unlike the content, never changes
+        await JSONResponse(body, headers={"ETag": 'W/"fixed"'})(scope, receive, send)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=CompressionMiddleware(app)),
+        base_url="http://test",
+    ) as client:
+        assert (
+            await client.get("/", headers={"Accept-Encoding": "gzip"})
+        ).json() == body
+
+        body = {"games": list(range(700))}
+
+        response = await client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == body
@@ -0,0 +1,12 @@
+pytest_plugins = ["pytest_asyncio"]
+import httpx
+import pytest
+from fastapi import status
+
+
+@pytest.mark.asyncio
+async def test_database_health_is_reported(async_client: httpx.AsyncClient):
+    response = await async_client.get("/health/db")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["healthy"] is True
@@ -0,0 +1,25 @@
+pytest_plugins = ["pytest_asyncio"]
+import httpx
+import pytest
+from fastapi import status
+
+
+@pytest.mark.asyncio
+async def test_metrics_expose_request_durations_by_route(
+    async_client: httpx.AsyncClient,
+):
+    await async_client.get("/store/some_user/games")
+    await async_client.get("/store/other_user/games")
+
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/store/{username}/games",status="200"} 2'
+    ) in response.text
+    assert (
+        'operation_duration_seconds_count{operation="HTTP Request: GET",'
+        'outcome="success"}'
+    ) in response.text
@@ -0,0 +1,195 @@
+pytest_plugins = ["pytest_asyncio"]
+from datetime import datetime, timedelta
+import json
+import httpx
+import pytest
+from fastapi import status
+from lagom import Container
+
+from vibero.adapters.db.inmemory import InMemoryDocumentDatabase
+from vibero.api.common import NEXT_CURSOR_HEADER
+from vibero.core.tracing import InMemorySpanExporter
+
+
+async def add_games(container: Container, username: str, count: int) -> None:
+    games = await container[InMemoryDocumentDatabase].get_collection(
+        name="games", schema=dict, document_loader=None
+    )
+    for i in range(count):
+        await games.insert_one(
+            {
+                "id": f"{username}_g{i}",
+                "user_id": "u1",
+                "username": username,
+                "title": f"Game {i}",
+                "image": "cover.png",
+                "price": float(i % 3),
+                "discount": 0.0,
+                "created_at": datetime(2025, 1, 1) + timedelta(days=i),
+            }
+        )
+
+
+@pytest.mark.asyncio
+async def test_list_store_games(async_client: httpx.AsyncClient, container: Container):
+    await add_games(container, "publisher", 3)
+    await add_games(container, "other", 2)
+
+    response = await async_client.get("/store/publisher/games")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [g["id"] for g in response.json()] == [f"publisher_g{i}" for i in range(3)]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_paginate_store_games_with_cursor(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 7)
+
+    seen: list[str] = []
+    params = {"sort": "-price,created_at", "limit": "3"}
+
+    while True:
+        response = await async_client.get("/store/publisher/games", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        seen.extend(g["id"] for g in response.json())
+
+        if not (cursor := response.headers.get(NEXT_CURSOR_HEADER)):
+            break
+        params["cursor"] = cursor
+
+    assert seen == [
+        "publisher_g2",
+        "publisher_g5",
+        "publisher_g1",
+        "publisher_g4",
+        "publisher_g0",
+        "publisher_g3",
+        "publisher_g6",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_project_store_game_fields(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 2)
+
+    response = await async_client.get(
+        "/store/publisher/games", params={"fields": "id,title"}
+    )
+
+    assert response.json() == [
+        {"id": "publisher_g0", "title": "Game 0"},
+        {"id": "publisher_g1", "title": "Game 1"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reject_a_cursor_taken_with_another_sort(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 3)
+
+    first_page = await async_client.get(
+        "/store/publisher/games", params={"sort": "price", "limit": "1"}
+    )
+    response = await async_client.get(
+        "/store/publisher/games",
+        params={"sort": "title", "cursor": first_page.headers[NEXT_CURSOR_HEADER]},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_stream_store_games_as_ndjson(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 3)
+
+    response = await async_client.get(
+        "/store/publisher/games", params={"stream": "ndjson", "sort": "-created_at"}
+    )
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [
+        "publisher_g2",
+        "publisher_g1",
+        "publisher_g0",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_store_games_as_json_array(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 2)
+
+    response = await async_client.get(
+        "/store/publisher/games", params={"stream": "json", "fields": "id"}
+    )
+
+    assert response.json() == [{"id": "publisher_g0"}, {"id": "publisher_g1"}]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_traced_down_to_collection_calls(
+    async_client: httpx.AsyncClient,
+    container: Container,
+):
+    await async_client.get("/store/traced_user/games")
+
+    [trace] = container[InMemorySpanExporter].traces
+    spans = {s.name: s for s in trace}
+
+    assert spans["HTTP GET"].attributes["http.route"] == "/store/{username}/games"
+    assert spans["games.find"].parent_span_id == spans["HTTP GET"].span_id
+    assert spans["games.find"].attributes["db.rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_revalidate_store_by_its_content(
+    async_client: httpx.AsyncClient, container: Container
+):
+    await add_games(container, "publisher", 2)
+
+    response = await async_client.get("/store/publisher/games")
+    assert response.headers["cache-control"].startswith("public")
+    etag = response.headers["etag"]
+
+    response = await async_client.get(
+        "/store/publisher/games", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    # Written straight to the database, as e.g. by another server process
+    await add_games(container, "publisher", 3)
+
+    response = await async_client.get(
+        "/store/publisher/games", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 5
+
+
+@pytest.mark.asyncio
+async def test_streamed_collection_reads_are_traced(
+    async_client: httpx.AsyncClient,
+    container: Container,
+):
+    # Enough for several batches, most of them sent after the request returned
+    await add_games(container, "publisher", 3000)
+
+    await async_client.get("/store/publisher/games", params={"stream": "ndjson"})
+
+    trace = container[InMemorySpanExporter].traces[-1]
+    spans = {s.name: s for s in trace}
+    assert spans["games.find_iter"].parent_span_id == spans["HTTP GET"].span_id
+    assert spans["games.find_iter"].attributes["db.rows"] == 3000
@@ -2,12 +2,23 @@ pytest_plugins = ["pytest_asyncio"]
 import httpx
 import pytest
 from fastapi import status
+from lagom import Container
+
+from vibero.core.security import create_password_context
+from vibero.core.session_cache import SessionCache
+from vibero.core.tracing import InMemorySpanExporter
+from vibero.core.users import UserStore
 
 
 @pytest.mark.asyncio
 async def test_create_user(async_client: httpx.AsyncClient):
     response = await async_client.post(
-        "/users", json={"username": "test_user", "email": "test@example.com"}
+        "/users",
+        json={
+            "username": "test_user",
+            "email": "test@example.com",
+            "password": "secret123",
+        },
     )
     assert response.status_code == status.HTTP_201_CREATED
     data = response.json()
@@ -28,10 +39,148 @@ async def test_list_users(async_client: httpx.AsyncClient):
 async def test_delete_user(async_client: httpx.AsyncClient):
     # First create a user
     response = await async_client.post(
-        "/users", json={"username": "delete_me", "email": "delete@example.com"}
+        "/users",
+        json={
+            "username": "delete_me",
+            "email": "delete@example.com",
+            "password": "secret123",
+        },
     )
     user_id = response.json()["id"]
 
     # Then delete
     delete_response = await async_client.delete(f"/users/{user_id}")
     assert delete_response.status_code == status.HTTP_204_NO_CONTENT
+
+
+@pytest.mark.asyncio
+async def test_session_reflects_user_updates(
+    async_client: httpx.AsyncClient,
+    container: Container,
+):
+    response = await async_client.post(
+        "/users",
+        json={
+            "username": "session_user",
+            "email": "session@example.com",
+            "password": "secret123",
+        },
+    )
+    user_id = response.json()["id"]
+
+    response = await async_client.post(
+        "/users/session_user/login", json={"password": "secret123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    session = {"session": response.cookies["session"]}
+
+    response = await async_client.get("/users/session", cookies=session)
+    assert response.json()["username"] == "session_user"
+
+    await async_client.patch(f"/users/{user_id}", json={"username": "renamed_user"})
+
+    response = await async_client.get("/users/session", cookies=session)
+    assert response.json()["username"] == "renamed_user"
+
+    await async_client.delete(f"/users/{user_id}")
+
+    assert container[SessionCache].get(session["session"]) is None
+
+
+@pytest.mark.asyncio
+async def test_session_requires_authentication(async_client: httpx.AsyncClient):
+    response = await async_client.get("/users/session")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await async_client.get("/users/session", cookies={"session": "bad"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Invalid session token"
+
+
+@pytest.mark.asyncio
+async def test_login_traces_password_verification(
+    async_client: httpx.AsyncClient,
+    container: Container,
+):
+    await async_client.post(
+        "/users",
+        json={
+            "username": "traced_user",
+            "email": "traced@example.com",
+            "password": "secret123",
+        },
+    )
+    await async_client.post("/users/traced_user/login", json={"password": "secret123"})
+
+    login_trace = container[InMemorySpanExporter].traces[-1]
+    spans = {s.name: s for s in login_trace}
+
+    assert (
+        spans["security.verify_and_update_password"].trace_id
+        == spans["HTTP POST"].trace_id
+    )
+    assert "security.create_session_token" in spans
+
+
+@pytest.mark.asyncio
+async def test_read_user_is_revalidated_until_updated(async_client: httpx.AsyncClient):
+    user = (
+        await async_client.post(
+            "/users",
+            json={
+                "username": "etag_user",
+                "email": "etag@example.com",
+                "password": "secret123",
+            },
+        )
+    ).json()
+
+    response = await async_client.get(f"/users/{user['id']}")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = await async_client.get(
+        f"/users/{user['id']}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    await async_client.patch(f"/users/{user['id']}", json={"email": "new@example.com"})
+
+    response = await async_client.get(
+        f"/users/{user['id']}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["email"] == "new@example.com"
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_rehashing_on_login_invalidates_cached_sessions(
+    async_client: httpx.AsyncClient,
+    container: Container,
+):
+    response = await async_client.post(
+        "/users",
+        json={
+            "username": "rehashed_user",
+            "email": "rehashed@example.com",
+            "password": "secret123",
+        },
+    )
+    user_id = response.json()["id"]
+
+    response = await async_client.post(
+        "/users/rehashed_user/login", json={"password": "secret123"}
+    )
+    session = {"session": response.cookies["session"]}
+    await async_client.get("/users/session", cookies=session)
+    assert container[SessionCache].get(session["session"]) is not None
+
+    cheap_hash = create_password_context(bcrypt__rounds=4).hash("secret123")
+    await container[UserStore].update_user(user_id, {"hashed_password": cheap_hash})
+    await async_client.post(
+        "/users/rehashed_user/login", json={"password": "secret123"}
+    )
+
+    assert container[SessionCache].get(session["session"]) is None
@@ -6,19 +6,62 @@ from httpx import AsyncClient, ASGITransport
 from typing import AsyncIterator
 
 from vibero.api.app import create_api_app, ASGIApplication
+from vibero.api.compression import CompressionConfig
 from vibero.core.loggers import Logger, StdoutLogger
 from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.health import DatabaseHealthCheck
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.password_hasher import PasswordHasher
+from vibero.core.authentication import Authenticator
+from vibero.core.persistence.coalescing import CoalescingDocumentDatabase
+from vibero.core.persistence.instrumentation import (
+    InstrumentedDocumentDatabase,
+    QueryStats,
+)
+from vibero.core.session_cache import SessionCache
+from vibero.core.tracing import InMemorySpanExporter, Tracer
 from vibero.core.users import UserStore
+from vibero.core.user_games_store import UserGameRepoStore, UserGameRepoDocumentStore
 
-from vibero.adapters.db.inmemory import InMemoryUserStore
+from vibero.adapters.db.inmemory import InMemoryDocumentDatabase, InMemoryUserStore
 
 
-@pytest.fixture
-def container() -> Container:
+@pytest_asyncio.fixture
+async def container() -> Container:
     container = Container()
     container[ContextualCorrelator] = ContextualCorrelator()
-    container[Logger] = StdoutLogger(correlator=container[ContextualCorrelator])
-    container[UserStore] = InMemoryUserStore()
+    container[MetricsRegistry] = MetricsRegistry()
+    container[Logger] = StdoutLogger(
+        correlator=container[ContextualCorrelator],
+        metrics=container[MetricsRegistry],
+    )
+    container[InMemorySpanExporter] = InMemorySpanExporter()
+    container[Tracer] = Tracer(
+        container[ContextualCorrelator],
+        container[InMemorySpanExporter],
+    )
+    container[QueryStats] = QueryStats(
+        container[Logger],
+        container[MetricsRegistry],
+    )
+    container[PasswordHasher] = PasswordHasher(
+        workers=2, metrics=container[MetricsRegistry]
+    )
+    container[UserStore] = InMemoryUserStore(container[PasswordHasher])
+    container[SessionCache] = SessionCache()
+    container[CompressionConfig] = CompressionConfig()
+    container[Authenticator] = Authenticator(
+        container[UserStore], container[SessionCache]
+    )
+
+    games_db = InMemoryDocumentDatabase()
+    container[InMemoryDocumentDatabase] = games_db
+    container[DatabaseHealthCheck] = games_db
+    container[UserGameRepoStore] = await UserGameRepoDocumentStore(
+        CoalescingDocumentDatabase(
+            InstrumentedDocumentDatabase(games_db, container[QueryStats])
+        )
+    ).__aenter__()
     return container
 
 
@@ -0,0 +1,154 @@
+pytest_plugins = ["pytest_asyncio"]
+import asyncio
+from typing import Optional, Sequence
+import pytest
+
+from vibero.adapters.db.inmemory import InMemoryDocumentCollection
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.persistence.coalescing import CoalescingDocumentCollection
+from vibero.core.persistence.common import Where
+from vibero.core.persistence.document_database import BaseDocument
+from vibero.core.tracing import InMemorySpanExporter, Tracer
+
+
+class GameDocument(BaseDocument, total=False):
+    username: str
+
+
+class SlowCollection(InMemoryDocumentCollection[GameDocument]):
+    def __init__(self) -> None:
+        super().__init__(
+            name="games",
+            schema=GameDocument,
+            data=[{"id": "g0", "version": "0.1.0", "username": "publisher"}],
+        )
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def find(self, filters: Where, *args, **kwargs) -> Sequence[GameDocument]:
+        self.calls += 1
+        await self.release.wait()
+        return await super().find(filters, *args, **kwargs)
+
+    async def find_one(self, filters: Where) -> Optional[GameDocument]:
+        self.calls += 1
+        await self.release.wait()
+        raise RuntimeError("database unavailable")
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_reads_share_one_call():
+    slow = SlowCollection()
+    collection = CoalescingDocumentCollection(slow, "games")
+
+    same = [
+        asyncio.create_task(collection.find({"username": {"$eq": "publisher"}}))
+        for _ in range(20)
+    ]
+    other = asyncio.create_task(collection.find({"username": {"$eq": "other"}}))
+    await settle()
+    slow.release.set()
+
+    results = await asyncio.gather(*same)
+    assert await other == []
+    assert slow.calls == 2
+    assert all(r is results[0] for r in results)
+    assert [d["id"] for d in results[0]] == ["g0"]
+
+
+@pytest.mark.asyncio
+async def test_waiting_callers_get_their_result_when_the_first_is_cancelled():
+    slow = SlowCollection()
+    collection = CoalescingDocumentCollection(slow, "games")
+
+    first = asyncio.create_task(collection.find({}))
+    await settle()
+    second = asyncio.create_task(collection.find({}))
+    await settle()
+
+    first.cancel()
+    slow.release.set()
+
+    assert len(await second) == 1
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    slow = SlowCollection()
+    collection = CoalescingDocumentCollection(slow, "games")
+
+    calls = [asyncio.create_task(collection.find_one({})) for _ in range(3)]
+    await settle()
+    slow.release.set()
+
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert slow.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_reads_after_a_write_do_not_join_earlier_reads():
+    slow = SlowCollection()
+    collection = CoalescingDocumentCollection(slow, "games")
+
+    before = asyncio.create_task(collection.find({}))
+    await settle()
+    await collection.insert_one({"id": "g1", "version": "0.1.0", "username": "x"})
+    after = asyncio.create_task(collection.find({}))
+    await settle()
+    slow.release.set()
+
+    await asyncio.gather(before, after)
+    assert slow.calls == 2
+    assert len(await after) == 2
+
+
+@pytest.mark.asyncio
+async def test_reads_routed_differently_do_not_coalesce():
+    slow = SlowCollection()
+    reads_from_primary = False
+    collection = CoalescingDocumentCollection(
+        slow, "games", read_scope=lambda: reads_from_primary
+    )
+
+    # e.g. a read routed to a replica, then one by a client that just wrote
+    replica_read = asyncio.create_task(collection.find({}))
+    await settle()
+    reads_from_primary = True
+    primary_read = asyncio.create_task(collection.find({}))
+    await settle()
+    slow.release.set()
+
+    await asyncio.gather(replica_read, primary_read)
+    assert slow.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_record_the_wait_in_their_own_trace():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(ContextualCorrelator(), exporter)
+    slow = SlowCollection()
+    collection = CoalescingDocumentCollection(slow, "games")
+
+    async def traced_find(name: str) -> None:
+        with tracer.span(name):
+            await collection.find({})
+
+    first = asyncio.create_task(traced_find("first"))
+    await settle()
+    second = asyncio.create_task(traced_find("second"))
+    await settle()
+    slow.release.set()
+    await asyncio.gather(first, second)
+
+    spans = {trace[-1].name: trace[:-1] for trace in exporter.traces}
+    assert spans["first"] == []
+    assert [(s.name, s.attributes) for s in spans["second"]] == [
+        ("games.find", {"db.coalesced": True})
+    ]
@@ -0,0 +1,48 @@
+import pytest
+
+from vibero.core.persistence.common import (
+    Where,
+    _compile_shape,
+    compile_filters,
+    matches_filters,
+)
+
+GAME = {"id": "g1", "title": "Alpha", "price": 20.0, "discount": 0.25}
+
+
+@pytest.mark.parametrize(
+    "where, expected",
+    [
+        ({}, True),
+        ({"id": {"$eq": "g1"}}, True),
+        ({"id": "g1"}, True),
+        ({"id": {"$ne": "g1"}}, False),
+        ({"price": {"$gt": 10.0, "$lt": 20.0}}, False),
+        ({"price": {"$gte": 20.0, "$lte": 20.0}}, True),
+        ({"id": {"$in": ["g0", "g1"]}}, True),
+        ({"id": {"$nin": ["g0", "g1"]}}, False),
+        ({"$or": [{"price": {"$lt": 5.0}}, {"discount": {"$gt": 0.2}}]}, True),
+        ({"$and": [{"price": {"$lt": 50.0}}, {"discount": {"$gt": 0.5}}]}, False),
+        ({"$or": []}, False),
+        ({"$and": []}, True),
+    ],
+)
+def test_compiled_filter_evaluates_operators(where: Where, expected: bool):
+    assert compile_filters(where)(GAME) is expected
+    assert matches_filters(where, GAME) is expected
+
+
+def test_queries_of_the_same_shape_share_a_compiled_plan():
+    compile_filters({"id": {"$eq": "a"}, "price": {"$gt": 1.0}})
+    hits_before = _compile_shape.cache_info().hits
+
+    predicate = compile_filters({"id": {"$eq": "g1"}, "price": {"$gt": 10.0}})
+
+    assert _compile_shape.cache_info().hits > hits_before
+    assert predicate(GAME)
+    assert not predicate({**GAME, "id": "a"})
+
+
+def test_unknown_operator_is_rejected():
+    with pytest.raises(ValueError):
+        compile_filters({"price": {"$between": [1, 2]}})
@@ -0,0 +1,115 @@
+pytest_plugins = ["pytest_asyncio"]
+import asyncio
+from typing import Any
+
+import pytest
+from typing_extensions import TypedDict
+
+from vibero.adapters.db.inmemory import InMemoryDocumentDatabase
+from vibero.core.persistence.common import normalize_where
+from vibero.core.persistence.instrumentation import (
+    InstrumentedDocumentDatabase,
+    QueryStats,
+)
+from vibero.core.loggers import Logger
+
+
+class RecordingLogger(Logger):
+    def __init__(self) -> None:
+        self.warnings: list[tuple[str, dict[str, Any]]] = []
+
+    def set_level(self, log_level: Any) -> None: ...
+    def debug(self, message: str, **fields: Any) -> None: ...
+    def info(self, message: str, **fields: Any) -> None: ...
+    def error(self, message: str, **fields: Any) -> None: ...
+    def critical(self, message: str, **fields: Any) -> None: ...
+    def scope(self, scope_id: str) -> Any: ...
+    def operation(
+        self, name: str, props: dict[str, Any] = {}, sample_key: Any = None
+    ) -> Any: ...
+
+    def warning(
+        self, message: str, *, rate_limit_key: Any = None, **fields: Any
+    ) -> None:
+        self.warnings.append((message, fields))
+
+
+class GameDocument(TypedDict):
+    id: str
+    username: str
+
+
+def test_normalized_filters_keep_their_form_only():
+    assert normalize_where(
+        {"$or": [{"price": {"$lt": 10}}, {"username": "ran_eck"}], "id": {"$in": [1]}}
+    ) == {
+        "$or": [{"price": {"$lt": "?"}}, {"username": {"$eq": "?"}}],
+        "id": {"$in": "?"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_queries_are_aggregated_per_shape_and_slow_ones_logged():
+    logger = RecordingLogger()
+    query_stats = QueryStats(logger, slow_query_threshold=0)
+    db = InstrumentedDocumentDatabase(InMemoryDocumentDatabase(), query_stats)
+    games = await db.get_or_create_collection("games", GameDocument, None)
+
+    for i in range(3):
+        await games.insert_one({"id": f"g{i}", "username": "a" if i else "b"})
+
+    await games.find({"username": {"$eq": "a"}})
+    await games.find({"username": {"$eq": "b"}})
+    await games.find_one({"id": {"$eq": "g0"}})
+
+    stats = {(s.operation, s.shape): s for s in query_stats.snapshot()}
+    find_stats = stats[("find", '{"username": {"$eq": "?"}}')]
+
+    assert find_stats.collection == "games"
+    assert find_stats.calls == 2
+    assert find_stats.rows == 3
+    assert stats[("insert_one", "")].calls == 3
+    assert stats[("find_one", '{"id": {"$eq": "?"}}')].rows == 1
+    assert len(logger.warnings) == 6
+    assert logger.warnings[-1][1]["filters"] == '{"id": {"$eq": "?"}}'
+
+
+@pytest.mark.asyncio
+async def test_iteration_time_excludes_the_callers_time():
+    query_stats = QueryStats(RecordingLogger())
+    db = InstrumentedDocumentDatabase(InMemoryDocumentDatabase(), query_stats)
+    games = await db.get_or_create_collection("games", GameDocument, None)
+    for i in range(3):
+        await games.insert_one({"id": f"g{i}", "username": "a"})
+
+    async for _ in games.find_iter({"username": {"$eq": "a"}}):
+        await asyncio.sleep(0.05)
+
+    stats = {s.operation: s for s in query_stats.snapshot()}
+    assert stats["find_iter"].rows == 3
+    assert stats["find_iter"].total_duration < 0.05
+
+
+@pytest.mark.asyncio
+async def test_inner_iterator_is_closed_when_the_caller_stops_early():
+    db = InstrumentedDocumentDatabase(
+        InMemoryDocumentDatabase(), QueryStats(RecordingLogger())
+    )
+    games = await db.get_or_create_collection("games", GameDocument, None)
+    closed = asyncio.Event()
+
+    async def find_iter(*args: Any) -> Any:
+        try:
+            for i in range(3):
+                yield {"id": f"g{i}", "username": "a"}
+        finally:
+            closed.set()
+
+    games._collection.find_iter = find_iter  # type: ignore[attr-defined]
+
+    documents = games.find_iter({})
+    async for _ in documents:
+        break
+    await documents.aclose()  # type: ignore[attr-defined]
+
+    assert closed.is_set()
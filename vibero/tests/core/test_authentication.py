@@ -0,0 +1,65 @@
+pytest_plugins = ["pytest_asyncio"]
+import pytest
+from lagom import Container
+
+from vibero.core.authentication import AuthenticationError, Authenticator
+from vibero.core.security import create_session_token
+from vibero.core.session_cache import SessionCache
+from vibero.core.users import UserStore
+
+
+@pytest.mark.asyncio
+async def test_user_is_resolved_once_per_scope(container: Container):
+    user_store = container[UserStore]
+    user = await user_store.create_user("auth_user", "auth@example.com", "secret1")
+    authenticator = Authenticator(user_store, SessionCache())
+    token = create_session_token(user.id)
+
+    with authenticator.authentication_scope(token):
+        assert await authenticator.current_user_id() == user.id
+        assert await authenticator.current_user() == user
+
+        await user_store.delete_user(user.id)
+
+        assert await authenticator.current_user() == user
+
+
+@pytest.mark.asyncio
+async def test_claims_do_not_require_the_user(container: Container):
+    authenticator = Authenticator(container[UserStore], SessionCache())
+
+    with authenticator.authentication_scope(create_session_token("nobody")):
+        assert (await authenticator.current_claims())["sub"] == "nobody"
+
+
+@pytest.mark.asyncio
+async def test_missing_or_invalid_tokens_are_rejected(container: Container):
+    authenticator = Authenticator(container[UserStore], SessionCache())
+
+    for token in [None, "not-a-token"]:
+        with authenticator.authentication_scope(token):
+            with pytest.raises(AuthenticationError):
+                await authenticator.current_user()
+
+
+@pytest.mark.asyncio
+async def test_tokens_of_deleted_users_are_rejected(container: Container):
+    user_store = container[UserStore]
+    user = await user_store.create_user("gone_user", "gone@example.com", "secret1")
+    await user_store.delete_user(user.id)
+    authenticator = Authenticator(user_store, SessionCache())
+
+    with authenticator.authentication_scope(create_session_token(user.id)):
+        with pytest.raises(AuthenticationError):
+            await authenticator.current_user()
+
+
+@pytest.mark.asyncio
+async def test_clients_are_told_apart_by_session_or_address(container: Container):
+    authenticator = Authenticator(container[UserStore], SessionCache())
+
+    assert authenticator.current_client_key() is None
+    with authenticator.authentication_scope("token", "10.0.0.1"):
+        assert authenticator.current_client_key() == "token"
+    with authenticator.authentication_scope(None, "10.0.0.1"):
+        assert authenticator.current_client_key() == "address:10.0.0.1"
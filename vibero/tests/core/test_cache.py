@@ -0,0 +1,178 @@
+pytest_plugins = ["pytest_asyncio"]
+import asyncio
+from datetime import datetime
+import pytest
+
+from vibero.adapters.db.inmemory import InMemoryDocumentDatabase, InMemoryUserStore
+from vibero.core.cache import InMemorySharedCache, ReadThroughCache
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.password_hasher import PasswordHasher
+from vibero.core.user_games_store import (
+    CachedUserGameRepoStore,
+    UserGameRepoDocumentStore,
+)
+from vibero.core.users import CachedUserStore
+
+
+class Loader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        return f"value {self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_values_are_loaded_once_until_invalidated():
+    metrics = MetricsRegistry()
+    cache = ReadThroughCache("things", metrics=metrics)
+    load = Loader()
+
+    assert await cache.get_or_load("k", load, lambda _: ["t"]) == "value 1"
+    assert await cache.get_or_load("k", load, lambda _: ["t"]) == "value 1"
+
+    await cache.invalidate("t")
+    assert await cache.get_or_load("k", load, lambda _: ["t"]) == "value 2"
+
+    stats = cache.stats()
+    assert (stats.local_hits, stats.misses) == (1, 2)
+    assert (
+        'cache_lookups_total{cache="things",result="local_hit"} 1'
+        in metrics.render_prometheus()
+    )
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_are_evicted_least_recently_used_first():
+    cache = ReadThroughCache("things", max_size=2, ttl=0.01)
+    load = Loader()
+
+    await cache.get_or_load("a", load)
+    await cache.get_or_load("b", load)
+    await cache.get_or_load("c", load)
+
+    assert cache.stats().size == 2
+
+    expiring = ReadThroughCache("things", ttl=1e-6)
+    await expiring.get_or_load("a", load)
+    await expiring.get_or_load("a", load)
+    assert expiring.stats().misses == 2
+
+
+@pytest.mark.asyncio
+async def test_the_shared_tier_serves_other_processes():
+    shared = InMemorySharedCache()
+    first = ReadThroughCache("a", shared=shared)
+    second = ReadThroughCache("b", shared=shared)
+    load = Loader()
+
+    await first.get_or_load("k", load, lambda _: ["t"])
+    assert await second.get_or_load("k", load, lambda _: ["t"]) == "value 1"
+    assert second.stats().shared_hits == 1
+
+    await first.invalidate("t")
+    await ReadThroughCache("c", shared=shared).get_or_load("k", load)
+    assert load.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_load_errors_are_not_cached():
+    cache = ReadThroughCache("things")
+
+    async def fail() -> str:
+        raise ValueError("not found")
+
+    with pytest.raises(ValueError):
+        await cache.get_or_load("k", fail)
+
+    assert await cache.get_or_load("k", Loader()) == "value 1"
+
+
+@pytest.mark.asyncio
+async def test_values_loaded_across_an_invalidation_are_not_cached():
+    cache = ReadThroughCache("things")
+    loading = asyncio.Event()
+    written = asyncio.Event()
+
+    async def load_before_the_write() -> str:
+        loading.set()
+        await written.wait()
+        return "old"
+
+    read = asyncio.create_task(
+        cache.get_or_load("k", load_before_the_write, lambda _: ["thing:1"])
+    )
+    await loading.wait()
+    await cache.invalidate("thing:1")
+    written.set()
+
+    assert await read == "old"
+    assert await cache.get_or_load("k", Loader(), lambda _: ["thing:1"]) == "value 1"
+
+
+@pytest.mark.asyncio
+async def test_values_loaded_soon_after_an_invalidation_are_not_cached():
+    cache = ReadThroughCache("things", replica_lag=0.05)
+    load = Loader()
+
+    await cache.invalidate("thing:1")
+    await cache.get_or_load("k", load, lambda _: ["thing:1"])
+    await cache.get_or_load("k", load, lambda _: ["thing:1"])
+    assert load.calls == 2
+
+    await asyncio.sleep(0.05)
+    await cache.get_or_load("k", load, lambda _: ["thing:1"])
+    await cache.get_or_load("k", load, lambda _: ["thing:1"])
+    assert load.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_user_store_drops_users_on_update():
+    store = CachedUserStore(
+        InMemoryUserStore(PasswordHasher(workers=1)), ReadThroughCache("users")
+    )
+    user = await store.create_user("old_name", "u@example.com", "password")
+
+    assert (await store.get_by_username("old_name")).id == user.id
+    assert (await store.read_user(user.id)).username == "old_name"
+
+    await store.update_user(user.id, {"username": "new_name"})
+
+    assert (await store.read_user(user.id)).username == "new_name"
+    with pytest.raises(ValueError):
+        await store.get_by_username("old_name")
+
+
+@pytest.mark.asyncio
+async def test_cached_games_are_served_until_they_expire():
+    db = InMemoryDocumentDatabase()
+    store = CachedUserGameRepoStore(
+        await UserGameRepoDocumentStore(db).__aenter__(),
+        ReadThroughCache("games", ttl=0.05),
+    )
+    games = await db.get_collection("games", schema=dict, document_loader=None)
+
+    async def add_game(i: int) -> None:
+        await games.insert_one(
+            {
+                "id": f"g{i}",
+                "user_id": "u1",
+                "username": "publisher",
+                "title": f"Game {i}",
+                "image": "cover.png",
+                "price": 1.0,
+                "discount": 0.0,
+                "created_at": datetime(2025, 1, 1),
+            }
+        )
+
+    await add_game(0)
+    assert len(await store.get_games_by_username("publisher")) == 1
+
+    await add_game(1)
+    assert len(await store.get_games_by_username("publisher")) == 1
+    assert len(await store.get_games_by_username("publisher", limit=5)) == 2
+
+    await asyncio.sleep(0.05)
+    assert len(await store.get_games_by_username("publisher")) == 2
@@ -0,0 +1,28 @@
+import pytest
+
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import StdoutLogger
+
+
+def test_nested_scopes_are_joined():
+    correlator = ContextualCorrelator()
+
+    with correlator.correlation_scope("RID(1)"):
+        with correlator.correlation_scope("task"):
+            assert correlator.correlation_id == "RID(1)::task"
+        assert correlator.correlation_id == "RID(1)"
+
+    assert correlator.correlation_id == "<main>"
+
+
+def test_scopes_are_reset_when_an_exception_escapes():
+    correlator = ContextualCorrelator()
+    logger = StdoutLogger(correlator)
+
+    with pytest.raises(RuntimeError):
+        with correlator.correlation_scope("RID(1)"):
+            with logger.scope("games"):
+                raise RuntimeError()
+
+    assert correlator.correlation_id == "<main>"
+    assert logger.current_scope == ""
@@ -0,0 +1,186 @@
+import io
+import json
+import logging
+import re
+import threading
+
+from vibero.core.common import generate_id
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.loggers import (
+    CorrelationalLogger,
+    LogLevel,
+    LogQueueConfig,
+    LogSampler,
+    LogSampling,
+    QueueLogHandler,
+)
+
+
+class BlockingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.unblocked.wait()
+        self.writes += 1
+        return super().write(text)
+
+
+def test_queued_records_are_written_in_batches_on_close():
+    stream = BlockingStream()
+    logger = CorrelationalLogger(
+        ContextualCorrelator(),
+        logger_id=generate_id(),
+        log_queue=LogQueueConfig(batch_size=100),
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    for i in range(50):
+        logger.info(f"message {i}")
+
+    stream.unblocked.set()
+    logger.close()
+
+    output = stream.getvalue()
+    assert all(f"message {i}" in output for i in range(50))
+    assert stream.writes <= 2
+
+
+def test_records_beyond_the_queue_size_are_dropped_and_reported():
+    stream = BlockingStream()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler = QueueLogHandler([handler], LogQueueConfig(max_size=5))
+    logger = logging.getLogger(generate_id())
+    logger.addHandler(queue_handler)
+
+    for i in range(20):
+        logger.warning(f"message {i}")
+
+    stream.unblocked.set()
+    queue_handler.close()
+
+    written = stream.getvalue().count("message ")
+    assert queue_handler.dropped > 0
+    assert written + queue_handler.dropped == 20
+    reported = re.findall(r"(\d+) log records were dropped", stream.getvalue())
+    assert sum(map(int, reported)) == queue_handler.dropped
+
+
+def test_json_format_renders_fields_and_correlation():
+    stream = io.StringIO()
+    correlator = ContextualCorrelator()
+    logger = CorrelationalLogger(
+        correlator,
+        logger_id=generate_id(),
+        log_format="json",
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    with correlator.correlation_scope("RID(1)"):
+        with logger.scope("games"):
+            logger.info("Games listed", username="ran_eck", count=3)
+
+    entry = json.loads(stream.getvalue())
+    assert entry["event"] == "Games listed"
+    assert entry["level"] == "info"
+    assert entry["correlation_id"] == "RID(1)"
+    assert entry["scopes"] == "[games]"
+    assert entry["username"] == "ran_eck"
+    assert entry["count"] == 3
+
+
+def test_disabled_levels_are_not_formatted():
+    stream = io.StringIO()
+    logger = CorrelationalLogger(
+        ContextualCorrelator(),
+        log_level=LogLevel.INFO,
+        logger_id=generate_id(),
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+    logger._add_correlation_id_and_scopes = None  # type: ignore[assignment]
+
+    logger.debug("Not rendered", count=1)
+
+    assert stream.getvalue() == ""
+
+
+def test_unsampled_operations_are_logged_only_when_failed():
+    stream = io.StringIO()
+    logger = CorrelationalLogger(
+        ContextualCorrelator(),
+        logger_id=generate_id(),
+        log_sampling=LogSampling(operation_sample_rate=3),
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    for _ in range(5):
+        with logger.operation("Request"):
+            pass
+
+    try:
+        with logger.operation("Request"):
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+
+    output = stream.getvalue()
+    assert output.count("Request started") == 2
+    assert output.count("Request finished") == 2
+    assert output.count("Request failed") == 1
+
+
+def test_repeated_warnings_are_rate_limited_per_message():
+    sampler = LogSampler(LogSampling(warning_rate=0.001, warning_burst=2))
+
+    admitted = [sampler.admit_warning("No ORM model")[0] for _ in range(5)]
+
+    assert admitted == [True, True, False, False, False]
+    assert sampler.admit_warning("Another warning") == (True, 0)
+
+
+def test_operations_with_a_sample_key_are_sampled_per_key_once_done():
+    stream = io.StringIO()
+    logger = CorrelationalLogger(
+        ContextualCorrelator(),
+        logger_id=generate_id(),
+        log_sampling=LogSampling(operation_sample_rate=3),
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    for route in ["/games"] * 5 + ["/users/{id}"]:
+        with logger.operation("Request", {"path": "/x"}, sample_key=lambda: route):
+            pass
+
+    output = stream.getvalue()
+    assert "started" not in output
+    assert output.count("Request [{'path': '/x'}] finished") == 3
+
+
+def test_warnings_with_a_rate_limit_key_are_rate_limited_together():
+    stream = io.StringIO()
+    logger = CorrelationalLogger(
+        ContextualCorrelator(),
+        logger_id=generate_id(),
+        log_sampling=LogSampling(warning_rate=0.001, warning_burst=2),
+    )
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    for i in range(5):
+        logger.warning(f"Slow query took {i}s", rate_limit_key="Slow query")
+
+    assert stream.getvalue().count("Slow query took") == 2
+
+
+def test_operation_durations_are_rounded():
+    stream = io.StringIO()
+    logger = CorrelationalLogger(ContextualCorrelator(), logger_id=generate_id())
+    logger.add_handlers([logging.StreamHandler(stream)])
+
+    with logger.operation("Request", {"path": "/games"}):
+        pass
+
+    [duration] = re.findall(r"finished in ([\d.]+)s", stream.getvalue())
+    assert len(duration.partition(".")[2]) <= 3
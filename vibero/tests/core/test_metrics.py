@@ -0,0 +1,44 @@
+from vibero.core.metrics import MetricsRegistry
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "request_seconds", "Request durations", ["route"], buckets=[0.1, 1.0]
+    )
+
+    for value in [0.05, 0.1, 0.5, 3.0]:
+        histogram.observe(value, route='/a"b')
+
+    assert registry.render_prometheus().splitlines() == [
+        "# HELP request_seconds Request durations",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'request_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+        'request_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'request_seconds_sum{route="/a\\"b"} 3.65',
+        'request_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_histograms_are_registered_once_per_name():
+    registry = MetricsRegistry()
+
+    assert registry.histogram("x", "X") is registry.histogram("x", "X")
+
+
+def test_gauges_render_set_values_and_read_functions_on_render():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("connections", "Open connections", ["state"])
+    open_connections = [1, 2]
+
+    gauge.set(3, state="idle")
+    gauge.set_function(lambda: len(open_connections), state="checked_out")
+    open_connections.append(3)
+
+    assert registry.render_prometheus().splitlines() == [
+        "# HELP connections Open connections",
+        "# TYPE connections gauge",
+        'connections{state="idle"} 3',
+        'connections{state="checked_out"} 3',
+    ]
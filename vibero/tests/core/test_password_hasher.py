@@ -0,0 +1,79 @@
+pytest_plugins = ["pytest_asyncio"]
+import asyncio
+import pytest
+
+from vibero.core.metrics import MetricsRegistry
+from vibero.core.password_hasher import PasswordHasher, PasswordHasherOverloadedError
+from vibero.core.security import create_password_context
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_off_the_event_loop():
+    hasher = PasswordHasher(workers=1)
+
+    hashed = await hasher.hash("secret123")
+
+    assert await hasher.verify("secret123", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.stats().completed == 3
+
+
+@pytest.mark.asyncio
+async def test_operations_beyond_capacity_are_rejected():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+
+    results = await asyncio.gather(
+        *(hasher.hash("secret123") for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert [isinstance(r, PasswordHasherOverloadedError) for r in results] == [
+        False,
+        False,
+        True,
+    ]
+    stats = hasher.stats()
+    assert (stats.completed, stats.rejected, stats.saturation) == (2, 1, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_outdated_hashes_are_rehashed_on_verification():
+    hasher = PasswordHasher(workers=1)
+    cheap_hash = create_password_context(bcrypt__rounds=4).hash("secret123")
+
+    is_valid, new_hash = await hasher.verify_and_update("secret123", cheap_hash)
+
+    assert is_valid
+    assert new_hash is not None and new_hash != cheap_hash
+    assert await hasher.verify_and_update("secret123", new_hash) == (True, None)
+    assert await hasher.verify_and_update("wrong", cheap_hash) == (False, None)
+
+
+def test_hashes_of_non_default_schemes_are_deprecated():
+    bcrypt_hash = create_password_context(bcrypt__rounds=4).hash("secret123")
+    context = create_password_context(["scrypt"], scrypt__rounds=4, bcrypt__rounds=4)
+
+    is_valid, new_hash = context.verify_and_update("secret123", bcrypt_hash)
+
+    assert is_valid
+    assert new_hash is not None and new_hash.startswith("$scrypt$ln=4,")
+
+
+@pytest.mark.asyncio
+async def test_pool_saturation_is_exposed_as_metrics():
+    metrics = MetricsRegistry()
+    hasher = PasswordHasher(workers=1, max_pending=1, metrics=metrics)
+
+    hashes = [asyncio.ensure_future(hasher.hash("secret123")) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherOverloadedError):
+        await hasher.hash("secret123")
+
+    exposition = metrics.render_prometheus()
+    assert 'password_hasher_operations{state="running"} 1' in exposition
+    assert 'password_hasher_operations{state="pending"} 1' in exposition
+    assert "password_hasher_saturation 1.0" in exposition
+    assert "password_hasher_rejected_total 1" in exposition
+
+    await asyncio.gather(*hashes)
+    assert "password_hasher_saturation 0.0" in metrics.render_prometheus()
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+import time
+
+from vibero.core.session_cache import SessionCache
+from vibero.core.users import User, UserId
+
+
+def make_user(user_id: str) -> User:
+    return User(
+        id=UserId(user_id),
+        username=user_id,
+        email=f"{user_id}@example.com",
+        hashed_password="",
+        created_at=datetime.now(timezone.utc),
+        role="regular",
+    )
+
+
+def test_entries_do_not_outlive_the_token_expiry():
+    cache = SessionCache(ttl=60)
+
+    cache.put("expired", {"sub": "u1", "exp": time.time() - 1}, make_user("u1"))
+    cache.put("valid", {"sub": "u1", "exp": time.time() + 60}, make_user("u1"))
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") is not None
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SessionCache(max_size=2)
+
+    cache.put("t1", {"sub": "u1"}, make_user("u1"))
+    cache.put("t2", {"sub": "u2"}, make_user("u2"))
+    cache.get("t1")
+    cache.put("t3", {"sub": "u3"}, make_user("u3"))
+
+    assert cache.get("t1") is not None
+    assert cache.get("t2") is None
+    assert cache.get("t3") is not None
+
+
+def test_invalidating_a_user_drops_all_of_its_sessions():
+    cache = SessionCache()
+
+    cache.put("t1", {"sub": "u1"}, make_user("u1"))
+    cache.put("t2", {"sub": "u1"}, make_user("u1"))
+    cache.put("t3", {"sub": "u2"}, make_user("u2"))
+    cache.invalidate_user(UserId("u1"))
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") is not None
@@ -0,0 +1,100 @@
+pytest_plugins = ["pytest_asyncio"]
+import json
+from pathlib import Path
+
+import pytest
+
+from vibero.core.contextual_correlator import ContextualCorrelator
+from vibero.core.tracing import (
+    InMemorySpanExporter,
+    OtlpJsonFileExporter,
+    Tracer,
+    end_span,
+    span,
+    start_span,
+    traced,
+)
+
+
+@traced("work")
+async def work() -> None:
+    with span("step", {"n": 1}):
+        pass
+
+
+def test_spans_outside_a_trace_are_not_recorded():
+    with span("orphan") as orphan:
+        assert orphan is None
+
+
+@pytest.mark.asyncio
+async def test_nested_spans_are_exported_with_their_root():
+    correlator = ContextualCorrelator()
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(correlator, exporter)
+
+    with correlator.correlation_scope("RID(1)"):
+        with tracer.span("request", kind="server") as root:
+            await work()
+
+    [trace] = exporter.traces
+    spans = {s.name: s for s in trace}
+
+    assert root and spans["request"] is root
+    assert root.attributes["correlation_id"] == "RID(1)"
+    assert spans["work"].parent_span_id == root.span_id
+    assert spans["step"].parent_span_id == spans["work"].span_id
+    assert {s.trace_id for s in trace} == {root.trace_id}
+    assert all(s.status == "ok" for s in trace)
+
+
+def test_failed_spans_are_marked_as_errors():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(ContextualCorrelator(), exporter)
+
+    with pytest.raises(ValueError):
+        with tracer.span("request"):
+            with span("step"):
+                raise ValueError("boom")
+
+    [trace] = exporter.traces
+    assert [(s.name, s.status) for s in trace] == [
+        ("step", "error"),
+        ("request", "error"),
+    ]
+    assert trace[0].status_message == "ValueError: boom"
+
+
+def test_traces_are_written_as_otlp_json(tmp_path: Path):
+    exporter = OtlpJsonFileExporter(tmp_path / "traces.jsonl")
+    tracer = Tracer(ContextualCorrelator(), exporter)
+
+    with tracer.span("request", {"http.status_code": 200}):
+        with span("step"):
+            pass
+
+    tracer.close()
+
+    [line] = (tmp_path / "traces.jsonl").read_text().splitlines()
+    [resource_spans] = json.loads(line)["resourceSpans"]
+    [scope_spans] = resource_spans["scopeSpans"]
+    step, request = scope_spans["spans"]
+
+    assert step["parentSpanId"] == request["spanId"]
+    assert "parentSpanId" not in request
+    assert {"key": "http.status_code", "value": {"intValue": "200"}} in request[
+        "attributes"
+    ]
+
+
+def test_spans_ending_after_their_root_are_exported_as_a_follow_up():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(ContextualCorrelator(), exporter)
+
+    with tracer.span("request"):
+        streamed = start_span("games.find_iter")
+    assert streamed is not None
+    end_span(streamed)
+
+    [trace] = exporter.traces
+    assert [s.name for s in trace] == ["request", "games.find_iter"]